@@ -1,22 +1,27 @@
-import re
-
+from functools import lru_cache
 
 from onadata.libs.utils.common_tags import NESTED_RESERVED_ATTRIBUTES
 from onadata.libs.utils.string import base64_encodestring
 
+ENCODED_DOLLAR = base64_encodestring('$').strip()
+ENCODED_DOT = base64_encodestring('.').strip()
+KEY_WHITELIST = frozenset([
+    '$or', '$and', '$exists', '$in', '$gt', '$gte', '$lt', '$lte', '$regex',
+    '$options', '$all'
+])
+NESTED_RESERVED_PREFIXES = tuple(
+    '{}.'.format(reserved_attribute)
+    for reserved_attribute in NESTED_RESERVED_ATTRIBUTES
+)
+# Forms share most of their keys (meta fields, common question names), and
+# records of a form all have the same keys: results of the key functions below
+# are cached, up to this number of keys each
+KEY_CACHE_SIZE = 10000
+
 
 class MongoHelper:
 
-    KEY_WHITELIST = ['$or', '$and', '$exists', '$in', '$gt', '$gte',
-                     '$lt', '$lte', '$regex', '$options', '$all']
-    ENCODING_SUBSTITUTIONS = [
-        (re.compile(r'^\$'), base64_encodestring('$').strip()),
-        (re.compile(r'\.'), base64_encodestring('.').strip()),
-    ]
-    DECODING_SUBSTITUTIONS = [
-        (re.compile(r'^' + base64_encodestring('$').strip()), '$'),
-        (re.compile(base64_encodestring('.').strip()), '.'),
-    ]
+    KEY_WHITELIST = KEY_WHITELIST
 
     @classmethod
     def to_readable_dict(cls, d):
@@ -36,9 +41,10 @@ class MongoHelper:
             elif type(value) == dict:
                 value = cls.to_readable_dict(value)
 
-            if cls._is_attribute_encoded(key):
+            readable_key = _get_readable_key(key)
+            if readable_key is not None:
                 del d[key]
-                d[cls.decode(key)] = value
+                d[readable_key] = value
 
         return d
 
@@ -112,9 +118,11 @@ class MongoHelper:
                     # elements
                     d[first_part].update(cls.to_safe_dict(tree[first_part]))
 
-            elif cls.is_attribute_invalid(key):
-                del d[key]
-                d[cls.encode(key)] = value
+            else:
+                safe_key = _get_safe_key(key)
+                if safe_key is not None:
+                    del d[key]
+                    d[safe_key] = value
 
         return d
 
@@ -127,9 +135,7 @@ class MongoHelper:
         :param key: string
         :return: string
         """
-        for pattern, repl in cls.ENCODING_SUBSTITUTIONS:
-            key = re.sub(pattern, repl, key)
-        return key
+        return _encode(key)
 
     @classmethod
     def decode(cls, key):
@@ -140,9 +146,7 @@ class MongoHelper:
         :param key: string
         :return: string
         """
-        for pattern, repl in cls.DECODING_SUBSTITUTIONS:
-            key = re.sub(pattern, repl, key)
-        return key
+        return _decode(key)
 
     @classmethod
     def is_attribute_invalid(cls, key):
@@ -152,7 +156,7 @@ class MongoHelper:
         :return:
         """
         return key not in \
-               cls.KEY_WHITELIST and (key.startswith('$') or key.count('.') > 0)
+               KEY_WHITELIST and (key.startswith('$') or '.' in key)
 
     @classmethod
     def _is_attribute_encoded(cls, key):
@@ -163,9 +167,8 @@ class MongoHelper:
         :return: string
         """
         return (
-            key not in cls.KEY_WHITELIST and (
-                key.startswith('JA==') or
-                    key.count('Lg==') > 0
+            key not in KEY_WHITELIST and (
+                key.startswith(ENCODED_DOLLAR) or ENCODED_DOT in key
             )
         )
 
@@ -177,7 +180,38 @@ class MongoHelper:
         :param key: string
         :return: boolean
         """
-        for reserved_attribute in NESTED_RESERVED_ATTRIBUTES:
-            if key.startswith("{}.".format(reserved_attribute)):
-                return True
-        return False
+        return key.startswith(NESTED_RESERVED_PREFIXES)
+
+
+@lru_cache(maxsize=KEY_CACHE_SIZE)
+def _encode(key):
+    if key.startswith('$'):
+        key = ENCODED_DOLLAR + key[1:]
+    return key.replace('.', ENCODED_DOT)
+
+
+@lru_cache(maxsize=KEY_CACHE_SIZE)
+def _decode(key):
+    if key.startswith(ENCODED_DOLLAR):
+        key = '$' + key[len(ENCODED_DOLLAR):]
+    return key.replace(ENCODED_DOT, '.')
+
+
+@lru_cache(maxsize=KEY_CACHE_SIZE)
+def _get_readable_key(key):
+    """
+    Return the decoded `key`, or `None` if it is not encoded
+    """
+    if MongoHelper._is_attribute_encoded(key):
+        return _decode(key)
+    return None
+
+
+@lru_cache(maxsize=KEY_CACHE_SIZE)
+def _get_safe_key(key):
+    """
+    Return the encoded `key`, or `None` if it can be used as is
+    """
+    if MongoHelper.is_attribute_invalid(key):
+        return _encode(key)
+    return None
@@ -1,8 +1,13 @@
 # coding: utf-8
+import base64
+import json
+from urllib.parse import unquote
+
 import requests
 
+from bson import json_util
 from django.conf import settings
-from django.test import RequestFactory
+from django.test import RequestFactory, override_settings
 from guardian.shortcuts import assign_perm, remove_perm
 from kobo_service_account.utils import get_request_headers
 from rest_framework import status
@@ -230,6 +235,147 @@ class TestDataViewSet(TestBase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 1)
 
+    def test_data_keyset_pagination(self):
+        self._make_submissions()
+        view = DataViewSet.as_view({'get': 'list'})
+        formid = self.xform.pk
+        expected_ids = sorted(
+            self.xform.instances.values_list('pk', flat=True)
+        )
+        self.assertEqual(len(expected_ids), 4)
+
+        # Records which tie on the sort key are paged by `_id`
+        settings.MONGO_DB.instances.update_many(
+            {'_id': {'$in': expected_ids[:3]}},
+            {'$set': {'_submission_time': '2013-02-18T15:54:01'}},
+        )
+
+        for sort in (
+            '',
+            '&sort={"_id": -1}',
+            '&sort={"_submission_time": 1}',
+            '&sort={"_submission_time": -1}',
+            '&sort={"_submission_time": 1}&fields=["_id"]',
+        ):
+            ids = []
+            # The first page, without `after`, is linked to the next ones
+            url = f'/?limit=2{sort}'
+            while url:
+                self.assertLessEqual(len(ids), len(expected_ids))
+                request = self.factory.get(url, **self.extra)
+                response = view(request, pk=formid)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                ids.extend(record['_id'] for record in response.data)
+                url = None
+                if response.has_header('Link'):
+                    url = response['Link'][1:response['Link'].index('>')]
+            self.assertEqual(sorted(ids), expected_ids)
+            if sort == '&sort={"_id": -1}':
+                self.assertEqual(ids, expected_ids[::-1])
+
+        request = self.factory.get('/?start=1&after=', **self.extra)
+        response = view(request, pk=formid)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        request = self.factory.get('/?after=invalid', **self.extra)
+        response = view(request, pk=formid)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_data_keyset_pagination_with_other_sorts(self):
+        self._make_submissions()
+        view = DataViewSet.as_view({'get': 'list'})
+        formid = self.xform.pk
+        ids = sorted(self.xform.instances.values_list('pk', flat=True))
+
+        # Sorts whose key may hold values of different types, and sorts on
+        # several keys, are still paged with `start`, without `Link`
+        for sort in (
+            '{"transport/available_transportation_types_to_referral_facility"'
+            ': 1}',
+            '{"_submission_time": 1, "_id": -1}',
+        ):
+            request = self.factory.get(f'/?limit=2&sort={sort}', **self.extra)
+            response = view(request, pk=formid)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(response.data), 2)
+            self.assertFalse(response.has_header('Link'))
+
+        # `after` cannot page on several keys
+        request = self.factory.get(
+            '/?after=&sort={"_submission_time": 1, "_id": -1}', **self.extra
+        )
+        response = view(request, pk=formid)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # Nested attributes are followed from one page to the next
+        settings.MONGO_DB.instances.update_one(
+            {'_id': ids[0]}, {'$set': {'_validation_status': {'uid': 'b'}}}
+        )
+        settings.MONGO_DB.instances.update_one(
+            {'_id': ids[1]}, {'$set': {'_validation_status': {'uid': 'a'}}}
+        )
+        sort = '{"_validation_status.uid": 1}'
+        for fields in ('', '&fields=["_id"]'):
+            page_ids = []
+            url = f'/?limit=2&after=&sort={sort}{fields}'
+            while url:
+                self.assertLessEqual(len(page_ids), len(ids))
+                request = self.factory.get(url, **self.extra)
+                response = view(request, pk=formid)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                page_ids.extend(record['_id'] for record in response.data)
+                url = None
+                if response.has_header('Link'):
+                    url = response['Link'][1:response['Link'].index('>')]
+            # Missing values come first
+            self.assertEqual(page_ids, [ids[2], ids[3], ids[1], ids[0]])
+
+    def test_data_streaming(self):
+        self._make_submissions()
+        view = DataViewSet.as_view({'get': 'list'})
+        formid = self.xform.pk
+        request = self.factory.get('/?limit=3', **self.extra)
+        expected = view(request, pk=formid)
+
+        with override_settings(DATA_API_STREAMING_ENABLED=True):
+            request = self.factory.get('/?limit=3', **self.extra)
+            response = view(request, pk=formid)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertTrue(response.streaming)
+            data = json.loads(b''.join(response.streaming_content))
+            self.assertEqual(data, expected.data)
+            # The next page is linked even though the page is not loaded
+            self.assertEqual(response['Link'], expected['Link'])
+
+            # The token includes the sort key, even if it is not requested
+            query = '/?limit=3&sort={"_submission_time": -1}&fields=["_id"]'
+            with override_settings(DATA_API_STREAMING_ENABLED=False):
+                expected = view(
+                    self.factory.get(query, **self.extra), pk=formid
+                )
+            response = view(self.factory.get(query, **self.extra), pk=formid)
+            self.assertTrue(response.streaming)
+            data = json.loads(b''.join(response.streaming_content))
+            self.assertEqual(data, expected.data)
+            self.assertEqual(response['Link'], expected['Link'])
+            token = unquote(expected['Link'].split('after=')[1].split('>')[0])
+            sort_value, _ = json_util.loads(
+                base64.urlsafe_b64decode(token).decode()
+            )
+            self.assertIsNotNone(sort_value)
+
+            # Invalid parameters are reported before streaming
+            request = self.factory.get('/?query=invalid', **self.extra)
+            response = view(request, pk=formid)
+            self.assertEqual(
+                response.status_code, status.HTTP_400_BAD_REQUEST
+            )
+
+            request = self.factory.get('/?count=1', **self.extra)
+            response = view(request, pk=formid)
+            self.assertFalse(response.streaming)
+            self.assertEqual(response.data, {'count': 4})
+
     def test_anon_data_list(self):
         self._make_submissions()
         view = DataViewSet.as_view({'get': 'list'})
@@ -1,8 +1,12 @@
 # coding: utf-8
 import os
 import re
+from datetime import timedelta
+from unittest.mock import patch
 
 from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
 from django_digest.test import DigestAuth
 from guardian.shortcuts import assign_perm
 from rest_framework.reverse import reverse
@@ -11,11 +15,17 @@ from onadata.apps.api.tests.viewsets.test_abstract_viewset import (
     TestAbstractViewSet
 )
 from onadata.apps.api.viewsets.xform_list_api import XFormListApi
+from onadata.apps.form_disclaimer.models import FormDisclaimer
 from onadata.libs.constants import (
     CAN_ADD_SUBMISSIONS,
     CAN_VIEW_XFORM
 )
 from onadata.apps.logger.models.xform import XForm
+from onadata.apps.main.models.meta_data import (
+    MetaData,
+    PAIRED_DATA_REFRESH_LOCK_PREFIX,
+)
+from onadata.libs.utils.hash import get_hash
 
 
 class TestXFormListApiBase(TestAbstractViewSet):
@@ -246,6 +256,34 @@ class TestXFormListApiWithAuthRequired(TestXFormListApiBase):
             self.assertEqual(response['Content-Type'],
                              'text/xml; charset=utf-8')
 
+    def test_get_xform_list_with_disclaimer(self):
+        disclaimer = FormDisclaimer.objects.create(
+            language_code='en', message='Be nice', default=True
+        )
+        auth = DigestAuth('bob', 'bobbob')
+
+        def get_hashes():
+            request = self.factory.get('/')
+            response = self.view(request)
+            request.META.update(auth(request.META, response))
+            response = self.view(request)
+            self.assertEqual(response.status_code, 200)
+            return re.findall(
+                r'<hash>md5:(\w+)</hash>', response.render().content.decode()
+            )
+
+        xml_with_disclaimer = self.xform.xml_with_disclaimer
+        self.assertIn('Be nice', xml_with_disclaimer)
+        # The XML of the object itself is left untouched
+        self.assertNotIn('Be nice', self.xform.xml)
+        self.assertEqual(get_hashes(), [get_hash(xml_with_disclaimer)])
+
+        # Editing the disclaimer changes the hash
+        disclaimer.message = 'Be very nice'
+        disclaimer.save()
+        self.assertNotEqual(get_hashes(), [get_hash(xml_with_disclaimer)])
+        self.assertIn('Be very nice', self.xform.xml_with_disclaimer)
+
     def test_get_xform_list_inactive_form(self):
         self.xform.downloadable = False
         self.xform.save()
@@ -478,6 +516,85 @@ class TestXFormListApiWithAuthRequired(TestXFormListApiBase):
         self.assertTrue(response.has_header('Date'))
         self.assertEqual(response['Content-Type'], 'text/xml; charset=utf-8')
 
+    def test_conditional_get(self):
+        self._load_metadata(self.xform)
+
+        def get(action, etag=None, **kwargs):
+            view = XFormListApi.as_view({'get': action})
+            request = self.factory.head('/')
+            response = view(request, **kwargs)
+            auth = DigestAuth('bob', 'bobbob')
+            headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+            request = self.factory.get('/', **headers)
+            request.META.update(auth(request.META, response))
+            return view(request, **kwargs)
+
+        for action, kwargs in [
+            ('list', {}),
+            ('retrieve', {'pk': self.xform.pk}),
+            ('manifest', {'pk': self.xform.pk}),
+        ]:
+            response = get(action, **kwargs)
+            self.assertEqual(response.status_code, 200)
+            etag = response['ETag']
+
+            response = get(action, etag=etag, **kwargs)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response.render().content, b'')
+
+            response = get(action, etag='"outdated"', **kwargs)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['ETag'], etag)
+
+        # Modifying the form changes the ETag of the list
+        response = get('list')
+        etag = response['ETag']
+        self.xform.title = 'Transportation'
+        self.xform.save(update_fields=['title'])
+        response = get('list', etag=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_retrieve_xform_manifest_with_expired_paired_data(self):
+        paired_data = MetaData.objects.create(
+            xform=self.xform,
+            data_type='paired_data',
+            data_value='http://kpi/paired-data/xml-external',
+            file_hash='md5:abc',
+            from_kpi=True,
+        )
+        MetaData.objects.filter(pk=paired_data.pk).update(
+            date_modified=timezone.now() - timedelta(
+                seconds=settings.PAIRED_DATA_EXPIRATION + 1
+            )
+        )
+        lock_key = f'{PAIRED_DATA_REFRESH_LOCK_PREFIX}:{paired_data.pk}'
+        cache.delete(lock_key)
+        self.view = XFormListApi.as_view({'get': 'manifest'})
+
+        with patch(
+            'onadata.apps.main.models.meta_data.get_session'
+        ) as get_session_mock:
+            for _ in range(2):
+                request = self.factory.head('/')
+                response = self.view(request, pk=self.xform.pk)
+                auth = DigestAuth('bob', 'bobbob')
+                request = self.factory.get('/')
+                request.META.update(auth(request.META, response))
+                response = self.view(request, pk=self.xform.pk)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn(
+                    'md5:abc', response.render().content.decode('utf-8')
+                )
+
+        # Refreshed once, by the task (run eagerly in tests)
+        get_session_mock().head.assert_called_once_with(
+            paired_data.data_value
+        )
+        paired_data.refresh_from_db()
+        self.assertFalse(paired_data.has_expired)
+        cache.delete(lock_key)
+
     def test_retrieve_xform_manifest_as_anonymous(self):
         self._load_metadata(self.xform)
         self.view = XFormListApi.as_view({
@@ -5,7 +5,6 @@ import re
 import time
 from datetime import datetime
 
-import requests
 import rest_framework.views as rest_framework_views
 from django import forms
 from django.conf import settings
@@ -27,6 +26,7 @@ from onadata.apps.main.forms import QuickConverterForm
 from onadata.apps.main.models import UserProfile
 from onadata.apps.main.models.meta_data import MetaData
 from onadata.apps.viewer.models.parsed_instance import datetime_from_str
+from onadata.libs.utils.http_client import get_session
 from onadata.libs.utils.logger_tools import (
     publish_form,
     response_with_mimetype_and_name,
@@ -216,7 +216,7 @@ def get_media_file_response(
     internal_url = metadata.data_value.replace(
         settings.KOBOFORM_URL, settings.KOBOFORM_INTERNAL_URL
     )
-    response = requests.get(internal_url, headers=headers)
+    response = get_session().get(internal_url, headers=headers)
 
     return HttpResponse(
         content=response.content,
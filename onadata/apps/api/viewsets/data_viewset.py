@@ -3,10 +3,12 @@ import logging
 import json
 from typing import Union
 
+from django.conf import settings
 from django.db.models import Q
 from django.db.models.signals import pre_delete, post_delete
-from django.http import Http404
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from django.utils.translation import gettext as t
 from kobo_service_account.models import ServiceAccountUser
 from kobo_service_account.utils import get_real_user
@@ -15,8 +17,11 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
 from rest_framework.serializers import ValidationError
 from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.urls import replace_query_param
 
 from onadata.apps.api.exceptions import NoConfirmationProvidedException
 from onadata.apps.api.viewsets.xform_viewset import custom_response_handler
@@ -147,6 +152,34 @@ Provides a list of json submitted data for a specific form.
 >            }
 >        ]
 
+## Paginate submitted data of a specific form
+Use `limit` to set the page size. When a page is full, the response has a
+`Link` header pointing to the next page, e.g.
+`Link: <https://example.com/api/v1/data/22845?limit=1000&after=WzQ1MDNd>; rel="next"`.
+
+The `after` token points right after the last submission of the page, which
+lets the database seek to the next page instead of skipping all the previous
+submissions as `start` does: prefer it to page through large forms. `after`
+follows the `sort` parameter (only one key is supported; submissions which
+have the same value are ordered by `_id`) and cannot be used along with
+`start`. An empty `after` returns the first page. When `fields` is set, the
+sort key is returned as well, since the token is built from it.
+
+Submissions are compared with the sort key of the last one of the page, and
+only values of the same type are comparable: if the sort key holds values of
+different types, e.g. numbers and strings, some submissions are left out.
+Sort on a field which has the same type in all submissions.
+
+For this reason, pages are only linked without `after` when they are not
+sorted, or sorted on `_id` or `_submission_time`. Pass an empty `after` to
+page through submissions sorted on another key.
+
+<pre class="prettyprint">
+<b>GET</b> /api/v1/data/<code>{pk}</code>?limit=<code>1000</code>&after=<code>{token}</code></pre>
+> Example
+>
+>       curl -X GET 'https://example.com/api/v1/data/22845?limit=1000&after=WzQ1MDNd'
+
 ## Get a single data submission for a given form
 
 Get a single specific submission json data providing `pk`
@@ -483,7 +516,12 @@ Delete a specific submission in a form
         # Update Postgres & Mongo
         updated_records_count = Instance.objects.filter(
             **postgres_query
-        ).update(validation_status=new_validation_status)
+        ).update(
+            validation_status=new_validation_status,
+            # `auto_now` is not applied by `update()`. Let incremental exports
+            # know these submissions changed.
+            date_modified=timezone.now(),
+        )
         ParsedInstance.bulk_update_validation_statuses(mongo_query,
                                                        new_validation_status)
         return Response({
@@ -491,6 +529,12 @@ Delete a specific submission in a form
                       updated_records_count)
         }, status.HTTP_200_OK)
 
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        # Filled by `DataListSerializer` with the token of the next page
+        context['pagination'] = getattr(self, 'pagination', None)
+        return context
+
     def get_serializer_class(self):
         pk_lookup, dataid_lookup = self.lookup_fields
         pk = self.kwargs.get(pk_lookup)
@@ -725,12 +769,41 @@ Delete a specific submission in a form
             # With DRF ListSerializer are automatically created and wraps
             # everything in a list. Since this returns a list
             # # already, we unwrap it.
-            res = super().list(request, *args, **kwargs)
-            res.data = res.data[0]
+            self.pagination = {}
+            if self._can_stream(request):
+                res = self._get_streaming_response(xform)
+            else:
+                res = super().list(request, *args, **kwargs)
+                res.data = res.data[0]
+            if next_page_token := self.pagination.get('next'):
+                next_url = replace_query_param(
+                    request.build_absolute_uri(), 'after', next_page_token
+                )
+                res['Link'] = f'<{next_url}>; rel="next"'
             return res
 
         return custom_response_handler(request, xform, query, export_type)
 
+    def _can_stream(self, request) -> bool:
+        return (
+            settings.DATA_API_STREAMING_ENABLED
+            and isinstance(request.accepted_renderer, JSONRenderer)
+            and not request.query_params.get('count')
+        )
+
+    def _get_streaming_response(self, xform) -> StreamingHttpResponse:
+        """
+        Return the JSON array of submissions written record by record from
+        the Mongo cursor, so that memory usage does not depend on the page
+        size and the first bytes are sent as soon as the query returns
+        """
+        serializer = self.get_serializer()
+        records = serializer.iter_representation(xform)
+        return StreamingHttpResponse(
+            _stream_json_array(records),
+            content_type=JSONRenderer.media_type,
+        )
+
     @staticmethod
     def __build_db_queries(xform_, request_data):
 
@@ -817,3 +890,28 @@ Delete a specific submission in a form
             raise NoConfirmationProvidedException()
 
         return postgres_query, mongo_query
+
+
+def _stream_json_array(records, chunk_size=64 * 1024):
+    """
+    Encode `records` as a JSON array, yielding chunks of about `chunk_size`
+    characters instead of one chunk per record
+    """
+    encoder = JSONEncoder(
+        ensure_ascii=not api_settings.UNICODE_JSON,
+        separators=(',', ':') if api_settings.COMPACT_JSON else (', ', ': '),
+    )
+    buffer = ['[']
+    buffer_size = 1
+    for index, record in enumerate(records):
+        if index:
+            buffer.append(',')
+        encoded_record = encoder.encode(record)
+        buffer.append(encoded_record)
+        buffer_size += len(encoded_record) + 1
+        if buffer_size >= chunk_size:
+            yield ''.join(buffer)
+            buffer = []
+            buffer_size = 0
+    buffer.append(']')
+    yield ''.join(buffer)
@@ -1,4 +1,5 @@
 # coding: utf-8
+import json
 from datetime import datetime
 try:
     from zoneinfo import ZoneInfo
@@ -8,6 +9,7 @@ except ImportError:
 from django.conf import settings
 from django.http import Http404
 from django.shortcuts import get_object_or_404
+from django.utils.http import parse_etags, quote_etag
 from rest_framework import permissions, status, viewsets
 from rest_framework.response import Response
 from rest_framework.decorators import action
@@ -22,6 +24,12 @@ from onadata.libs.renderers.renderers import XFormListRenderer
 from onadata.libs.renderers.renderers import XFormManifestRenderer
 from onadata.libs.serializers.xform_serializer import XFormListSerializer
 from onadata.libs.serializers.xform_serializer import XFormManifestSerializer
+from onadata.libs.utils.hash import get_hash
+from onadata.libs.utils.xml import (
+    get_disclaimers_by_xform,
+    get_xml_with_disclaimer,
+    get_xml_with_disclaimer_hash,
+)
 
 
 # 10,000,000 bytes
@@ -68,6 +76,29 @@ class XFormListApi(viewsets.ReadOnlyModelViewSet):
             headers=self.get_openrosa_headers(), status=status.HTTP_204_NO_CONTENT
         )
 
+    def get_etag(self, *parts) -> str:
+        """
+        Return a strong ETag for a response built from `parts`, which must
+        include everything the body depends on
+        """
+        return quote_etag(get_hash(json.dumps(parts, default=str)))
+
+    def get_not_modified_response(self, etag: str):
+        """
+        Return a `304 Not Modified` response if the client already has the
+        version of the resource identified by `etag`, `None` otherwise
+        """
+        if_none_match = self.request.headers.get('If-None-Match')
+        if not if_none_match:
+            return
+
+        etags = parse_etags(if_none_match)
+        if etag in etags or '*' in etags:
+            return Response(
+                headers={**self.get_openrosa_headers(), 'ETag': etag},
+                status=status.HTTP_304_NOT_MODIFIED,
+            )
+
     def get_renderers(self):
         if self.action and self.action == 'manifest':
             return [XFormManifestRenderer()]
@@ -112,64 +143,106 @@ class XFormListApi(viewsets.ReadOnlyModelViewSet):
         if request.method == 'HEAD':
             return self.get_response_for_head_request()
 
+        object_list = list(object_list)
+        # Fetch the disclaimers of all the forms at once
+        disclaimers = get_disclaimers_by_xform(
+            [xform.pk for xform in object_list]
+        )
+        hashes = {
+            xform.pk: get_xml_with_disclaimer_hash(
+                xform, disclaimers[xform.pk]
+            )
+            for xform in object_list
+        }
+        # The version of a form is part of its JSON, which cannot change
+        # without `date_modified` being bumped
+        etag = self.get_etag(
+            [
+                (
+                    xform.pk,
+                    xform.id_string,
+                    xform.title,
+                    xform.description,
+                    xform.date_modified,
+                    hashes[xform.pk],
+                )
+                for xform in object_list
+            ]
+        )
+        if not_modified_response := self.get_not_modified_response(etag):
+            return not_modified_response
+
+        context = self.get_serializer_context()
+        context['hashes'] = hashes
         serializer = self.get_serializer(
-            object_list, many=True, require_auth=not bool(kwargs.get('username'))
+            object_list,
+            many=True,
+            context=context,
+            require_auth=not bool(kwargs.get('username')),
+        )
+        return Response(
+            serializer.data,
+            headers={**self.get_openrosa_headers(), 'ETag': etag},
         )
-        return Response(serializer.data, headers=self.get_openrosa_headers())
 
     def retrieve(self, request, *args, **kwargs):
         xform = self.get_object()
 
+        etag = quote_etag(get_xml_with_disclaimer_hash(xform))
+        if not_modified_response := self.get_not_modified_response(etag):
+            return not_modified_response
+
         return Response(
-            xform.xml_with_disclaimer, headers=self.get_openrosa_headers()
+            get_xml_with_disclaimer(xform),
+            headers={**self.get_openrosa_headers(), 'ETag': etag},
         )
 
     @action(detail=True, methods=['GET'])
     def manifest(self, request, *args, **kwargs):
         xform = self.get_object()
-        media_files = {}
-        expired_objects = False
 
         if request.method == 'HEAD':
             return self.get_response_for_head_request()
 
-        # Retrieve all media files for the current form
-        queryset = MetaData.objects.filter(
-            data_type__in=MetaData.MEDIA_FILES_TYPE, xform=xform
-        )
-        object_list = queryset.all()
-
-        # Keep only media files that are not considered as expired.
-        # Expired files may have an out-of-date hash which needs to be refreshed
-        # before being exposed to the serializer
-        for obj in object_list:
-            if not obj.has_expired:
-                media_files[obj.pk] = obj
-                continue
-            expired_objects = True
-
-        # Retrieve all media files for the current form again except non
-        # expired ones. The expired objects should have an up-to-date hash now.
-        if expired_objects:
-            refreshed_object_list = queryset.exclude(pk__in=media_files.keys())
-            for refreshed_object in refreshed_object_list.all():
-                media_files[refreshed_object.pk] = refreshed_object
-
         # Sort objects all the time because EE calculates a hash of the
         # whole manifest to detect any changes the next time EE downloads it.
         # If no files changed, but the order did, the hash of the manifest
         # would be different and EE would display:
         # > "A new version of this form has been downloaded"
-        media_files = dict(sorted(media_files.items()))
+        media_files = list(
+            MetaData.objects.filter(
+                data_type__in=MetaData.MEDIA_FILES_TYPE, xform=xform
+            ).order_by('pk')
+        )
+
+        # Expired paired data files are refreshed in the background: the
+        # manifest lists their current version, and clients get the new one
+        # the next time they download it
+        for obj in media_files:
+            if obj.has_expired:
+                obj.schedule_paired_data_refresh()
+
+        etag = self.get_etag(
+            [
+                (obj.pk, obj.data_value, obj.from_kpi, obj.md5_hash)
+                for obj in media_files
+            ]
+        )
+        if not_modified_response := self.get_not_modified_response(etag):
+            return not_modified_response
+
         context = self.get_serializer_context()
         serializer = XFormManifestSerializer(
-            media_files.values(),
+            media_files,
             many=True,
             context=context,
             require_auth=not bool(kwargs.get('username')),
         )
 
-        return Response(serializer.data, headers=self.get_openrosa_headers())
+        return Response(
+            serializer.data,
+            headers={**self.get_openrosa_headers(), 'ETag': etag},
+        )
 
     @action(detail=True, methods=['GET'])
     def media(self, request, *args, **kwargs):
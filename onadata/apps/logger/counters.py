@@ -0,0 +1,344 @@
+# coding: utf-8
+"""
+Buffer for the counters updated on each submission, i.e. `num_of_submissions`
+and `attachment_storage_bytes` of `XForm` and `UserProfile`, and the daily and
+monthly submission counters.
+
+Updating these counters takes a lock on the same few rows for every
+submission, which piles up under heavy load. When
+`settings.SUBMISSION_COUNTERS_BUFFERED` is `True`, deltas are accumulated in
+Redis instead, and `flush_counters()` (run by Celery beat, see
+`onadata.apps.logger.tasks.flush_buffered_counters`) writes them with one
+`UPDATE` per row. Deltas are only buffered once the transaction of the
+submission is committed. Readers must add the pending deltas, see
+`get_pending_xform_counters()`.
+"""
+import logging
+from collections import defaultdict
+from datetime import date, datetime
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django_redis import get_redis_connection
+
+from onadata.apps.logger.models.daily_xform_submission_counter import (
+    DailyXFormSubmissionCounter,
+)
+from onadata.apps.logger.models.monthly_xform_submission_counter import (
+    MonthlyXFormSubmissionCounter,
+)
+from onadata.apps.logger.models.xform import XForm
+
+KEY_PREFIX = 'kobocat:counters'
+XFORM_SUBMISSIONS_KEY = f'{KEY_PREFIX}:xform_submissions'
+XFORM_STORAGE_KEY = f'{KEY_PREFIX}:xform_storage'
+XFORM_LAST_SUBMISSION_KEY = f'{KEY_PREFIX}:xform_last_submission'
+PROFILE_SUBMISSIONS_KEY = f'{KEY_PREFIX}:profile_submissions'
+PROFILE_STORAGE_KEY = f'{KEY_PREFIX}:profile_storage'
+DAILY_KEY = f'{KEY_PREFIX}:daily'
+MONTHLY_KEY = f'{KEY_PREFIX}:monthly'
+# Held while deltas are taken from Redis and written to the database
+FLUSH_LOCK_KEY = f'{KEY_PREFIX}:flush_lock'
+FLUSH_LOCK_TIMEOUT = 300
+
+DELTA_KEYS = (
+    XFORM_SUBMISSIONS_KEY,
+    XFORM_STORAGE_KEY,
+    PROFILE_SUBMISSIONS_KEY,
+    PROFILE_STORAGE_KEY,
+    DAILY_KEY,
+    MONTHLY_KEY,
+)
+
+
+def is_buffered() -> bool:
+    return settings.SUBMISSION_COUNTERS_BUFFERED
+
+
+def buffer_submission_count(
+    xform_id: int,
+    user_id: int,
+    count: int,
+    last_submission_time: datetime = None,
+):
+    """
+    Add `count` (negative for deletions) to `num_of_submissions` of the
+    `XForm` and of its owner's `UserProfile`, once the current transaction is
+    committed
+    """
+    def buffer():
+        pipeline = _get_redis_client().pipeline(transaction=False)
+        pipeline.hincrby(XFORM_SUBMISSIONS_KEY, xform_id, count)
+        pipeline.hincrby(PROFILE_SUBMISSIONS_KEY, user_id, count)
+        if last_submission_time is not None:
+            pipeline.hset(
+                XFORM_LAST_SUBMISSION_KEY,
+                xform_id,
+                last_submission_time.isoformat(),
+            )
+        pipeline.execute()
+
+    transaction.on_commit(buffer)
+
+
+def buffer_attachment_storage_bytes(xform_id: int, user_id: int, delta: int):
+    """
+    Add `delta` (negative for deletions) to `attachment_storage_bytes` of the
+    `XForm` and of its owner's `UserProfile`, once the current transaction is
+    committed
+    """
+    def buffer():
+        pipeline = _get_redis_client().pipeline(transaction=False)
+        pipeline.hincrby(XFORM_STORAGE_KEY, xform_id, delta)
+        pipeline.hincrby(PROFILE_STORAGE_KEY, user_id, delta)
+        pipeline.execute()
+
+    transaction.on_commit(buffer)
+
+
+def buffer_daily_counter(
+    xform_id: int, user_id: int, date_created: date, count: int = 1
+):
+    transaction.on_commit(
+        lambda: _get_redis_client().hincrby(
+            DAILY_KEY,
+            f'{xform_id}:{user_id}:{date_created.isoformat()}',
+            count,
+        )
+    )
+
+
+def buffer_monthly_counter(
+    xform_id: int, user_id: int, year: int, month: int, count: int = 1
+):
+    transaction.on_commit(
+        lambda: _get_redis_client().hincrby(
+            MONTHLY_KEY, f'{xform_id}:{user_id}:{year}:{month}', count
+        )
+    )
+
+
+def get_pending_xform_counters(xform_id: int) -> tuple[int, int]:
+    """
+    Return the deltas of `num_of_submissions` and `attachment_storage_bytes`
+    of an `XForm` which have not been flushed yet
+    """
+    return get_pending_xform_counters_by_id([xform_id]).get(xform_id, (0, 0))
+
+
+def get_pending_xform_counters_by_id(
+    xform_ids: list[int],
+) -> dict[int, tuple[int, int]]:
+    """
+    Like `get_pending_xform_counters()`, for several `XForm`s at once, with
+    one round trip to Redis
+    """
+    if not is_buffered() or not xform_ids:
+        return {}
+
+    pipeline = _get_redis_client().pipeline(transaction=False)
+    pipeline.hmget(XFORM_SUBMISSIONS_KEY, xform_ids)
+    pipeline.hmget(XFORM_STORAGE_KEY, xform_ids)
+    submissions, storage_bytes = pipeline.execute()
+    return {
+        xform_id: (int(count or 0), int(bytes_ or 0))
+        for xform_id, count, bytes_ in zip(
+            xform_ids, submissions, storage_bytes
+        )
+    }
+
+
+def prefetch_pending_xform_counters(xforms: list[XForm]):
+    """
+    Fetch the pending deltas of a list of `XForm`s at once, to be returned by
+    `XForm.get_pending_counters()` instead of fetching them one form at a time
+    """
+    pending_counters = get_pending_xform_counters_by_id(
+        [xform.pk for xform in xforms]
+    )
+    for xform in xforms:
+        xform.prefetched_pending_counters = pending_counters.get(
+            xform.pk, (0, 0)
+        )
+
+
+def get_pending_profile_counters(user_id: int) -> tuple[int, int]:
+    """
+    Return the deltas of `num_of_submissions` and `attachment_storage_bytes`
+    of a `UserProfile` which have not been flushed yet
+    """
+    if not is_buffered():
+        return 0, 0
+
+    pipeline = _get_redis_client().pipeline(transaction=False)
+    pipeline.hget(PROFILE_SUBMISSIONS_KEY, user_id)
+    pipeline.hget(PROFILE_STORAGE_KEY, user_id)
+    submissions, storage_bytes = pipeline.execute()
+    return int(submissions or 0), int(storage_bytes or 0)
+
+
+def reset_xform_submission_count(xform: XForm) -> int:
+    """
+    Set `num_of_submissions` of `xform` to its number of submissions, and
+    discard its pending delta, which this number includes. Hold the lock of
+    `flush_counters()`, so that a flush running meanwhile does not add the
+    delta to the new value.
+    """
+    redis_client = _get_redis_client()
+    with redis_client.lock(FLUSH_LOCK_KEY, timeout=FLUSH_LOCK_TIMEOUT):
+        redis_client.hdel(XFORM_SUBMISSIONS_KEY, xform.pk)
+        xform.num_of_submissions = xform.instances.count()
+        xform.save(update_fields=['num_of_submissions'])
+    xform.prefetched_pending_counters = None
+    return xform.num_of_submissions
+
+
+def flush_counters():
+    """
+    Write all pending deltas to the database, aggregated to one `UPDATE` per
+    row. Deltas are taken from Redis atomically, and put back if they cannot
+    be written.
+    """
+    redis_client = _get_redis_client()
+    with redis_client.lock(FLUSH_LOCK_KEY, timeout=FLUSH_LOCK_TIMEOUT):
+        _flush_counters(redis_client)
+
+
+def _flush_counters(redis_client):
+    keys = DELTA_KEYS + (XFORM_LAST_SUBMISSION_KEY,)
+    pipeline = redis_client.pipeline(transaction=True)
+    for key in keys:
+        pipeline.hgetall(key)
+        pipeline.delete(key)
+    responses = pipeline.execute()
+
+    pending = {}
+    for key, values in zip(keys, responses[::2]):
+        pending[key] = {
+            field.decode(): value.decode() for field, value in values.items()
+        }
+
+    if not any(pending.values()):
+        return
+
+    try:
+        with transaction.atomic():
+            _write_counters(pending)
+    except Exception:
+        logging.error('Failed to flush submission counters', exc_info=True)
+        _restore_counters(redis_client, pending)
+        raise
+
+
+def _get_redis_client():
+    return get_redis_connection(settings.SUBMISSION_COUNTERS_REDIS_CACHE)
+
+
+def _restore_counters(redis_client, pending: dict):
+    pipeline = redis_client.pipeline(transaction=False)
+    for key in DELTA_KEYS:
+        for field, delta in pending[key].items():
+            pipeline.hincrby(key, field, int(delta))
+    for field, value in pending[XFORM_LAST_SUBMISSION_KEY].items():
+        # Do not overwrite a more recent submission time
+        pipeline.hsetnx(XFORM_LAST_SUBMISSION_KEY, field, value)
+    pipeline.execute()
+
+
+def _write_counters(pending: dict):
+    # Hack to avoid circular imports
+    UserProfile = User.profile.related.related_model  # noqa
+
+    xform_submissions = pending[XFORM_SUBMISSIONS_KEY]
+    xform_storage = pending[XFORM_STORAGE_KEY]
+    last_submission_times = pending[XFORM_LAST_SUBMISSION_KEY]
+    xform_ids = set(xform_submissions) | set(xform_storage)
+    for xform_id in xform_ids:
+        updates = {}
+        if submissions := int(xform_submissions.get(xform_id, 0)):
+            updates['num_of_submissions'] = Greatest(
+                F('num_of_submissions') + submissions, Value(0)
+            )
+        if storage_bytes := int(xform_storage.get(xform_id, 0)):
+            updates['attachment_storage_bytes'] = Greatest(
+                F('attachment_storage_bytes') + storage_bytes, Value(0)
+            )
+        if last_submission_time := last_submission_times.get(xform_id):
+            updates['last_submission_time'] = datetime.fromisoformat(
+                last_submission_time
+            )
+        if updates:
+            XForm.all_objects.filter(pk=int(xform_id)).update(**updates)
+
+    profile_submissions = pending[PROFILE_SUBMISSIONS_KEY]
+    profile_storage = pending[PROFILE_STORAGE_KEY]
+    user_ids = set(profile_submissions) | set(profile_storage)
+    existing_user_ids = set(
+        User.objects.filter(pk__in=[int(pk) for pk in user_ids]).values_list(
+            'pk', flat=True
+        )
+    )
+    for user_id in user_ids:
+        if int(user_id) not in existing_user_ids:
+            continue
+        updates = {}
+        if submissions := int(profile_submissions.get(user_id, 0)):
+            updates['num_of_submissions'] = Greatest(
+                F('num_of_submissions') + submissions, Value(0)
+            )
+        if storage_bytes := int(profile_storage.get(user_id, 0)):
+            updates['attachment_storage_bytes'] = Greatest(
+                F('attachment_storage_bytes') + storage_bytes, Value(0)
+            )
+        if updates:
+            profile, created = UserProfile.objects.only('pk').get_or_create(
+                user_id=int(user_id)
+            )
+            UserProfile.objects.filter(pk=profile.pk).update(**updates)
+
+    _write_period_counters(
+        DailyXFormSubmissionCounter,
+        pending[DAILY_KEY],
+        lambda period: {'date': date.fromisoformat(period[0])},
+    )
+    _write_period_counters(
+        MonthlyXFormSubmissionCounter,
+        pending[MONTHLY_KEY],
+        lambda period: {'year': int(period[0]), 'month': int(period[1])},
+    )
+
+
+def _write_period_counters(model, deltas: dict, get_period_criteria):
+    counts = defaultdict(int)
+    xform_ids = set()
+    user_ids = set()
+    for field, delta in deltas.items():
+        xform_id, user_id, *period = field.split(':')
+        counts[(int(xform_id), int(user_id), tuple(period))] += int(delta)
+        xform_ids.add(int(xform_id))
+        user_ids.add(int(user_id))
+
+    existing_xform_ids = set(
+        XForm.all_objects.filter(pk__in=xform_ids).values_list('pk', flat=True)
+    )
+    existing_user_ids = set(
+        User.objects.filter(pk__in=user_ids).values_list('pk', flat=True)
+    )
+
+    for (xform_id, user_id, period), count in counts.items():
+        if not count or user_id not in existing_user_ids:
+            continue
+        criteria = get_period_criteria(period)
+        # Like `update_catch_all_counter_on_delete()`, count submissions of
+        # forms deleted in the meantime in the counters without `xform`
+        criteria['xform_id'] = (
+            xform_id if xform_id in existing_xform_ids else None
+        )
+        # make sure the counter exists
+        model.objects.get_or_create(user_id=user_id, **criteria)
+        model.objects.filter(user_id=user_id, **criteria).update(
+            counter=F('counter') + count
+        )
@@ -4,10 +4,14 @@ import shutil
 import tempfile
 import zipfile
 
+from django.conf import settings
 from django.core.files.uploadedfile import InMemoryUploadedFile
 
 from onadata.apps.logger.xform_fs import XFormInstanceFS
-from onadata.libs.utils.logger_tools import create_instance
+from onadata.libs.utils.logger_tools import (
+    bulk_create_instances,
+    create_instance,
+)
 
 # odk
 # ├── forms
@@ -42,26 +46,6 @@ def django_file(path, field_name, content_type):
     )
 
 
-def iterate_through_instances(dirpath, callback):
-    total_file_count = 0
-    success_count = 0
-    errors = []
-
-    for directory, subdirs, subfiles in os.walk(dirpath):
-        for filename in subfiles:
-            filepath = os.path.join(directory, filename)
-            if XFormInstanceFS.is_valid_instance(filepath):
-                xfxs = XFormInstanceFS(filepath)
-                try:
-                    success_count += callback(xfxs)
-                except Exception as e:
-                    errors.append("%s => %s" % (xfxs.filename, str(e)))
-                del xfxs
-                total_file_count += 1
-
-    return total_file_count, success_count, errors
-
-
 def import_instances_from_zip(zipfile_path, user, status="zip"):
     try:
         temp_directory = tempfile.mkdtemp()
@@ -78,31 +62,51 @@ def import_instances_from_zip(zipfile_path, user, status="zip"):
 
 
 def import_instances_from_path(path, user, status="zip"):
-    def callback(xform_fs):
+    total_count = 0
+    success_count = 0
+    errors = []
+
+    def bulk_import(xform_fss):
         """
-        This callback is passed an instance of a XFormInstanceFS.
-        See xform_fs.py for more info.
+        Save a batch of instances, each one passed as an instance of
+        XFormInstanceFS. See xform_fs.py for more info.
         """
-        with django_file(xform_fs.path, field_name="xml_file",
-                         content_type="text/xml") as xml_file:
+        nonlocal success_count
+        submissions = []
+        for xform_fs in xform_fss:
             images = [django_file(jpg, field_name="image",
                       content_type="image/jpeg") for jpg in xform_fs.photos]
-            # TODO: if an instance has been submitted make sure all the
-            # files are in the database.
-            # there shouldn't be any instances with a submitted status in the
-            # import.
-            instance = create_instance(user.username, xml_file, images, status)
-
-            for i in images:
-                i.close()
-                i.close()
-
-            if instance:
-                return 1
-            else:
-                return 0
-
-    total_count, success_count, errors = iterate_through_instances(
-        path, callback)
+            submissions.append((xform_fs.xml, images))
+
+        # TODO: if an instance has been submitted make sure all the
+        # files are in the database.
+        # there shouldn't be any instances with a submitted status in the
+        # import.
+        try:
+            results = bulk_create_instances(user.username, submissions, status)
+        finally:
+            for _, images in submissions:
+                for i in images:
+                    i.close()
+
+        for xform_fs, (error, instance) in zip(xform_fss, results):
+            if error:
+                errors.append("%s => %s" % (xform_fs.filename, str(error)))
+            elif instance:
+                success_count += 1
+
+    batch = []
+    for directory, subdirs, subfiles in os.walk(path):
+        for filename in subfiles:
+            filepath = os.path.join(directory, filename)
+            if XFormInstanceFS.is_valid_instance(filepath):
+                batch.append(XFormInstanceFS(filepath))
+                total_count += 1
+                if len(batch) >= settings.BULK_SUBMISSION_BATCH_SIZE:
+                    bulk_import(batch)
+                    batch = []
+
+    if batch:
+        bulk_import(batch)
 
     return total_count, success_count, errors
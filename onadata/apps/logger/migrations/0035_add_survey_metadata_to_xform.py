@@ -0,0 +1,18 @@
+# Generated by Django 4.2.15 on 2026-10-18 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logger', '0034_set_require_auth_at_project_level'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='xform',
+            name='survey_metadata',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
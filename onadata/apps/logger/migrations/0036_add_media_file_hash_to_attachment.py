@@ -0,0 +1,20 @@
+# Generated by Django 4.2.15 on 2026-10-18 14:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logger', '0035_add_survey_metadata_to_xform'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attachment',
+            name='media_file_hash',
+            field=models.CharField(
+                blank=True, db_index=True, max_length=50, null=True
+            ),
+        ),
+    ]
@@ -3,12 +3,15 @@ import mimetypes
 import os
 
 from django.conf import settings
-from django.db import models
+from django.core.cache import cache
+from django.db import models, transaction
 from django.utils.http import urlencode
 
 from onadata.libs.utils.hash import get_hash
 from .instance import Instance
 
+THUMBNAILS_GENERATION_LOCK_PREFIX = 'kobocat:thumbnails_generation'
+
 
 def generate_attachment_filename(instance, filename):
     xform = instance.xform
@@ -25,6 +28,10 @@ def upload_to(attachment, filename):
 
 
 def hash_attachment_contents(contents):
+    """
+    Return the MD5 hash of `contents`, bytes or a file opened in binary mode.
+    Files are read by chunks, not loaded in memory at once.
+    """
     return get_hash(contents)
 
 
@@ -46,6 +53,10 @@ class Attachment(models.Model):
     media_file_size = models.PositiveIntegerField(blank=True, null=True)
     mimetype = models.CharField(
         max_length=100, null=False, blank=True, default='')
+    # Set on upload, see `hash_attachment_contents()`. Attachments saved before
+    # this field existed get it set the first time `file_hash` is read
+    media_file_hash = models.CharField(
+        max_length=50, null=True, blank=True, db_index=True)
     deleted_at = models.DateTimeField(blank=True, null=True, db_index=True)
 
     objects = AttachmentDefaultManager()
@@ -55,6 +66,7 @@ class Attachment(models.Model):
         app_label = 'logger'
 
     def save(self, *args, **kwargs):
+        is_new_file = bool(self.media_file) and not self.media_file._committed
         if self.media_file:
             self.media_file_basename = self.filename
             if self.mimetype == '':
@@ -65,17 +77,59 @@ class Attachment(models.Model):
             # Cache the file size in the database to avoid expensive calls to
             # the storage engine when running reports
             self.media_file_size = self.media_file.size
+            if not self.media_file_hash and not self.media_file._committed:
+                # Hash new files while they are still local
+                self.media_file_hash = hash_attachment_contents(
+                    self.media_file.file
+                )
+                self.media_file.file.seek(0)
 
         super().save(*args, **kwargs)
 
+        if is_new_file and self.mimetype.startswith('image'):
+            transaction.on_commit(self.schedule_thumbnails_generation)
+
+    @property
+    def thumbnails_generation_lock_key(self):
+        return f'{THUMBNAILS_GENERATION_LOCK_PREFIX}:{self.pk}'
+
+    def schedule_thumbnails_generation(self) -> bool:
+        """
+        Generate the thumbnails of the image in the background, unless it has
+        already been scheduled within the
+        `THUMBNAILS_GENERATION_LOCK_TIMEOUT` period. Return whether the
+        generation has been scheduled.
+        """
+        # Avoid circular import
+        from onadata.apps.logger.tasks import generate_thumbnails
+
+        # `add()` is atomic: only one request schedules the generation. The
+        # lock is released once the thumbnails are saved
+        lock_acquired = cache.add(
+            self.thumbnails_generation_lock_key,
+            True,
+            settings.THUMBNAILS_GENERATION_LOCK_TIMEOUT,
+        )
+        if lock_acquired:
+            generate_thumbnails.delay(self.pk)
+        return lock_acquired
+
     @property
     def file_hash(self):
+        if self.media_file_hash:
+            return self.media_file_hash
+
         if self.media_file.storage.exists(self.media_file.name):
             media_file_position = self.media_file.tell()
             self.media_file.seek(0)
-            media_file_hash = hash_attachment_contents(self.media_file.read())
+            self.media_file_hash = hash_attachment_contents(self.media_file)
             self.media_file.seek(media_file_position)
-            return media_file_hash
+            if self.pk:
+                # Avoid `save()`, which would recompute the size of the file
+                Attachment.all_objects.filter(pk=self.pk).update(
+                    media_file_hash=self.media_file_hash
+                )
+            return self.media_file_hash
         return ''
 
     @property
@@ -1,4 +1,5 @@
 # coding: utf-8
+from collections import Counter
 from hashlib import sha256
 
 try:
@@ -12,6 +13,7 @@ from django.contrib.gis.db import models
 from django.contrib.gis.geos import GeometryCollection, Point
 from django.db import transaction
 from django.db.models import Case, F, When
+from django.db.models.signals import m2m_changed
 from django.db.models.signals import post_delete
 from django.db.models.signals import post_save
 from django.utils import timezone
@@ -19,6 +21,7 @@ from django.utils.encoding import smart_str
 from jsonfield import JSONField
 from taggit.managers import TaggableManager
 
+from onadata.apps.logger import counters
 from onadata.apps.logger.exceptions import (
     FormInactiveError,
     TemporarilyUnavailableError,
@@ -32,8 +35,11 @@ from onadata.apps.logger.models.daily_xform_submission_counter import (
 from onadata.apps.logger.models.monthly_xform_submission_counter import (
     MonthlyXFormSubmissionCounter,
 )
-from onadata.apps.logger.xform_instance_parser import XFormInstanceParser, \
-    clean_and_parse_xml, get_uuid_from_xml
+from onadata.apps.logger.xform_instance_parser import (
+    ParsedSubmission,
+    XFormInstanceParser,
+    to_xml_document,
+)
 from onadata.libs.utils.common_tags import (
     ATTACHMENTS,
     GEOLOCATION,
@@ -52,7 +58,7 @@ from onadata.libs.utils.model_tools import set_uuid
 # need to establish id_string of the xform before we run get_dict since
 # we now rely on data dictionary to parse the xml
 def get_id_string_from_xml_str(xml_str):
-    xml_obj = clean_and_parse_xml(xml_str)
+    xml_obj = to_xml_document(xml_str)
     root_node = xml_obj.documentElement
     id_string = root_node.getAttribute('id')
 
@@ -83,6 +89,14 @@ def update_xform_submission_count(sender, instance, created, **kwargs):
     # `defer_counting` is a Python-only attribute
     if getattr(instance, 'defer_counting', False):
         return
+    if counters.is_buffered():
+        counters.buffer_submission_count(
+            instance.xform_id,
+            instance.xform.user_id,
+            1,
+            last_submission_time=instance.date_created,
+        )
+        return
     with transaction.atomic():
         xform = XForm.objects.only('user_id').get(pk=instance.xform_id)
         # Update with `F` expression instead of `select_for_update` to avoid
@@ -126,7 +140,26 @@ def nullify_exports_time_of_last_submission(sender, instance, **kwargs):
         # Match the statuses considered by `Export.exports_outdated()`
         internal_status__in=[export_model.SUCCESSFUL, export_model.PENDING],
     )
-    f.update(time_of_last_submission=None)
+    # Also prevent new exports from appending to files containing deleted
+    # submissions
+    f.update(time_of_last_submission=None, last_exported_id=None)
+
+
+def update_date_modified_on_tags_change(sender, instance, action, **kwargs):
+    """
+    `_tags` are exported along with the submission, but changing them does not
+    save the `Instance`. Bump `date_modified` so that incremental exports do
+    not append to files containing the former tags.
+    """
+    if not isinstance(instance, Instance) or action not in (
+        'post_add',
+        'post_remove',
+        'post_clear',
+    ):
+        return
+    Instance.objects.filter(pk=instance.pk).update(
+        date_modified=timezone.now()
+    )
 
 
 def update_xform_daily_counter(sender, instance, created, **kwargs):
@@ -138,6 +171,12 @@ def update_xform_daily_counter(sender, instance, created, **kwargs):
     # get the date submitted
     date_created = instance.date_created.date()
 
+    if counters.is_buffered():
+        counters.buffer_daily_counter(
+            instance.xform_id, instance.xform.user_id, date_created
+        )
+        return
+
     # make sure the counter exists
     DailyXFormSubmissionCounter.objects.get_or_create(
         date=date_created,
@@ -158,6 +197,16 @@ def update_xform_monthly_counter(sender, instance, created, **kwargs):
     if getattr(instance, 'defer_counting', False):
         return
 
+    if counters.is_buffered():
+        date_created = instance.date_created.date()
+        counters.buffer_monthly_counter(
+            instance.xform_id,
+            instance.xform.user_id,
+            date_created.year,
+            date_created.month,
+        )
+        return
+
     # get the user_id for the xform the instance was submitted for
     xform = XForm.objects.only('pk', 'user_id').get(
         pk=instance.xform_id
@@ -182,6 +231,82 @@ def update_xform_monthly_counter(sender, instance, created, **kwargs):
     ).update(counter=F('counter') + 1)
 
 
+def update_xform_submission_counters_in_bulk(xform, dates_created):
+    """
+    Apply at once what `update_xform_submission_count()`,
+    `update_xform_daily_counter()` and `update_xform_monthly_counter()` do for
+    each new submission of `xform`, for a batch of submissions created with
+    `bulk_create()` (which does not send `post_save`).
+
+    `dates_created` is the list of `date_created` of the new submissions, in
+    the order they were saved.
+    """
+    if not dates_created:
+        return
+
+    count = len(dates_created)
+    daily_counts = Counter(date_created.date() for date_created in dates_created)
+    monthly_counts = Counter(
+        (date_created.year, date_created.month)
+        for date_created in dates_created
+    )
+
+    if counters.is_buffered():
+        counters.buffer_submission_count(
+            xform.pk,
+            xform.user_id,
+            count,
+            last_submission_time=dates_created[-1],
+        )
+        for date_created, counter in daily_counts.items():
+            counters.buffer_daily_counter(
+                xform.pk, xform.user_id, date_created, counter
+            )
+        for (year, month), counter in monthly_counts.items():
+            counters.buffer_monthly_counter(
+                xform.pk, xform.user_id, year, month, counter
+            )
+        return
+
+    with transaction.atomic():
+        XForm.objects.filter(pk=xform.pk).update(
+            num_of_submissions=F('num_of_submissions') + count,
+            last_submission_time=dates_created[-1],
+        )
+        # Hack to avoid circular imports
+        UserProfile = User.profile.related.related_model
+        profile, created = UserProfile.objects.only('pk').get_or_create(
+            user_id=xform.user_id
+        )
+        UserProfile.objects.filter(pk=profile.pk).update(
+            num_of_submissions=F('num_of_submissions') + count,
+        )
+
+    for date_created, counter in daily_counts.items():
+        DailyXFormSubmissionCounter.objects.get_or_create(
+            date=date_created,
+            xform=xform,
+            user_id=xform.user_id,
+        )
+        DailyXFormSubmissionCounter.objects.filter(
+            date=date_created,
+            xform=xform,
+        ).update(counter=F('counter') + counter)
+
+    for (year, month), counter in monthly_counts.items():
+        MonthlyXFormSubmissionCounter.objects.get_or_create(
+            user_id=xform.user_id,
+            xform=xform,
+            year=year,
+            month=month,
+        )
+        MonthlyXFormSubmissionCounter.objects.filter(
+            xform=xform,
+            year=year,
+            month=month,
+        ).update(counter=F('counter') + counter)
+
+
 def update_xform_submission_count_delete(sender, instance, **kwargs):
 
     value = kwargs.pop('value', 1)
@@ -196,6 +321,10 @@ def update_xform_submission_count_delete(sender, instance, **kwargs):
         xform_id = instance.pk
         xform = instance
 
+    if counters.is_buffered():
+        counters.buffer_submission_count(xform_id, xform.user_id, -value)
+        return
+
     with transaction.atomic():
         # Like `update_xform_submission_count()`, update with `F` expression
         # instead of `select_for_update` to avoid locks, and `save()` which
@@ -298,7 +427,7 @@ class Instance(models.Model):
 
     def _set_geom(self):
         xform = self.xform
-        data_dictionary = xform.data_dictionary()
+        data_dictionary = xform.data_dictionary(use_cache=True)
         geo_xpaths = data_dictionary.geopoint_xpaths()
         doc = self.get_dict()
         points = []
@@ -337,15 +466,44 @@ class Instance(models.Model):
     def _set_parser(self):
         if not hasattr(self, "_parser"):
             self._parser = XFormInstanceParser(
-                self.xml, self.xform.data_dictionary())
+                self.get_parsed_submission(),
+                self.xform.data_dictionary(use_cache=True),
+            )
+
+    def get_parsed_submission(self) -> ParsedSubmission:
+        """
+        Return the parsed XML of this instance. The parse is kept as long as
+        `xml` does not change, so that it can be shared with the ingest
+        pipeline (see `set_parsed_submission()`).
+        """
+        parsed_submission = getattr(self, '_parsed_submission', None)
+        if parsed_submission is None or parsed_submission.xml != self.xml:
+            parsed_submission = ParsedSubmission(self.xml)
+            self._parsed_submission = parsed_submission
+        return parsed_submission
+
+    def set_parsed_submission(self, parsed_submission: ParsedSubmission):
+        """
+        Set `xml` from an already parsed submission to avoid parsing it again
+        """
+        self.xml = parsed_submission.xml
+        self._parsed_submission = parsed_submission
+        # Discard any parser built from a previous version of `xml`
+        if hasattr(self, '_parser'):
+            del self._parser
 
     def _set_survey_type(self):
+        slug = self.get_root_node_name()
+        # Batch imports assign the survey type beforehand to share it across
+        # submissions
+        if self.survey_type_id is not None and self.survey_type.slug == slug:
+            return
         self.survey_type, created = \
-            SurveyType.objects.get_or_create(slug=self.get_root_node_name())
+            SurveyType.objects.get_or_create(slug=slug)
 
     def _set_uuid(self):
         if self.xml and not self.uuid:
-            uuid = get_uuid_from_xml(self.xml)
+            uuid = self.get_parsed_submission().uuid
             if uuid is not None:
                 self.uuid = uuid
         set_uuid(self)
@@ -481,7 +639,15 @@ class Instance(models.Model):
         force = kwargs.pop("force", False)
 
         self.check_active(force)
+        self.prepare_for_save()
 
+        super().save(*args, **kwargs)
+
+    def prepare_for_save(self):
+        """
+        Populate the fields derived from `xml`. Called by `save()`, and
+        directly when instances are inserted with `bulk_create()`.
+        """
         self._set_geom()
         self._set_json()
         self._set_survey_type()
@@ -492,8 +658,6 @@ class Instance(models.Model):
         if self.validation_status is None:
             self.validation_status = {}
 
-        super().save(*args, **kwargs)
-
     def get_validation_status(self):
         """
         Returns instance validation status.
@@ -522,6 +686,10 @@ post_save.connect(update_xform_monthly_counter, sender=Instance,
 post_delete.connect(update_xform_submission_count_delete, sender=Instance,
                     dispatch_uid='update_xform_submission_count_delete')
 
+m2m_changed.connect(update_date_modified_on_tags_change,
+                    sender=Instance.tags.through,
+                    dispatch_uid='update_date_modified_on_tags_change')
+
 if Instance.XML_HASH_LENGTH / 2 != sha256().digest_size:
     raise AssertionError('SHA256 hash `digest_size` expected to be `{}`, not `{}`'.format(
         Instance.XML_HASH_LENGTH, sha256().digest_size))
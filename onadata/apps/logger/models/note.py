@@ -1,5 +1,9 @@
 # coding: utf-8
 from django.db import models
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.utils import timezone
+
 from .instance import Instance
 
 
@@ -11,3 +15,21 @@ class Note(models.Model):
 
     class Meta:
         app_label = 'logger'
+
+
+def update_instance_date_modified(sender, instance, **kwargs):
+    """
+    `_notes` are exported along with the submission. Bump its `date_modified`
+    so that incremental exports do not append to files containing the former
+    notes.
+    """
+    Instance.objects.filter(pk=instance.instance_id).update(
+        date_modified=timezone.now()
+    )
+
+
+post_save.connect(update_instance_date_modified, sender=Note,
+                  dispatch_uid='update_instance_date_modified_on_note_save')
+
+post_delete.connect(update_instance_date_modified, sender=Note,
+                    dispatch_uid='update_instance_date_modified_on_note_delete')
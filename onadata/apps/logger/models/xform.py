@@ -34,7 +34,10 @@ from onadata.libs.constants import (
     CAN_DELETE_DATA_XFORM,
     CAN_TRANSFER_OWNERSHIP,
 )
-from onadata.libs.utils.xml import XMLFormWithDisclaimer
+from onadata.libs.utils.xml import (
+    get_xml_with_disclaimer,
+    get_xml_with_disclaimer_hash,
+)
 from onadata.libs.models.base_model import BaseModel
 from onadata.libs.utils.hash import get_hash
 
@@ -104,6 +107,9 @@ class XForm(BaseModel):
     has_kpi_hooks = LazyDefaultBooleanField(default=False)
     kpi_asset_uid = models.CharField(max_length=32, null=True)
     pending_delete = models.BooleanField(default=False)
+    # Survey artifacts needed on hot paths (repeats, geopoints, etc.),
+    # computed at publish time. See `DataDictionary.get_survey_metadata()`
+    survey_metadata = models.JSONField(default=dict, blank=True)
 
     class Meta:
         app_label = 'logger'
@@ -136,11 +142,16 @@ class XForm(BaseModel):
     def data_dictionary(self, use_cache: bool = False):
         from onadata.apps.viewer.models.data_dictionary import DataDictionary
 
-        if not use_cache:
+        # Deferred fields cannot be copied, fetch them from the DB instead
+        if not use_cache or self.get_deferred_fields():
             return DataDictionary.all_objects.get(pk=self.pk)
 
-        xform_dict = deepcopy(self.__dict__)
-        xform_dict.pop('_state', None)
+        # Copy concrete fields only; `_state` and other Python-only attributes
+        # are not expected by the constructor
+        xform_dict = {
+            field.attname: deepcopy(self.__dict__[field.attname])
+            for field in self._meta.concrete_fields
+        }
         return DataDictionary(**xform_dict)
 
     @property
@@ -212,17 +223,68 @@ class XForm(BaseModel):
             raise XLSFormError(t('In strict mode, the XForm ID must be a '
                                'valid slug and contain no spaces.'))
 
+        self._invalidate_stale_survey_metadata(kwargs)
         super().save(*args, **kwargs)
 
+    def get_survey_hash(self) -> str:
+        """
+        Return the hash of the survey (JSON and XML) `survey_metadata` has
+        been computed from
+        """
+        return get_hash(f'{self.json}{self.xml}')
+
+    def _invalidate_stale_survey_metadata(self, save_kwargs: dict):
+        """
+        Clear `survey_metadata` if the survey has changed since it was
+        computed, e.g. by saving an `XForm` instead of a `DataDictionary`. It
+        is then computed again on first access.
+        """
+        update_fields = save_kwargs.get('update_fields')
+        if update_fields is not None:
+            if not {'json', 'xml'}.intersection(update_fields):
+                return
+            save_kwargs['update_fields'] = set(update_fields) | {
+                'survey_metadata'
+            }
+
+        if (
+            self.survey_metadata
+            and self.survey_metadata.get('survey_hash')
+            != self.get_survey_hash()
+        ):
+            self.survey_metadata = {}
+
     def __str__(self):
         return getattr(self, "id_string", "")
 
+    def get_pending_counters(self) -> tuple[int, int]:
+        """
+        Return the deltas of `num_of_submissions` and
+        `attachment_storage_bytes` not flushed to the database yet (see
+        `onadata.apps.logger.counters`), unless they have been fetched with
+        the other forms of a list by `prefetch_pending_xform_counters()`
+        """
+        # Avoid circular import
+        from onadata.apps.logger.counters import get_pending_xform_counters
+
+        prefetched = getattr(self, 'prefetched_pending_counters', None)
+        if prefetched is not None:
+            return prefetched
+        return get_pending_xform_counters(self.pk)
+
     def submission_count(self, force_update=False):
-        if self.num_of_submissions == 0 or force_update:
+        # Avoid circular import
+        from onadata.apps.logger import counters
+
+        # Include the submissions not yet flushed to the database
+        pending_count, _ = self.get_pending_counters()
+        if self.num_of_submissions + pending_count == 0 or force_update:
+            if counters.is_buffered():
+                return counters.reset_xform_submission_count(self)
             count = self.instances.count()
             self.num_of_submissions = count
             self.save(update_fields=['num_of_submissions'])
-        return self.num_of_submissions
+        return self.num_of_submissions + pending_count
     submission_count.short_description = t("Submission Count")
 
     def geocoded_submission_count(self):
@@ -254,7 +316,7 @@ class XForm(BaseModel):
 
     @property
     def md5_hash_with_disclaimer(self):
-        return get_hash(self.xml_with_disclaimer)
+        return get_xml_with_disclaimer_hash(self)
 
     @property
     def can_be_replaced(self):
@@ -304,7 +366,7 @@ class XForm(BaseModel):
 
     @property
     def xml_with_disclaimer(self):
-        return XMLFormWithDisclaimer(self).get_object().xml
+        return get_xml_with_disclaimer(self)
 
 
 def update_profile_num_submissions(sender, instance, **kwargs):
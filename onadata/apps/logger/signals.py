@@ -10,6 +10,7 @@ from django.db.models.signals import (
 )
 from django.dispatch import receiver
 
+from onadata.apps.logger import counters
 from onadata.apps.logger.models.attachment import Attachment
 from onadata.apps.logger.models.xform import XForm
 from onadata.apps.main.models.user_profile import UserProfile
@@ -35,19 +36,24 @@ def pre_delete_attachment(instance, **kwargs):
     xform = attachment.instance.xform
 
     if file_size and attachment.deleted_at is None:
-        with transaction.atomic():
-            """
-            Update both counters at the same time (in a transaction) to avoid 
-            desynchronization as much as possible 
-            """
-            UserProfile.objects.filter(
-                user_id=xform.user_id
-            ).update(
-                attachment_storage_bytes=F('attachment_storage_bytes') - file_size
-            )
-            XForm.all_objects.filter(pk=xform.pk).update(
-                attachment_storage_bytes=F('attachment_storage_bytes') - file_size
+        if counters.is_buffered():
+            counters.buffer_attachment_storage_bytes(
+                xform.pk, xform.user_id, -file_size
             )
+        else:
+            with transaction.atomic():
+                """
+                Update both counters at the same time (in a transaction) to avoid 
+                desynchronization as much as possible 
+                """
+                UserProfile.objects.filter(
+                    user_id=xform.user_id
+                ).update(
+                    attachment_storage_bytes=F('attachment_storage_bytes') - file_size
+                )
+                XForm.all_objects.filter(pk=xform.pk).update(
+                    attachment_storage_bytes=F('attachment_storage_bytes') - file_size
+                )
 
     if only_update_counters or not (media_file_name := str(attachment.media_file)):
         return
@@ -80,6 +86,12 @@ def post_save_attachment(instance, created, **kwargs):
 
     xform = attachment.instance.xform
 
+    if counters.is_buffered():
+        counters.buffer_attachment_storage_bytes(
+            xform.pk, xform.user_id, file_size
+        )
+        return
+
     with transaction.atomic():
         UserProfile.objects.filter(user_id=xform.user_id).update(
             attachment_storage_bytes=F('attachment_storage_bytes') + file_size
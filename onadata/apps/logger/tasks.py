@@ -10,14 +10,17 @@ from celery import shared_task
 from dateutil import relativedelta
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.files.storage import default_storage
 from django.core.management import call_command
 from django.utils import timezone
 
 from onadata.celery import app
+from onadata.libs.utils.image_tools import resize
+from .counters import flush_counters
 from .maintenance_tasks import remove_old_revisions
 from .models.daily_xform_submission_counter import DailyXFormSubmissionCounter
-from .models import Instance, XForm
+from .models import Attachment, Instance, XForm
 
 
 @app.task()
@@ -31,6 +34,27 @@ def delete_daily_counters():
     xform_daily_counters.delete()
 
 
+@app.task()
+def flush_buffered_counters():
+    flush_counters()
+
+
+@app.task()
+def generate_thumbnails(attachment_id):
+    """
+    Generate the thumbnails of an image attachment. Routed to
+    `settings.THUMBNAILS_CELERY_QUEUE`
+    """
+    try:
+        attachment = Attachment.objects.get(pk=attachment_id)
+    except Attachment.DoesNotExist:
+        # Deleted in the meantime
+        return
+
+    resize(attachment.media_file.name)
+    cache.delete(attachment.thumbnails_generation_lock_key)
+
+
 # ## ISSUE 242 TEMPORARY FIX ##
 # See https://github.com/kobotoolbox/kobocat/issues/242
 
@@ -1,4 +1,5 @@
 # coding: utf-8
+import hashlib
 import os
 from datetime import datetime
 
@@ -6,6 +7,7 @@ from django.conf import settings
 from django.core.files.base import File
 from django.core.files.storage import default_storage
 from django.core.management import call_command
+from PIL import Image
 
 from onadata.apps.main.tests.test_base import TestBase
 from onadata.apps.logger.models import Attachment, Instance
@@ -29,17 +31,52 @@ class TestAttachment(TestBase):
     def test_mimetype(self):
         self.assertEqual(self.attachment.mimetype, 'image/jpeg')
 
+    def test_media_file_hash(self):
+        media_file = os.path.join(
+            self.this_directory, 'fixtures',
+            'transportation', 'instances', self.surveys[0], self.media_file)
+        with open(media_file, 'rb') as f:
+            expected_hash = hashlib.md5(f.read()).hexdigest()
+
+        # Hashed on upload
+        self.assertEqual(self.attachment.media_file_hash, expected_hash)
+        self.assertEqual(
+            Attachment.objects.get(pk=self.attachment.pk).file_hash,
+            expected_hash,
+        )
+
+        # Computed from storage, and saved, for older attachments
+        Attachment.objects.filter(pk=self.attachment.pk).update(
+            media_file_hash=None
+        )
+        attachment = Attachment.objects.get(pk=self.attachment.pk)
+        self.assertEqual(attachment.file_hash, expected_hash)
+        self.assertEqual(
+            Attachment.objects.get(pk=self.attachment.pk).media_file_hash,
+            expected_hash,
+        )
+
     def test_thumbnails(self):
         for attachment in Attachment.objects.filter(instance=self.instance):
-            url = image_url(attachment, 'small')
             filename = attachment.media_file.name.replace('.jpg', '')
             thumbnail = '%s-small.jpg' % filename
+            # The original is returned until the thumbnails are generated in
+            # the background (synchronously, while testing)
+            url = image_url(attachment, 'small')
+            self.assertEqual(url, attachment.media_file.url)
+            url = image_url(attachment, 'small')
             self.assertNotEqual(
                 url.find(thumbnail), -1)
             for size in ['small', 'medium', 'large']:
                 thumbnail = f'{filename}-{size}.jpg'
                 self.assertTrue(
                     default_storage.exists(thumbnail))
+                with default_storage.open(thumbnail) as f:
+                    image = Image.open(f)
+                    self.assertEqual(image.format, 'JPEG')
+                    self.assertLessEqual(
+                        max(image.size), settings.THUMB_CONF[size]['size']
+                    )
                 default_storage.delete(thumbnail)
 
     def test_create_thumbnails_command(self):
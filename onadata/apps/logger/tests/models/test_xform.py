@@ -5,6 +5,11 @@ import unittest
 
 from onadata.apps.main.tests.test_base import TestBase
 from onadata.apps.logger.models import XForm, Instance
+from onadata.apps.viewer.models.data_dictionary import (
+    get_encoded_field_names,
+    get_mongo_field_renames,
+)
+from onadata.libs.utils.decorators import get_decoded_record, get_field_renames
 
 
 class TestXForm(TestBase):
@@ -29,3 +34,135 @@ class TestXForm(TestBase):
     @unittest.skip('Fails under Django 1.6')
     def test_reversion(self):
         self.assertTrue(reversion.is_registered(XForm))
+
+    def test_data_dictionary_compiled_survey_cache(self):
+        xls_file_path = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            "../..", "fixtures", "new_repeats", "new_repeats.xls"
+        )
+        self._publish_xls_file_and_set_xform(xls_file_path)
+        compiled_survey = self.xform.data_dictionary(
+            use_cache=True
+        ).get_compiled_survey()
+        # Same version of the form, same compiled survey
+        self.assertIs(
+            compiled_survey,
+            self.xform.data_dictionary().get_compiled_survey(),
+        )
+        self.assertEqual(compiled_survey.repeat_xpaths, {'kids/kids_details'})
+        self.assertEqual(compiled_survey.geopoint_xpaths, ['gps'])
+
+        # Republishing the form invalidates the cache
+        self.xform.save()
+        self.assertIsNot(
+            compiled_survey,
+            self.xform.data_dictionary().get_compiled_survey(),
+        )
+
+    def test_survey_metadata_is_persisted_at_publish_time(self):
+        xls_file_path = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            "../..", "fixtures", "new_repeats", "new_repeats.xls"
+        )
+        self._publish_xls_file_and_set_xform(xls_file_path)
+        survey_metadata = XForm.objects.get(pk=self.xform.pk).survey_metadata
+        self.assertEqual(survey_metadata['repeat_xpaths'], ['kids/kids_details'])
+        self.assertEqual(survey_metadata['geopoint_xpaths'], ['gps'])
+
+        # Metadata of forms published before it existed is computed on demand
+        XForm.objects.filter(pk=self.xform.pk).update(survey_metadata={})
+        xform = XForm.objects.get(pk=self.xform.pk)
+        data_dictionary = xform.data_dictionary(use_cache=True)
+        self.assertEqual(data_dictionary.get_repeat_xpaths(), {'kids/kids_details'})
+        self.assertEqual(
+            XForm.objects.get(pk=self.xform.pk).survey_metadata,
+            survey_metadata,
+        )
+
+    def test_cached_survey_artifacts_are_read_only(self):
+        self._publish_transportation_form()
+        data_dictionary = self.xform.data_dictionary()
+        compiled_survey = data_dictionary.get_compiled_survey()
+        for artifact in (
+            data_dictionary.get_mongo_field_names_dict(),
+            get_mongo_field_renames(self.user.username, self.xform.id_string),
+            compiled_survey.elements_by_xpath,
+        ):
+            with self.assertRaises(TypeError):
+                artifact['injected'] = 'value'
+        for artifact in (
+            data_dictionary.get_repeat_xpaths(),
+            compiled_survey.repeat_xpaths,
+        ):
+            with self.assertRaises(AttributeError):
+                artifact.add('injected')
+
+    def test_survey_metadata_is_invalidated_by_xform_save(self):
+        self._publish_transportation_form()
+        survey_metadata = XForm.objects.get(pk=self.xform.pk).survey_metadata
+
+        # Unchanged survey
+        xform = XForm.objects.get(pk=self.xform.pk)
+        xform.save()
+        self.assertEqual(
+            XForm.objects.get(pk=self.xform.pk).survey_metadata,
+            survey_metadata,
+        )
+
+        xform.json = f'{xform.json} '
+        xform.save(update_fields=['json'])
+        self.assertEqual(
+            XForm.objects.get(pk=self.xform.pk).survey_metadata, {}
+        )
+        data_dictionary = XForm.objects.get(pk=self.xform.pk).data_dictionary()
+        self.assertEqual(
+            data_dictionary.get_survey_metadata()['survey_hash'],
+            xform.get_survey_hash(),
+        )
+
+    def test_encoded_field_names_do_not_rename_other_fields(self):
+        encoded_names = get_encoded_field_names(['Q1.1', 'Q1Lg==1', 'Q2.1'])
+        self.assertEqual(encoded_names, {'Q2Lg==1': 'Q2.1'})
+        record = {'Q1Lg==1': 'literal', 'Q2Lg==1': 'encoded'}
+        self.assertEqual(
+            get_decoded_record(record, get_field_renames(encoded_names)),
+            {'Q1Lg==1': 'literal', 'Q2.1': 'encoded'},
+        )
+
+    def test_mongo_field_renames_cache(self):
+        self._publish_transportation_form()
+        renames = get_mongo_field_renames(
+            self.user.username, self.xform.id_string
+        )
+        self.assertIs(
+            renames,
+            get_mongo_field_renames(self.user.username, self.xform.id_string),
+        )
+
+        # Republishing the form invalidates the cache
+        self.xform.save()
+        self.assertIsNot(
+            renames,
+            get_mongo_field_renames(self.user.username, self.xform.id_string),
+        )
+
+    def test_decoded_record_renames_repeats(self):
+        renames = get_field_renames(
+            {
+                'kidsLg==details': 'kids.details',
+                'kidsLg==details/nameLg==first': 'kids.details/name.first',
+            }
+        )
+        record = {
+            'name': 'Abe',
+            'kidsLg==details': [
+                {'kidsLg==details/nameLg==first': 'Mike'},
+            ],
+        }
+        self.assertEqual(
+            get_decoded_record(record, renames),
+            {
+                'name': 'Abe',
+                'kids.details': [{'kids.details/name.first': 'Mike'}],
+            },
+        )
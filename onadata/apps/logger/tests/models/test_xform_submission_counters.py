@@ -3,12 +3,23 @@ from datetime import timedelta
 
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.db import DatabaseError, transaction
+from django.test import override_settings
 from django.utils import timezone
 
+from onadata.apps.logger.counters import (
+    buffer_submission_count,
+    flush_counters,
+    get_pending_xform_counters,
+    get_pending_xform_counters_by_id,
+)
 from onadata.apps.logger.models import XForm
 from onadata.apps.logger.models.daily_xform_submission_counter import DailyXFormSubmissionCounter
 from onadata.apps.logger.models.monthly_xform_submission_counter import MonthlyXFormSubmissionCounter
-from onadata.apps.logger.tasks import delete_daily_counters
+from onadata.apps.logger.tasks import (
+    delete_daily_counters,
+    flush_buffered_counters,
+)
 from onadata.apps.main.tests.test_base import TestBase
 
 
@@ -129,3 +140,89 @@ class TestXFormSubmissionCounters(TestBase):
         assert (
             DailyXFormSubmissionCounter.objects.get(**criteria).counter == 2
         )
+
+    def test_buffered_counters(self):
+        """
+        Test that buffered counters are only written to the database on flush,
+        and that readers include pending deltas
+        """
+        with override_settings(SUBMISSION_COUNTERS_BUFFERED=True):
+            flush_counters()
+            with self.captureOnCommitCallbacks(execute=True):
+                self._publish_transportation_form_and_submit_instance()
+            self.xform.refresh_from_db()
+            self.assertEqual(self.xform.num_of_submissions, 0)
+            self.assertEqual(
+                get_pending_xform_counters(self.xform.pk), (1, 0)
+            )
+            self.assertEqual(self.xform.submission_count(), 1)
+            self.assertFalse(
+                DailyXFormSubmissionCounter.objects.filter(
+                    xform=self.xform
+                ).exists()
+            )
+
+            flush_buffered_counters()
+
+            self.xform.refresh_from_db()
+            self.assertEqual(self.xform.num_of_submissions, 1)
+            self.assertEqual(
+                get_pending_xform_counters(self.xform.pk), (0, 0)
+            )
+            self.assertEqual(self.xform.submission_count(), 1)
+            self.assertEqual(
+                User.objects.get(username='bob').profile.num_of_submissions, 1
+            )
+            self.assertEqual(
+                DailyXFormSubmissionCounter.objects.get(
+                    xform=self.xform
+                ).counter,
+                1,
+            )
+            self.assertEqual(
+                MonthlyXFormSubmissionCounter.objects.get(
+                    xform=self.xform
+                ).counter,
+                1,
+            )
+
+    def test_buffered_submission_count_is_not_flushed_after_recount(self):
+        with override_settings(SUBMISSION_COUNTERS_BUFFERED=True):
+            flush_counters()
+            with self.captureOnCommitCallbacks(execute=True):
+                self._publish_transportation_form_and_submit_instance()
+            self.xform.refresh_from_db()
+            self.assertEqual(self.xform.num_of_submissions, 0)
+
+            # The recount includes the pending delta, which is discarded
+            self.assertEqual(
+                self.xform.submission_count(force_update=True), 1
+            )
+            self.assertEqual(
+                get_pending_xform_counters(self.xform.pk), (0, 0)
+            )
+            flush_counters()
+            self.xform.refresh_from_db()
+            self.assertEqual(self.xform.num_of_submissions, 1)
+            self.assertEqual(self.xform.submission_count(), 1)
+
+    def test_buffered_counters_are_discarded_on_rollback(self):
+        self._publish_transportation_form()
+        with override_settings(SUBMISSION_COUNTERS_BUFFERED=True):
+            flush_counters()
+            with self.captureOnCommitCallbacks(execute=True):
+                try:
+                    with transaction.atomic():
+                        buffer_submission_count(
+                            self.xform.pk, self.xform.user_id, 1
+                        )
+                        raise DatabaseError
+                except DatabaseError:
+                    pass
+                buffer_submission_count(self.xform.pk, self.xform.user_id, 2)
+
+            self.assertEqual(
+                get_pending_xform_counters_by_id([self.xform.pk]),
+                {self.xform.pk: (2, 0)},
+            )
+            flush_counters()
@@ -2,13 +2,22 @@
 import os
 
 from django.core.files.storage import default_storage
+from django.db.models import Sum
 from django.urls import reverse
 from django.conf import settings
 
+from onadata.apps.main.models import UserProfile
 from onadata.apps.main.tests.test_base import TestBase
-from onadata.apps.logger.models import Instance
+from onadata.apps.logger.models import Instance, XForm
+from onadata.apps.logger.models.daily_xform_submission_counter import (
+    DailyXFormSubmissionCounter,
+)
+from onadata.apps.logger.models.monthly_xform_submission_counter import (
+    MonthlyXFormSubmissionCounter,
+)
 from onadata.apps.logger.import_tools import import_instances_from_zip
 from onadata.apps.logger.views import bulksubmission
+from onadata.apps.viewer.models.parsed_instance import ParsedInstance
 from onadata.libs.utils.storage import rmdir
 
 CUR_PATH = os.path.abspath(__file__)
@@ -105,3 +114,46 @@ class TestImportingDatabase(TestBase):
             post_data = {'zip_submission_file': zip_file}
             response = self.client.post(url, post_data)
         self.assertEqual(response.status_code, 200)
+
+    def test_bulk_import_counters_and_duplicates(self):
+        zip_file_path = os.path.join(DB_FIXTURES_PATH, "bulk_submission.zip")
+        total, success, errors = import_instances_from_zip(
+            zip_file_path, self.user)
+        self.assertTrue(success > 0)
+        xform = XForm.objects.order_by('-pk').first()
+
+        # Counters are incremented once per batch, but must match what
+        # `create_instance()` would have done for each submission
+        xform.refresh_from_db()
+        self.assertEqual(xform.instances.count(), success)
+        self.assertEqual(xform.num_of_submissions, success)
+        self.assertEqual(
+            UserProfile.objects.get(user=self.user).num_of_submissions,
+            success,
+        )
+        self.assertEqual(
+            DailyXFormSubmissionCounter.objects.filter(
+                xform=xform
+            ).aggregate(total=Sum('counter'))['total'],
+            success,
+        )
+        self.assertEqual(
+            MonthlyXFormSubmissionCounter.objects.filter(
+                xform=xform
+            ).aggregate(total=Sum('counter'))['total'],
+            success,
+        )
+        for instance in xform.instances.all():
+            self.assertTrue(instance.is_synced_with_mongo)
+            self.assertTrue(
+                ParsedInstance.objects.filter(instance=instance).exists()
+            )
+
+        # Importing the same submissions again must not create anything
+        total_again, success_again, errors_again = import_instances_from_zip(
+            zip_file_path, self.user)
+        self.assertEqual(total_again, total)
+        self.assertEqual(success_again, 0)
+        self.assertEqual(xform.instances.count(), success)
+        xform.refresh_from_db()
+        self.assertEqual(xform.num_of_submissions, success)
@@ -1,6 +1,7 @@
 # coding: utf-8
 import os
 import re
+from unittest.mock import patch
 
 from defusedxml import minidom
 
@@ -9,7 +10,7 @@ from onadata.apps.logger.xform_instance_parser import XFormInstanceParser,\
     xpath_from_xml_node
 from onadata.apps.logger.xform_instance_parser import get_uuid_from_xml,\
     get_meta_from_xml, get_deprecated_uuid_from_xml,\
-    _xml_node_to_dict, clean_and_parse_xml
+    _xml_node_to_dict, clean_and_parse_xml, ParsedSubmission
 from onadata.libs.utils.common_tags import XFORM_ID_STRING
 
 
@@ -89,6 +90,69 @@ class TestXFormInstanceParser(TestBase):
         }
         self.assertEqual(flat_dict, expected_flat_dict)
 
+    def _assert_parser_engines_match(self, xml_str, data_dictionary):
+        minidom_parser = XFormInstanceParser(
+            xml_str, data_dictionary,
+            engine=XFormInstanceParser.MINIDOM_ENGINE)
+        iterparse_parser = XFormInstanceParser(
+            xml_str, data_dictionary,
+            engine=XFormInstanceParser.ITERPARSE_ENGINE)
+        self.assertEqual(minidom_parser.to_dict(), iterparse_parser.to_dict())
+        self.assertEqual(minidom_parser.to_flat_dict(),
+                         iterparse_parser.to_flat_dict())
+        self.assertEqual(minidom_parser.get_attributes(),
+                         iterparse_parser.get_attributes())
+        self.assertEqual(minidom_parser.get_root_node_name(),
+                         iterparse_parser.get_root_node_name())
+
+    def test_iterparse_engine_reuses_parsed_submission(self):
+        self._publish_and_submit_new_repeats()
+        data_dictionary = self.xform.data_dictionary()
+        xml_str = self.xform.instances.first().xml
+        parsed_submission = ParsedSubmission(xml_str)
+        parsed_submission.uuid  # Builds the DOM, like the ingest pipeline
+
+        with patch(
+            'onadata.apps.logger.xform_instance_parser._iterparse_to_dict'
+        ) as iterparse_to_dict, patch(
+            'onadata.apps.logger.xform_instance_parser.clean_and_parse_xml'
+        ) as parse_xml:
+            parser = XFormInstanceParser(
+                parsed_submission, data_dictionary,
+                engine=XFormInstanceParser.ITERPARSE_ENGINE)
+        iterparse_to_dict.assert_not_called()
+        parse_xml.assert_not_called()
+        self.assertEqual(
+            parser.to_dict(),
+            XFormInstanceParser(
+                xml_str, data_dictionary,
+                engine=XFormInstanceParser.ITERPARSE_ENGINE).to_dict())
+
+    def test_parser_engines_return_same_results(self):
+        self._publish_and_submit_new_repeats()
+        data_dictionary = self.xform.data_dictionary()
+        instances_dir = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            "../fixtures/new_repeats/instances"
+        )
+        for filename in sorted(os.listdir(instances_dir)):
+            with open(os.path.join(instances_dir, filename)) as xml_file:
+                self._assert_parser_engines_match(
+                    xml_file.read(), data_dictionary)
+
+        # The XML of a form contains namespaces
+        self._assert_parser_engines_match(self.xform.xml, data_dictionary)
+
+        self._publish_transportation_form()
+        data_dictionary = self.xform.data_dictionary()
+        for survey in self.surveys:
+            with open(os.path.join(
+                self.this_directory, 'fixtures', 'transportation',
+                'instances', survey, survey + '.xml'
+            )) as xml_file:
+                self._assert_parser_engines_match(
+                    xml_file.read(), data_dictionary)
+
     def test_xpath_from_xml_node(self):
         xml_str = '<?xml version=\'1.0\' ?><test_item_name_matches_repeat ' \
                   'id="repeat_child_name_matches_repeat">' \
@@ -152,6 +216,23 @@ class TestXFormInstanceParser(TestBase):
         deprecatedID = get_deprecated_uuid_from_xml(xml_str)
         self.assertEqual(deprecatedID, "729f173c688e482486a48661700455ff")
 
+    def test_parsed_submission(self):
+        with open(
+            os.path.join(
+                os.path.dirname(__file__), "..", "fixtures", "tutorial",
+                "instances", "tutorial_2012-06-27_11-27-53_w_uuid_edited.xml"),
+                "r") as xml_file:
+            xml_str = xml_file.read()
+        parsed_submission = ParsedSubmission(xml_str)
+        self.assertEqual(parsed_submission.uuid, get_uuid_from_xml(xml_str))
+        self.assertEqual(parsed_submission.deprecated_uuid,
+                         get_deprecated_uuid_from_xml(xml_str))
+        self.assertIsNone(parsed_submission.submission_date)
+        # The document is parsed only once
+        self.assertIs(parsed_submission.document,
+                      parsed_submission.document)
+        self.assertEqual(len(parsed_submission.find_all('meta/instanceID')), 1)
+
     def test_parse_xform_nested_repeats_multiple_nodes(self):
         self._create_user_and_login()
         # publish our form which contains some some repeats
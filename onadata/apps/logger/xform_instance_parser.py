@@ -1,17 +1,27 @@
 # coding: utf-8
+from __future__ import annotations
+
 import logging
 import re
 import sys
+from datetime import datetime
+from functools import cached_property
+from io import StringIO
+from typing import Optional, Union
 from xml.dom import Node
 
 import dateutil.parser
 import six
 from defusedxml import minidom
+from defusedxml.ElementTree import iterparse
+from django.conf import settings
 from django.utils.encoding import smart_str
 from django.utils.translation import gettext as t
 
 from onadata.libs.utils.common_tags import XFORM_ID_STRING
 
+XML_NAMESPACE = 'http://www.w3.org/XML/1998/namespace'
+
 
 class XLSFormError(Exception):
     pass
@@ -42,7 +52,7 @@ class InstanceMultipleNodeError(Exception):
 
 
 def get_meta_from_xml(xml_str, meta_name):
-    xml = clean_and_parse_xml(xml_str)
+    xml = to_xml_document(xml_str)
     children = xml.childNodes
     # children ideally contains a single element
     # that is the parent of all survey elements
@@ -76,12 +86,12 @@ def get_uuid_from_xml(xml):
         if matches and len(matches.groups()) > 0:
             return matches.groups()[0]
         return None
+    xml = to_xml_document(xml)
     uuid = get_meta_from_xml(xml, "instanceID")
     regex = re.compile(r"uuid:(.*)")
     if uuid:
         return _uuid_only(uuid, regex)
     # check in survey_node attributes
-    xml = clean_and_parse_xml(xml)
     children = xml.childNodes
     # children ideally contains a single element
     # that is the parent of all survey elements
@@ -96,7 +106,7 @@ def get_uuid_from_xml(xml):
 
 def get_submission_date_from_xml(xml):
     # check in survey_node attributes
-    xml = clean_and_parse_xml(xml)
+    xml = to_xml_document(xml)
     children = xml.childNodes
     # children ideally contains a single element
     # that is the parent of all survey elements
@@ -126,6 +136,73 @@ def clean_and_parse_xml(xml_string: str) -> Node:
     return xml_obj
 
 
+def to_xml_document(xml: Union[str, Node, ParsedSubmission]) -> Node:
+    """
+    Return the parsed document of `xml`, parsing it only if it has not been
+    parsed yet, i.e. if `xml` is a string.
+    """
+    if isinstance(xml, ParsedSubmission):
+        return xml.document
+    if isinstance(xml, Node):
+        return xml
+    return clean_and_parse_xml(xml)
+
+
+class ParsedSubmission:
+    """
+    Submission XML parsed exactly once.
+
+    `create_instance()` builds one of these and hands it through the whole
+    ingest pipeline (`save_submission()`, `_get_instance()`, `Instance.save()`
+    and `ParsedInstance`) so that each step reuses the same DOM instead of
+    re-parsing the same bytes.
+    """
+
+    def __init__(self, xml_str: str):
+        self.xml = smart_str(xml_str)
+
+    def __str__(self):
+        return self.xml
+
+    @cached_property
+    def document(self) -> Node:
+        return clean_and_parse_xml(self.xml)
+
+    @property
+    def is_parsed(self) -> bool:
+        """Whether `document` has already been built"""
+        return 'document' in self.__dict__
+
+    @cached_property
+    def uuid(self) -> str | None:
+        return get_uuid_from_xml(self.document)
+
+    @cached_property
+    def deprecated_uuid(self) -> str | None:
+        return get_deprecated_uuid_from_xml(self.document)
+
+    @cached_property
+    def submission_date(self) -> datetime | None:
+        return get_submission_date_from_xml(self.document)
+
+    def find_all(self, xpath: str) -> list[Node]:
+        """
+        Return all element nodes matching `xpath`, which is relative to the
+        root node, e.g. `group/question`. With repeat groups, several nodes
+        can share the same XPath.
+        """
+        nodes = [self.document.documentElement]
+        for name in xpath.split('/'):
+            nodes = [
+                child
+                for node in nodes
+                for child in node.childNodes
+                if child.nodeType == Node.ELEMENT_NODE
+                and child.tagName == name
+            ]
+        return nodes
+
+
 def _xml_node_to_dict(node: Node, repeats: list = []) -> dict:
     assert isinstance(node, Node)
     if len(node.childNodes) == 0:
@@ -184,6 +261,105 @@ def _xml_node_to_dict(node: Node, repeats: list = []) -> dict:
             return {node.nodeName: value}
 
 
+def _iterparse_to_dict(
+    xml_str: str, repeats: set
+) -> tuple[Optional[dict], list[tuple[str, str]], str]:
+    """
+    Streaming counterpart of `_xml_node_to_dict()` and `_get_all_attributes()`.
+
+    Walk the XML with `iterparse()` instead of building a DOM, keep an XPath
+    stack rather than recomputing each XPath from its parent nodes, and
+    release every element as soon as it has been consumed.
+
+    Return a tuple of the dictionary (`None` if the instance is empty), all
+    the attributes in document order, and the name of the root node.
+
+    Names are restored to their qualified form (e.g. `orx:meta`) to match
+    what `minidom` returns. Unlike `minidom`, ElementTree merges CDATA sections
+    with the surrounding text of a node.
+    """
+    clean_xml_str = re.sub(r'>\s+<', '><', smart_str(xml_str.strip()))
+    # Stack of `{uri: prefix}` mappings, one per open element
+    namespaces = [{XML_NAMESPACE: 'xml'}]
+    pending_namespaces = {}
+    # Stacks of open elements, their names and their children values
+    elements = []
+    path = []
+    values = []
+    attributes = []
+    root_name = None
+    result = None
+
+    def _get_qualified_name(name):
+        if name[0] != '{':
+            return name
+        uri, local_name = name[1:].split('}', 1)
+        for mapping in reversed(namespaces):
+            if uri in mapping:
+                prefix = mapping[uri]
+                return f'{prefix}:{local_name}' if prefix else local_name
+        return local_name
+
+    for event, item in iterparse(
+        StringIO(clean_xml_str), events=('start-ns', 'start', 'end')
+    ):
+        if event == 'start-ns':
+            prefix, uri = item
+            pending_namespaces[uri] = prefix
+            attributes.append((f'xmlns:{prefix}' if prefix else 'xmlns', uri))
+            continue
+
+        if event == 'start':
+            namespaces.append(pending_namespaces)
+            pending_namespaces = {}
+            name = _get_qualified_name(item.tag)
+            if root_name is None:
+                root_name = name
+            for key, value in item.attrib.items():
+                attributes.append((_get_qualified_name(key), value))
+            if values:
+                # Flag the parent as an internal node
+                values[-1][1] = True
+            elements.append(item)
+            path.append(name)
+            values.append([{}, False])
+            continue
+
+        # `end` event
+        name = path[-1]
+        value, has_children = values.pop()
+        elements.pop()
+        if has_children:
+            # Internal node, text is ignored
+            node_value = value or None
+        else:
+            node_value = item.text or None
+
+        if not values:
+            result = {name: node_value} if node_value is not None else None
+        elif node_value is not None:
+            parent_value = values[-1][0]
+            # check if name is in set of repeats and make it a list if so
+            if '/'.join(path[1:]) in repeats:
+                parent_value.setdefault(name, []).append(node_value)
+            elif name not in parent_value:
+                parent_value[name] = node_value
+            else:
+                # See `_xml_node_to_dict()` about duplicate nodes
+                if not isinstance(parent_value[name], list):
+                    parent_value[name] = [parent_value[name]]
+                parent_value[name].append(node_value)
+
+        path.pop()
+        namespaces.pop()
+        # Free memory as we go
+        item.clear()
+        if elements:
+            elements[-1].remove(item)
+
+    return result, attributes, root_name
+
+
 def _flatten_dict(d, prefix):
     """
     Return a list of XPath, value pairs.
@@ -275,8 +451,22 @@ def _get_all_attributes(node):
 
 class XFormInstanceParser:
 
-    def __init__(self, xml_str, data_dictionary):
+    MINIDOM_ENGINE = 'minidom'
+    ITERPARSE_ENGINE = 'iterparse'
+    ENGINES = (MINIDOM_ENGINE, ITERPARSE_ENGINE)
+
+    def __init__(self, xml_str, data_dictionary, engine=None):
+        """
+        `engine` selects how the XML is parsed, either by building a DOM with
+        `minidom` or by streaming it with `iterparse`. It defaults to
+        `settings.XFORM_INSTANCE_PARSER_ENGINE`. If `xml_str` is a DOM, or a
+        `ParsedSubmission` whose DOM has been built, the DOM is used whatever
+        the engine.
+        """
         self.dd = data_dictionary
+        self.engine = engine or settings.XFORM_INSTANCE_PARSER_ENGINE
+        if self.engine not in self.ENGINES:
+            raise ValueError(f'Unknown XML parser engine `{self.engine}`')
         # The two following variables need to be initialized in the constructor, in case parsing fails.
         self._flat_dict = {}
         self._attributes = {}
@@ -293,22 +483,39 @@ class XFormInstanceParser:
             six.reraise(*sys.exc_info())
 
     def parse(self, xml_str):
-        self._xml_obj = clean_and_parse_xml(xml_str)
-        self._root_node = self._xml_obj.documentElement
-        repeats = [e.get_abbreviated_xpath()
-                   for e in self.dd.get_survey_elements_of_type("repeat")]
-        self._dict = _xml_node_to_dict(self._root_node, repeats)
+        self._xml_str = xml_str
+        repeats = self.dd.get_repeat_xpaths()
+        # An already parsed DOM is walked rather than parsing the XML again
+        # with `iterparse`
+        is_parsed = isinstance(xml_str, Node) or (
+            isinstance(xml_str, ParsedSubmission) and xml_str.is_parsed
+        )
+        if self.engine == self.ITERPARSE_ENGINE and not is_parsed:
+            (
+                self._dict,
+                all_attributes,
+                self._root_node_name,
+            ) = _iterparse_to_dict(smart_str(xml_str), repeats)
+        else:
+            self._xml_obj = to_xml_document(xml_str)
+            self._root_node = self._xml_obj.documentElement
+            self._root_node_name = self._root_node.nodeName
+            self._dict = _xml_node_to_dict(self._root_node, repeats)
+            all_attributes = _get_all_attributes(self._root_node)
         if self._dict is None:
             raise InstanceEmptyError
         for path, value in _flatten_dict_nest_repeats(self._dict, []):
             self._flat_dict["/".join(path[1:])] = value
-        self._set_attributes()
+        self._set_attributes(all_attributes)
 
     def get_root_node(self):
+        if not hasattr(self, '_root_node'):
+            # Streaming engine does not build a DOM; do it only on demand
+            self._root_node = to_xml_document(self._xml_str).documentElement
         return self._root_node
 
     def get_root_node_name(self):
-        return self._root_node.nodeName
+        return self._root_node_name
 
     def get(self, abbreviated_xpath):
         return self.to_flat_dict()[abbreviated_xpath]
@@ -322,8 +529,7 @@ class XFormInstanceParser:
     def get_attributes(self):
         return self._attributes
 
-    def _set_attributes(self):
-        all_attributes = list(_get_all_attributes(self._root_node))
+    def _set_attributes(self, all_attributes):
         for key, value in all_attributes:
             # commented since enketo forms may have the template attribute in
             # multiple xml tags and I dont see the harm in overiding
@@ -365,9 +571,17 @@ def parse_xform_instance(xml_str, data_dictionary):
 def get_xform_media_question_xpaths(
     xform: 'onadata.apps.logger.models.XForm',
 ) -> list:
+    # Computed once per version of the form, see `CompiledSurvey`
+    return xform.data_dictionary(use_cache=True).get_media_question_xpaths()
+
+
+def get_media_question_xpaths(xml: str) -> list:
+    """
+    Return the XPaths of the media questions found in the XML of a form
+    """
     logger = logging.getLogger('console_logger')
-    parser = XFormInstanceParser(xform.xml, xform.data_dictionary(use_cache=True))
-    all_attributes = _get_all_attributes(parser.get_root_node())
+    root_node = clean_and_parse_xml(xml).documentElement
+    all_attributes = _get_all_attributes(root_node)
     media_field_xpaths = []
     # This code expects that the attributes from Enketo Express are **always**
     # sent in the same order.
@@ -380,7 +594,7 @@ def get_xform_media_question_xpaths(
                 next_attribute = next(all_attributes)
             except StopIteration:
                 logger.error(
-                    f'`ref` attribute seems to be missing in {xform.xml}',
+                    f'`ref` attribute seems to be missing in {xml}',
                     exc_info=True,
                 )
                 continue
@@ -391,7 +605,7 @@ def get_xform_media_question_xpaths(
             except AssertionError:
                 logger = logging.getLogger('console_logger')
                 logger.error(
-                    f'`ref` should come after `mediatype:{value}` in {xform.xml}',
+                    f'`ref` should come after `mediatype:{value}` in {xml}',
                     exc_info=True,
                 )
                 continue
@@ -1,10 +1,10 @@
 # coding: utf-8
 import mimetypes
 import os
-import requests
 from contextlib import closing
 from urllib.parse import urlparse
 
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.core.files.temp import NamedTemporaryFile
 from django.core.files.uploadedfile import InMemoryUploadedFile
@@ -16,8 +16,10 @@ from requests.exceptions import RequestException
 
 from onadata.apps.logger.models import XForm
 from onadata.libs.utils.hash import get_hash
+from onadata.libs.utils.http_client import get_session
 
 CHUNK_SIZE = 1024
+PAIRED_DATA_REFRESH_LOCK_PREFIX = 'kobocat:paired_data_refresh'
 
 urlvalidate = URLValidator()
 
@@ -84,7 +86,7 @@ def create_media(media):
         filename = media.filename
         data_file = NamedTemporaryFile()
         content_type = mimetypes.guess_type(filename)
-        with closing(requests.get(media.data_value, stream=True)) as r:
+        with closing(get_session().get(media.data_value, stream=True)) as r:
             for chunk in r.iter_content(chunk_size=CHUNK_SIZE):
                 if chunk:
                     data_file.write(chunk)
@@ -171,27 +173,47 @@ class MetaData(models.Model):
             return False
 
         timedelta = timezone.now() - self.date_modified
-        if timedelta.total_seconds() > settings.PAIRED_DATA_EXPIRATION:
-            # No need to download the whole file. Sending a `HEAD` request to
-            # KPI will cause KPI to delete and recreate the file in KoBoCAT if
-            # needed
-            requests.head(self.data_value)
-            # We update the modification time here to avoid requesting that KPI
-            # resynchronize this file multiple times per the
-            # `PAIRED_DATA_EXPIRATION` period. However, this introduces a race
-            # condition where it's possible that KPI *deletes* this file before
-            # we attempt to update it. We avoid that by locking the row
-            ### TODO: this previously used `select_for_update()`, which locked
-            ### the object for the duration of the *entire* request due to
-            ### Django's `ATOMIC_REQUESTS`. The `update()` method is itself
-            ### atomic since it does not reference any value previously read
-            ### from the database. Is that enough?
-            MetaData.objects.filter(pk=self.pk).update(
-                date_modified=timezone.now()
-            )
-            return True
+        return timedelta.total_seconds() > settings.PAIRED_DATA_EXPIRATION
 
-        return False
+    def refresh_paired_data(self):
+        """
+        Ask KPI to resynchronize the paired data XML file, see
+        `onadata.apps.main.tasks.refresh_paired_data`
+        """
+        # No need to download the whole file. Sending a `HEAD` request to
+        # KPI will cause KPI to delete and recreate the file in KoBoCAT if
+        # needed
+        get_session().head(self.data_value)
+        # We update the modification time here to avoid requesting that KPI
+        # resynchronize this file multiple times per the
+        # `PAIRED_DATA_EXPIRATION` period. However, this introduces a race
+        # condition where it's possible that KPI *deletes* this file before
+        # we attempt to update it. The `update()` method is atomic since it
+        # does not reference any value previously read from the database.
+        MetaData.objects.filter(pk=self.pk).update(
+            date_modified=timezone.now()
+        )
+
+    def schedule_paired_data_refresh(self) -> bool:
+        """
+        Refresh the paired data XML file in the background, unless a refresh
+        has already been scheduled within the `PAIRED_DATA_EXPIRATION`
+        period. Return whether a refresh has been scheduled.
+        """
+        # Avoid circular import
+        from onadata.apps.main.tasks import refresh_paired_data
+
+        # `add()` is atomic: only one request schedules the refresh. The lock
+        # is not released when the task ends; it expires with the file, so
+        # that an unreachable KPI is not requested on every manifest download
+        lock_acquired = cache.add(
+            f'{PAIRED_DATA_REFRESH_LOCK_PREFIX}:{self.pk}',
+            True,
+            settings.PAIRED_DATA_EXPIRATION,
+        )
+        if lock_acquired:
+            refresh_paired_data.delay(self.pk)
+        return lock_acquired
 
     @property
     def filename(self) -> str:
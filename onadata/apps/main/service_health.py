@@ -5,6 +5,7 @@ from django.conf import settings
 from django.http import HttpResponse
 
 from onadata.apps.logger.models import Instance
+from onadata.libs.utils.http_client import get_pool_stats
 
 
 def service_health(request):
@@ -44,6 +45,12 @@ def service_health(request):
         postgres_message, postgres_time,
     )
 
+    # Connections reused by outbound requests of this process
+    for host, stats in get_pool_stats().items():
+        output += 'HTTP pool {}: {} requests over {} connections\r\n'.format(
+            host, stats['requests'], stats['connections']
+        )
+
     return HttpResponse(
         output, status=(500 if any_failure else 200), content_type='text/plain'
     )
@@ -0,0 +1,14 @@
+# coding: utf-8
+from onadata.celery import app
+from onadata.apps.main.models.meta_data import MetaData
+
+
+@app.task()
+def refresh_paired_data(metadata_id: int):
+    try:
+        metadata = MetaData.objects.get(pk=metadata_id)
+    except MetaData.DoesNotExist:
+        # KPI deleted the file in the meantime
+        return
+
+    metadata.refresh_paired_data()
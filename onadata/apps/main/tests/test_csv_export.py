@@ -1,12 +1,22 @@
 # coding: utf-8
 import os
+from unittest.mock import patch
 
+from django.conf import settings
 from django.core.files.storage import default_storage
+from django.test import override_settings
 from django.utils.dateparse import parse_datetime
 
+from onadata.apps.logger.models import Note
 from onadata.apps.viewer.models.data_dictionary import DataDictionary
 from onadata.apps.viewer.models.export import Export
-from onadata.libs.utils.export_tools import generate_export
+from onadata.apps.viewer.pandas_mongo_bridge import CSVDataFrameBuilder
+from onadata.libs.utils.export_tools import (
+    generate_attachments_zip_export,
+    generate_export,
+    generate_kml_export,
+    get_incremental_base_export,
+)
 from .test_base import TestBase
 
 
@@ -107,3 +117,108 @@ class TestExport(TestBase):
                 expected_content = f1.read()
                 actual_content = f2.read()
                 self.assertEqual(actual_content, expected_content)
+
+    @override_settings(INCREMENTAL_CSV_EXPORTS_ENABLED=True)
+    def test_incremental_csv_export(self):
+        self._publish_transportation_form()
+        self._submit_transport_instance(0)
+        id_string = self.xform.id_string
+        first_export = generate_export(
+            Export.CSV_EXPORT, 'csv', self.user.username, id_string
+        )
+        self.assertEqual(
+            first_export.last_exported_id, self.xform.instances.get().pk
+        )
+
+        self._submit_transport_instance(1)
+        last_instance = self.xform.instances.latest('pk')
+        with patch.object(
+            CSVDataFrameBuilder,
+            'export_to',
+            side_effect=AssertionError('The previous export is not reused'),
+        ):
+            export = generate_export(
+                Export.CSV_EXPORT, 'csv', self.user.username, id_string
+            )
+        self.assertEqual(export.last_exported_id, last_instance.pk)
+        self.assertEqual(export.layout['num_rows'], 2)
+
+        # The file is the same as if all submissions were exported again
+        with override_settings(INCREMENTAL_CSV_EXPORTS_ENABLED=False):
+            full_export = generate_export(
+                Export.CSV_EXPORT, 'csv', self.user.username, id_string
+            )
+        with default_storage.open(full_export.filepath) as f1:
+            with default_storage.open(export.filepath) as f2:
+                self.assertEqual(f2.read(), f1.read())
+
+        # Files containing deleted submissions are not appended to
+        last_instance.delete()
+        export.refresh_from_db()
+        self.assertIsNone(export.last_exported_id)
+
+    @override_settings(INCREMENTAL_CSV_EXPORTS_ENABLED=True)
+    def test_incremental_csv_export_with_late_submission(self):
+        self._publish_transportation_form()
+        self._submit_transport_instance(0)
+        self._submit_transport_instance(1)
+        id_string = self.xform.id_string
+        late_instance, last_instance = self.xform.instances.order_by('pk')
+
+        # The submission with the lower pk is not in Mongo yet
+        settings.MONGO_DB.instances.delete_one({'_id': late_instance.pk})
+        first_export = generate_export(
+            Export.CSV_EXPORT, 'csv', self.user.username, id_string
+        )
+        self.assertEqual(first_export.last_exported_id, last_instance.pk)
+        self.assertEqual(first_export.layout['num_rows'], 1)
+
+        # Once it is, the previous file is not appended to but rebuilt
+        late_instance.parsed_instance.update_mongo(asynchronous=False)
+        with patch.object(
+            CSVDataFrameBuilder,
+            'append_to',
+            side_effect=AssertionError('The previous export is reused'),
+        ):
+            export = generate_export(
+                Export.CSV_EXPORT, 'csv', self.user.username, id_string
+            )
+        self.assertEqual(export.last_exported_id, last_instance.pk)
+        self.assertEqual(export.layout['num_rows'], 2)
+
+    @override_settings(INCREMENTAL_CSV_EXPORTS_ENABLED=True)
+    def test_incremental_csv_export_with_notes_and_tags(self):
+        self._publish_transportation_form_and_submit_instance()
+        instance = self.xform.instances.get()
+        id_string = self.xform.id_string
+
+        def _assert_export_is_not_reused(change):
+            generate_export(
+                Export.CSV_EXPORT, 'csv', self.user.username, id_string
+            )
+            self.assertIsNotNone(get_incremental_base_export(self.xform))
+            change()
+            self.assertIsNone(get_incremental_base_export(self.xform))
+
+        note = Note(instance=instance, note='Checked')
+        _assert_export_is_not_reused(note.save)
+        _assert_export_is_not_reused(note.delete)
+        _assert_export_is_not_reused(lambda: instance.tags.add('checked'))
+        _assert_export_is_not_reused(
+            lambda: instance.tags.remove('checked')
+        )
+
+    @override_settings(INCREMENTAL_CSV_EXPORTS_ENABLED=True)
+    def test_zip_and_kml_exports_are_not_incremental(self):
+        self._publish_transportation_form_and_submit_instance()
+        id_string = self.xform.id_string
+        for export_type, generate in (
+            (Export.ZIP_EXPORT, generate_attachments_zip_export),
+            (Export.KML_EXPORT, generate_kml_export),
+        ):
+            export = generate(
+                export_type, export_type, self.user.username, id_string
+            )
+            self.assertEqual(export.internal_status, Export.SUCCESSFUL)
+            self.assertTrue(default_storage.exists(export.filepath))
+            self.assertIsNone(export.last_exported_id)
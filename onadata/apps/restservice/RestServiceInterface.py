@@ -1,4 +1,18 @@
 # coding: utf-8
 class RestServiceInterface:
+
+    # Fields of the submission passed to `send()` in `data`, see
+    # `onadata.apps.restservice.utils.call_service()`. Services should only
+    # list the ones they use: `json` and `xml` are heavy to build and to send
+    # through the broker.
+    payload_fields = (
+        'xform_id',
+        'xform_id_string',
+        'instance_uuid',
+        'instance_id',
+        'xml',
+        'json',
+    )
+
     def send(self, url, data=None):
         raise NotImplementedError
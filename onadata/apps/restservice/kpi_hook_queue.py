@@ -0,0 +1,60 @@
+# coding: utf-8
+"""
+Queues, in Redis, of the submissions waiting to be sent to each KPI hook,
+when `settings.KPI_HOOK_BATCHING_ENABLED` is `True`. See
+`onadata.apps.restservice.utils.enqueue_kpi_hook()` and
+`onadata.apps.restservice.tasks.kpi_hook_batch_task`.
+"""
+from django.conf import settings
+from django_redis import get_redis_connection
+
+KEY_PREFIX = 'kobocat:kpi_hook_queue'
+
+
+def push(rest_service_id: int, instance_id: int) -> bool:
+    """
+    Add a submission to the queue of a hook. Return whether the caller must
+    schedule the task sending the queue, i.e. whether none is scheduled yet.
+    """
+    pipeline = _get_redis_client().pipeline(transaction=False)
+    pipeline.rpush(_get_queue_key(rest_service_id), instance_id)
+    # The flag is removed by the task before popping the queue. It expires in
+    # case the task is lost: a task scheduled twice only finds an empty queue
+    pipeline.set(
+        _get_scheduled_key(rest_service_id),
+        1,
+        nx=True,
+        ex=settings.KPI_HOOK_BATCH_WINDOW * 5,
+    )
+    _, scheduled = pipeline.execute()
+    return bool(scheduled)
+
+
+def pop(rest_service_id: int, size: int) -> tuple[list, bool]:
+    """
+    Take up to `size` submissions from the queue of a hook. Return their ids
+    and whether the queue still has some.
+    """
+    redis_client = _get_redis_client()
+    redis_client.delete(_get_scheduled_key(rest_service_id))
+
+    queue_key = _get_queue_key(rest_service_id)
+    pipeline = redis_client.pipeline(transaction=True)
+    pipeline.lrange(queue_key, 0, size - 1)
+    pipeline.ltrim(queue_key, size, -1)
+    pipeline.llen(queue_key)
+    instance_ids, _, remaining = pipeline.execute()
+    # A submission queued twice (e.g. edited during the window) is sent once
+    return list(dict.fromkeys(int(pk) for pk in instance_ids)), remaining > 0
+
+
+def _get_queue_key(rest_service_id: int) -> str:
+    return f'{KEY_PREFIX}:{rest_service_id}'
+
+
+def _get_scheduled_key(rest_service_id: int) -> str:
+    return f'{KEY_PREFIX}:{rest_service_id}:scheduled'
+
+
+def _get_redis_client():
+    return get_redis_connection(settings.KPI_HOOK_BATCH_REDIS_CACHE)
@@ -1,25 +1,61 @@
 # coding: utf-8
 import logging
 import re
+from typing import Optional
 
-import requests
 from django.conf import settings
 from onadata.apps.restservice.RestServiceInterface import RestServiceInterface
 from onadata.apps.logger.models import Instance
+from onadata.libs.utils.http_client import get_session
 
 
 class ServiceDefinition(RestServiceInterface):
     id = 'kpi_hook'
     verbose_name = 'KPI Hook POST'
+    # KPI fetches the submission itself
+    payload_fields = ('instance_id',)
 
     def send(self, endpoint, data):
+        if url := self._get_url(endpoint):
+            self._post(url, data.get('instance_id'))
 
-        # Will be used internally by KPI to fetch data with KoBoCatBackend
-        post_data = {
-            'submission_id': data.get('instance_id')
-        }
-        headers = {'Content-Type': 'application/json'}
+            # Save successful
+            Instance.objects.filter(pk=data.get('instance_id')).update(
+                posted_to_kpi=True
+            )
+
+    def send_batch(self, endpoint: str, instance_ids: list) -> list:
+        """
+        Send several submissions, over the same connection, and mark the
+        successful ones with a single `UPDATE`.
+
+        Returns the ids of the submissions which could not be sent.
+        """
+        if not (url := self._get_url(endpoint)):
+            return []
 
+        sent_ids = []
+        failed_ids = []
+        for instance_id in instance_ids:
+            try:
+                self._post(url, instance_id)
+            except Exception:
+                logging.warning(
+                    f'Failed to send submission #{instance_id} to `{url}`',
+                    exc_info=True,
+                )
+                failed_ids.append(instance_id)
+            else:
+                sent_ids.append(instance_id)
+
+        if sent_ids:
+            Instance.objects.filter(pk__in=sent_ids).update(
+                posted_to_kpi=True
+            )
+
+        return failed_ids
+
+    def _get_url(self, endpoint: str) -> Optional[str]:
         # Verify if endpoint starts with `/assets/` before sending
         # the request to KPI
         pattern = r'{}'.format(settings.KPI_HOOK_ENDPOINT_PATTERN.replace(
@@ -29,15 +65,17 @@ class ServiceDefinition(RestServiceInterface):
         if re.match(pattern, endpoint) or re.match(pattern[7:], endpoint):
             # Build the url in the service to avoid saving hardcoded
             # domain name in the DB
-            url = f'{settings.KOBOFORM_INTERNAL_URL}{endpoint}'
-            response = requests.post(url, headers=headers, json=post_data)
-            response.raise_for_status()
+            return f'{settings.KOBOFORM_INTERNAL_URL}{endpoint}'
 
-            # Save successful
-            Instance.objects.filter(pk=data.get('instance_id')).update(
-                posted_to_kpi=True
-            )
-        else:
-            logging.warning(
-                f'This endpoint: `{endpoint}` is not valid for `KPI Hook`'
-            )
+        logging.warning(
+            f'This endpoint: `{endpoint}` is not valid for `KPI Hook`'
+        )
+
+    def _post(self, url: str, instance_id: int):
+        # Will be used internally by KPI to fetch data with KoBoCatBackend
+        post_data = {
+            'submission_id': instance_id
+        }
+        headers = {'Content-Type': 'application/json'}
+        response = get_session().post(url, headers=headers, json=post_data)
+        response.raise_for_status()
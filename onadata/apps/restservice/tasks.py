@@ -4,6 +4,7 @@ import logging
 from celery import shared_task
 from django.conf import settings
 
+from onadata.apps.restservice import kpi_hook_queue
 from onadata.apps.restservice.models import RestService
 
 
@@ -33,3 +34,51 @@ def service_definition_task(self, rest_service_id, data):
         raise self.retry(countdown=countdown, max_retries=settings.REST_SERVICE_MAX_RETRIES)
 
     return True
+
+
+@shared_task(bind=True)
+def kpi_hook_batch_task(self, rest_service_id, instance_ids=None):
+    """
+    Sends the submissions queued for a KPI hook (see
+    `onadata.apps.restservice.utils.enqueue_kpi_hook()`), or `instance_ids`
+    when the task is retried.
+    Submissions which could not be sent are retried together, like
+    `service_definition_task` does.
+
+    :param self: Celery.Task.
+    :param rest_service_id: RestService primary key.
+    :param instance_ids: list.
+    """
+    if instance_ids is None:
+        instance_ids, has_more = kpi_hook_queue.pop(
+            rest_service_id, settings.KPI_HOOK_BATCH_SIZE
+        )
+        if has_more:
+            kpi_hook_batch_task.delay(rest_service_id)
+        if not instance_ids:
+            return True
+
+    try:
+        rest_service = RestService.objects.get(pk=rest_service_id)
+    except RestService.DoesNotExist:
+        # The hook has been deleted in the meantime
+        return True
+
+    service = rest_service.get_service_definition()()
+    failed_ids = service.send_batch(rest_service.service_url, instance_ids)
+    if failed_ids:
+        logger = logging.getLogger("console_logger")
+        logger.error(
+            "kpi_hook_batch_task - {} submission(s) could not be sent".format(
+                len(failed_ids)
+            )
+        )
+        # Countdown is in seconds
+        countdown = 120 * (10 ** self.request.retries)
+        raise self.retry(
+            args=(rest_service_id, failed_ids),
+            countdown=countdown,
+            max_retries=settings.REST_SERVICE_MAX_RETRIES,
+        )
+
+    return True
@@ -1,12 +1,18 @@
 # coding: utf-8
 import os
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
 
 from django.conf import settings
+from django.test import override_settings
 
 from onadata.apps.main.tests.test_base import TestBase
 from onadata.apps.logger.models.xform import XForm
 from onadata.apps.restservice.RestServiceInterface import RestServiceInterface
+from onadata.apps.restservice import kpi_hook_queue
 from onadata.apps.restservice.models import RestService
+from onadata.apps.restservice.tasks import kpi_hook_batch_task
+from onadata.apps.restservice.utils import call_service
 
 
 class RestServiceTest(TestBase):
@@ -39,3 +45,37 @@ class RestServiceTest(TestBase):
         sv = self.restservice.get_service_definition()()
         self.assertEqual(isinstance(sv, RestServiceInterface), True)
 
+    @override_settings(KPI_HOOK_BATCHING_ENABLED=True)
+    def test_kpi_hook_batch(self):
+        self._create_rest_service()
+        for instance_id in (1, 2, 1):
+            kpi_hook_queue.push(self.restservice.pk, instance_id)
+
+        with patch(
+            'onadata.apps.restservice.services.kpi_hook.get_session'
+        ) as get_session_mock:
+            kpi_hook_batch_task.delay(self.restservice.pk)
+
+        posted_ids = [
+            call.kwargs['json']['submission_id']
+            for call in get_session_mock.return_value.post.call_args_list
+        ]
+        # Sent once each, in order
+        self.assertEqual(posted_ids, [1, 2])
+        self.assertEqual(kpi_hook_queue.pop(self.restservice.pk, 10), ([], False))
+
+    def test_call_service_sends_only_payload_fields(self):
+        self._create_rest_service()
+        parsed_instance = Mock(
+            instance=SimpleNamespace(id=1, xform=self.restservice.xform)
+        )
+        with patch(
+            'onadata.apps.restservice.utils.service_definition_task'
+        ) as task_mock:
+            call_service(parsed_instance)
+
+        task_mock.delay.assert_called_once_with(
+            self.restservice.pk, {'instance_id': 1}
+        )
+        # The Mongo document is not built for the KPI hook
+        parsed_instance.to_dict_for_mongo.assert_not_called()
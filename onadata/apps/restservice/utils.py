@@ -1,24 +1,69 @@
 # coding: utf-8
+from django.conf import settings
+
+from onadata.apps.restservice import SERVICE_KPI_HOOK, kpi_hook_queue
 from onadata.apps.restservice.models import RestService
-from onadata.apps.restservice.tasks import service_definition_task
+from onadata.apps.restservice.tasks import (
+    kpi_hook_batch_task,
+    service_definition_task,
+)
+
 
+def call_service(parsed_instance, mongo_document=None):
+    """
+    Send a new submission to the rest services of its form.
 
-def call_service(parsed_instance):
+    `mongo_document` is the result of `parsed_instance.to_dict_for_mongo()`,
+    if the caller already has it.
+    """
     # lookup service
     instance = parsed_instance.instance
     rest_services = RestService.objects.filter(xform=instance.xform)
+
+    # Celery can't pickle ParsedInstance object,
+    # let's use build a serializable object instead
+    # We don't really need `xform_id`, `xform_id_string`, `instance_uuid`
+    # We use them only for retro compatibility with all services (even if they are deprecated)
+    # Values are only computed if a service needs them (see
+    # `RestServiceInterface.payload_fields`), and once for all services.
+    payload_getters = {
+        'xform_id': lambda: instance.xform.id,
+        'xform_id_string': lambda: instance.xform.id_string,
+        'instance_uuid': lambda: instance.uuid,
+        'instance_id': lambda: instance.id,
+        'xml': lambda: instance.xml,
+        'json': lambda: (
+            mongo_document
+            if mongo_document is not None
+            else parsed_instance.to_dict_for_mongo()
+        ),
+    }
+    payload = {}
+
     # call service send with url and data parameters
     for rest_service in rest_services:
-        # Celery can't pickle ParsedInstance object,
-        # let's use build a serializable object instead
-        # We don't really need `xform_id`, `xform_id_string`, `instance_uuid`
-        # We use them only for retro compatibility with all services (even if they are deprecated)
-        data = {
-            "xform_id": instance.xform.id,
-            "xform_id_string": instance.xform.id_string,
-            "instance_uuid": instance.uuid,
-            "instance_id": instance.id,
-            "xml": parsed_instance.instance.xml,
-            "json": parsed_instance.to_dict_for_mongo()
-        }
+        if (
+            settings.KPI_HOOK_BATCHING_ENABLED
+            and rest_service.name == SERVICE_KPI_HOOK[0]
+        ):
+            # KPI only needs the id of the submission
+            enqueue_kpi_hook(rest_service.pk, instance.id)
+            continue
+
+        data = {}
+        for field in rest_service.get_service_definition().payload_fields:
+            if field not in payload:
+                payload[field] = payload_getters[field]()
+            data[field] = payload[field]
         service_definition_task.delay(rest_service.pk, data)
+
+
+def enqueue_kpi_hook(rest_service_id: int, instance_id: int):
+    """
+    Queue a submission to be sent to a KPI hook with the others received
+    within `settings.KPI_HOOK_BATCH_WINDOW` seconds
+    """
+    if kpi_hook_queue.push(rest_service_id, instance_id):
+        kpi_hook_batch_task.apply_async(
+            (rest_service_id,), countdown=settings.KPI_HOOK_BATCH_WINDOW
+        )
@@ -1,5 +1,6 @@
 # coding: utf-8
 from django.apps import AppConfig
+from django.core import checks
 
 
 class ViewerConfig(AppConfig):
@@ -7,4 +8,36 @@ class ViewerConfig(AppConfig):
 
     def ready(self):
         from onadata.apps.viewer import signals
+        checks.register(check_mongo_indexes, checks.Tags.database)
         super().ready()
+
+
+def check_mongo_indexes(app_configs=None, **kwargs):
+    """
+    Warn about missing indexes of the Mongo collection of submissions. Run
+    with `manage.py check --database default` and `manage.py migrate`.
+    """
+    from pymongo.errors import PyMongoError
+
+    from onadata.apps.viewer.mongo_indexes import get_index_report
+
+    try:
+        missing = get_index_report(include_usage=False)['missing']
+    except PyMongoError as e:
+        return [
+            checks.Warning(
+                f'Could not check Mongo indexes: {e}',
+                id='viewer.W002',
+            )
+        ]
+
+    if not missing:
+        return []
+
+    return [
+        checks.Warning(
+            f"Missing Mongo indexes: {', '.join(missing)}",
+            hint='Run `python manage.py mongo_indexes --create`',
+            id='viewer.W001',
+        )
+    ]
@@ -0,0 +1,45 @@
+# coding: utf-8
+from django.core.management.base import BaseCommand
+
+from onadata.apps.viewer.mongo_indexes import (
+    create_missing_indexes,
+    get_index_report,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Report missing and unused indexes of the Mongo collection of "
+        "submissions, and optionally build the missing ones"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--create',
+            action='store_true',
+            default=False,
+            help="Build missing indexes, in the background",
+        )
+
+    def handle(self, *args, **options):
+        report = get_index_report()
+        usage = report['usage']
+
+        for name in report['missing']:
+            self.stdout.write(f'Missing index: {name}')
+
+        for name in report['extra']:
+            self.stdout.write(f'Index not required: {name}')
+
+        if usage is None:
+            self.stdout.write('Index usage is not available ($indexStats)')
+        else:
+            for name, ops in sorted(usage.items()):
+                if not ops:
+                    self.stdout.write(f'Unused index: {name}')
+
+        if options['create'] and report['missing']:
+            created = create_missing_indexes()
+            self.stdout.write(f"Created indexes: {', '.join(created)}")
+        elif not report['missing']:
+            self.stdout.write('All required indexes exist')
@@ -1,9 +1,8 @@
 # coding: utf-8
-from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
 
 from onadata.apps.viewer.models.parsed_instance import ParsedInstance
-from onadata.libs.utils.common_tags import USERFORM_ID
+from onadata.apps.viewer.mongo_indexes import create_missing_indexes
 
 
 class Command(BaseCommand):
@@ -58,4 +57,4 @@ class Command(BaseCommand):
             end = min(record_count, start + batchsize)
         # add indexes after writing so the writing operation above is not
         # slowed
-        settings.MONGO_DB.instances.create_index(USERFORM_ID)
+        create_missing_indexes()
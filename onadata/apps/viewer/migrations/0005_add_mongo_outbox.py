@@ -0,0 +1,23 @@
+# Generated by Django 4.2.15 on 2026-10-18 10:00
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logger', '0035_add_survey_metadata_to_xform'),
+        ('viewer', '0004_update_meta_data_export_types'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MongoOutbox',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('call_services', models.BooleanField(default=False)),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+                ('instance', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='mongo_outbox', to='logger.instance')),
+            ],
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.15 on 2026-10-18 10:00
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('viewer', '0005_add_mongo_outbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='export',
+            name='last_exported_id',
+            field=models.BigIntegerField(default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name='export',
+            name='layout',
+            field=models.JSONField(default=None, null=True),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.15 on 2026-10-18 10:00
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('viewer', '0006_add_incremental_export_fields'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='export',
+            name='export_type',
+            field=models.CharField(
+                default='xls',
+                max_length=10,
+                choices=[
+                    ('xls', 'Excel'),
+                    ('csv', 'CSV'),
+                    ('zip', 'ZIP'),
+                    ('kml', 'kml'),
+                    ('parquet', 'Parquet'),
+                ],
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.15 on 2026-10-18 10:00
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('viewer', '0007_add_parquet_export_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mongooutbox',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='mongooutbox',
+            name='last_error',
+            field=models.TextField(null=True),
+        ),
+    ]
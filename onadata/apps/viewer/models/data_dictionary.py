@@ -1,8 +1,13 @@
 # coding: utf-8
 import os
 import re
+import threading
+from collections import OrderedDict
+from functools import cached_property
+from types import MappingProxyType
 from xml.dom import Node
 
+from django.conf import settings
 from django.db import models
 from django.utils.encoding import smart_str
 from pyxform import SurveyElementBuilder
@@ -12,9 +17,13 @@ from pyxform.section import RepeatingSection
 from pyxform.xform2json import create_survey_element_from_xml
 
 from onadata.apps.logger.models.xform import XForm
-from onadata.apps.logger.xform_instance_parser import clean_and_parse_xml
+from onadata.apps.logger.xform_instance_parser import (
+    clean_and_parse_xml,
+    get_media_question_xpaths,
+)
 from onadata.apps.api.mongo_helper import MongoHelper
 from onadata.libs.utils.common_tags import UUID, SUBMISSION_TIME, TAGS, NOTES
+from onadata.libs.utils.decorators import get_field_renames
 from onadata.libs.utils.export_tools import (
     question_types_to_exclude,
     DictOrganizer,
@@ -34,6 +43,158 @@ class ColumnRename(models.Model):
         return dict([(cr.xpath, cr.column_name) for cr in cls.objects.all()])
 
 
+# Bump whenever the structure of `CompiledSurvey.to_metadata()` changes, so
+# that metadata persisted with an older structure gets recomputed
+SURVEY_METADATA_VERSION = 2
+
+
+class CompiledSurvey:
+    """
+    Artifacts derived from the survey of a form, computed in a single walk of
+    the survey tree. See `get_compiled_survey()`.
+    """
+
+    def __init__(self, data_dictionary):
+        self._xml = data_dictionary.xml
+        self._survey_hash = data_dictionary.get_survey_hash()
+        self.survey = data_dictionary._build_survey()
+        self.elements_by_xpath = {}
+        self.repeat_xpaths = set()
+        self.geopoint_xpaths = []
+        for e in self.survey.iter_descendants():
+            xpath = e.get_abbreviated_xpath()
+            self.elements_by_xpath[xpath] = e
+            if e.type == 'repeat':
+                self.repeat_xpaths.add(xpath)
+            if e.bind.get('type') == 'geopoint':
+                self.geopoint_xpaths.append(xpath)
+        # Shared by all the requests of the process: read-only
+        self.elements_by_xpath = MappingProxyType(self.elements_by_xpath)
+        self.repeat_xpaths = frozenset(self.repeat_xpaths)
+        self.geopoint_xpaths = tuple(self.geopoint_xpaths)
+
+    @cached_property
+    def media_question_xpaths(self):
+        # Computed lazily because it parses the XML of the form
+        return tuple(get_media_question_xpaths(self._xml))
+
+    def to_metadata(self) -> dict:
+        """
+        Return the artifacts needed on hot paths as a JSON-serializable dict
+        to be persisted in `XForm.survey_metadata`
+        """
+        return {
+            'version': SURVEY_METADATA_VERSION,
+            'survey_hash': self._survey_hash,
+            'repeat_xpaths': sorted(self.repeat_xpaths),
+            'geopoint_xpaths': list(self.geopoint_xpaths),
+            'media_question_xpaths': list(self.media_question_xpaths),
+            'mongo_field_names': get_encoded_field_names(
+                self.elements_by_xpath
+            ),
+        }
+
+
+def get_encoded_field_names(xpaths) -> dict:
+    """
+    Return the names of the fields `xpaths` which are encoded in MongoDB,
+    mapped to their xpaths, e.g. {"Q1Lg==1": "Q1.1"}. Encoded names which are
+    also the xpath of a field (of any field, encoded or not) are left out:
+    records must not be renamed from them.
+    """
+    xpaths = {str(xpath) for xpath in xpaths}
+    encoded_names = {}
+    for xpath in xpaths:
+        encoded_name = MongoHelper.encode(xpath)
+        if encoded_name != xpath and encoded_name not in xpaths:
+            encoded_names[encoded_name] = xpath
+    return encoded_names
+
+
+_compiled_surveys = OrderedDict()
+_mongo_field_renames = OrderedDict()
+_compiled_surveys_lock = threading.Lock()
+
+
+def get_compiled_survey(data_dictionary: 'DataDictionary') -> CompiledSurvey:
+    """
+    Return the compiled survey of `data_dictionary` from a per-process LRU
+    cache, keyed by primary key and `date_modified` so that republishing the
+    form (which bumps `date_modified`) never returns stale artifacts.
+    """
+    if data_dictionary.pk is None or data_dictionary.date_modified is None:
+        # Not saved yet, nothing to key the cache on
+        return CompiledSurvey(data_dictionary)
+
+    key = (data_dictionary.pk, data_dictionary.date_modified)
+    with _compiled_surveys_lock:
+        try:
+            _compiled_surveys.move_to_end(key)
+            return _compiled_surveys[key]
+        except KeyError:
+            pass
+
+    # Compile outside the lock; concurrent misses only waste some CPU
+    compiled_survey = CompiledSurvey(data_dictionary)
+    with _compiled_surveys_lock:
+        _compiled_surveys[key] = compiled_survey
+        while len(_compiled_surveys) > settings.DATA_DICTIONARY_CACHE_SIZE:
+            _compiled_surveys.popitem(last=False)
+
+    return compiled_survey
+
+
+def get_mongo_field_renames(
+    username: str, id_string: str
+) -> MappingProxyType:
+    """
+    Return the renames to apply to the Mongo records of a form to get the
+    names of its fields back (see `get_decoded_record()`), from a per-process
+    LRU cache keyed like `get_compiled_survey()`. On a hit, only the primary
+    key and `date_modified` of the form are fetched from the database.
+    """
+    xform_id, date_modified = XForm.objects.values_list(
+        'pk', 'date_modified'
+    ).get(id_string=id_string, user__username=username)
+
+    key = (xform_id, date_modified)
+    with _compiled_surveys_lock:
+        try:
+            _mongo_field_renames.move_to_end(key)
+            return _mongo_field_renames[key]
+        except KeyError:
+            pass
+
+    data_dictionary = DataDictionary.all_objects.get(pk=xform_id)
+    renames = MappingProxyType(
+        get_field_renames(data_dictionary.get_mongo_field_names_dict())
+    )
+    with _compiled_surveys_lock:
+        _mongo_field_renames[key] = renames
+        while len(_mongo_field_renames) > settings.DATA_DICTIONARY_CACHE_SIZE:
+            _mongo_field_renames.popitem(last=False)
+
+    return renames
+
+
+def invalidate_compiled_survey(sender, instance, **kwargs):
+    """
+    Evict all the compiled surveys of a republished or deleted form
+    """
+    update_fields = kwargs.get('update_fields')
+    if update_fields and not {'json', 'xml'}.intersection(update_fields):
+        # The survey cannot have changed
+        return
+
+    with _compiled_surveys_lock:
+        for key in [key for key in _compiled_surveys if key[0] == instance.pk]:
+            del _compiled_surveys[key]
+        for key in [
+            key for key in _mongo_field_renames if key[0] == instance.pk
+        ]:
+            del _mongo_field_renames[key]
+
+
 def upload_to(instance, filename, username=None):
     if instance:
         username = instance.xform.user.username
@@ -165,6 +326,10 @@ class DataDictionary(XForm):
             self._mark_start_time_boolean()
             set_uuid(self)
             self.set_uuid_in_xml(id_string=survey.id_string)
+        # (Re)publishing the form: persist what hot paths need from the survey
+        # so that they do not have to build it
+        if self.json:
+            self.survey_metadata = CompiledSurvey(self).to_metadata()
         super().save(*args, **kwargs)
 
     def file_name(self):
@@ -172,15 +337,20 @@ class DataDictionary(XForm):
 
     def get_survey(self):
         if not hasattr(self, "_survey"):
-            try:
-                builder = SurveyElementBuilder()
-                self._survey = \
-                    builder.create_survey_element_from_json(self.json)
-            except ValueError:
-                xml = bytes(bytearray(self.xml, encoding='utf-8'))
-                self._survey = create_survey_element_from_xml(xml)
+            self._survey = self.get_compiled_survey().survey
         return self._survey
 
+    def get_compiled_survey(self):
+        return get_compiled_survey(self)
+
+    def _build_survey(self):
+        try:
+            builder = SurveyElementBuilder()
+            return builder.create_survey_element_from_json(self.json)
+        except ValueError:
+            xml = bytes(bytearray(self.xml, encoding='utf-8'))
+            return create_survey_element_from_xml(xml)
+
     survey = property(get_survey)
 
     def get_survey_elements(self):
@@ -210,25 +380,43 @@ class DataDictionary(XForm):
 
     def get_mongo_field_names_dict(self):
         """
-        Return a dictionary of fieldnames as saved in mongodb with
-        corresponding xform field names e.g {"Q1Lg==1": "Q1.1"}
+        Return a read-only dictionary of fieldnames as saved in mongodb with
+        corresponding xform field names e.g {"Q1Lg==1": "Q1.1"}.
+        Fields whose names are not encoded in mongodb are omitted, see
+        `get_encoded_field_names()`.
         """
-        names = {}
-        for elem in self.get_survey_elements():
-            names[MongoHelper.encode(str(elem.get_abbreviated_xpath()))] = \
-                elem.get_abbreviated_xpath()
-        return names
+        return MappingProxyType(
+            self.get_survey_metadata()['mongo_field_names']
+        )
+
+    def get_survey_metadata(self) -> dict:
+        """
+        Return the survey metadata persisted at publish time. Forms published
+        before it existed get it computed and saved on first access.
+        """
+        if self.survey_metadata.get('version') != SURVEY_METADATA_VERSION:
+            self.survey_metadata = self.get_compiled_survey().to_metadata()
+            if self.pk:
+                # Avoid `save()`, which would bump `date_modified`
+                XForm.all_objects.filter(pk=self.pk).update(
+                    survey_metadata=self.survey_metadata
+                )
+        return self.survey_metadata
 
     survey_elements = property(get_survey_elements)
 
     def geopoint_xpaths(self):
-        geo_xpaths = []
+        return list(self.get_survey_metadata()['geopoint_xpaths'])
 
-        for e in self.get_survey_elements():
-            if e.bind.get('type') == 'geopoint':
-                geo_xpaths.append(e.get_abbreviated_xpath())
+    def get_repeat_xpaths(self):
+        if not hasattr(self, '_repeat_xpaths'):
+            self._repeat_xpaths = frozenset(
+                self.get_survey_metadata()['repeat_xpaths']
+            )
+        return self._repeat_xpaths
 
-        return geo_xpaths
+    def get_media_question_xpaths(self):
+        return list(self.get_survey_metadata()['media_question_xpaths'])
 
     def xpath_of_first_geopoint(self):
         geo_xpaths = self.geopoint_xpaths()
@@ -317,16 +505,11 @@ class DataDictionary(XForm):
         return [remove_first_index(header) for header in self.get_headers()]
 
     def get_element(self, abbreviated_xpath):
-        if not hasattr(self, "_survey_elements"):
-            self._survey_elements = {}
-            for e in self.get_survey_elements():
-                self._survey_elements[e.get_abbreviated_xpath()] = e
-
         def remove_all_indices(xpath):
             return re.sub(r"\[\d+\]", "", xpath)
 
         clean_xpath = remove_all_indices(abbreviated_xpath)
-        return self._survey_elements.get(clean_xpath)
+        return self.get_compiled_survey().elements_by_xpath.get(clean_xpath)
 
     def get_label(self, abbreviated_xpath):
         e = self.get_element(abbreviated_xpath)
@@ -18,6 +18,7 @@ class Export(models.Model):
     CSV_EXPORT = 'csv'
     KML_EXPORT = 'kml'
     ZIP_EXPORT = 'zip'
+    PARQUET_EXPORT = 'parquet'
 
     EXPORT_MIMES = {
         'xls': 'vnd.ms-excel',
@@ -32,6 +33,7 @@ class Export(models.Model):
         (CSV_EXPORT, 'CSV'),
         (ZIP_EXPORT, 'ZIP'),
         (KML_EXPORT, 'kml'),
+        (PARQUET_EXPORT, 'Parquet'),
     ]
 
     EXPORT_TYPE_DICT = dict(export_type for export_type in EXPORT_TYPES)
@@ -59,6 +61,11 @@ class Export(models.Model):
     # status
     internal_status = models.SmallIntegerField(default=PENDING)
     export_url = models.URLField(null=True, default=None)
+    # `_id` of the last submission of the file, and columns and options it
+    # was written with, to append newer submissions to it on the next export
+    # (unfiltered CSV exports only). Reset when submissions are deleted.
+    last_exported_id = models.BigIntegerField(null=True, default=None)
+    layout = models.JSONField(null=True, default=None)
 
     class Meta:
         app_label = "viewer"
@@ -0,0 +1,152 @@
+# coding: utf-8
+import logging
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import F
+from pymongo.errors import ConnectionFailure
+
+from onadata.apps.logger.models import Instance
+from onadata.apps.restservice.utils import call_service
+
+
+class MongoOutbox(models.Model):
+    """
+    Submissions waiting to be written to Mongo.
+
+    When `settings.MONGO_OUTBOX_ENABLED` is `True`, saving a `ParsedInstance`
+    inserts a row here, in the same transaction as the submission, instead of
+    writing to Mongo synchronously. Rows are drained in batches by
+    `onadata.apps.viewer.tasks.drain_mongo_outbox`.
+    """
+
+    instance = models.OneToOneField(
+        Instance, related_name='mongo_outbox', on_delete=models.CASCADE
+    )
+    # Whether REST services must be called once the submission is in Mongo,
+    # i.e. when the submission is new
+    call_services = models.BooleanField(default=False)
+    date_created = models.DateTimeField(auto_now_add=True)
+    # Failed writes, see `drain()`
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(null=True)
+
+    class Meta:
+        app_label = 'viewer'
+
+    @classmethod
+    def enqueue(cls, instance_ids, call_services=False):
+        """
+        Add submissions to the outbox (once, even if they are edited several
+        times before being drained) and drain it after the current transaction
+        is committed
+        """
+        # Avoid circular import
+        from onadata.apps.viewer.tasks import drain_mongo_outbox
+
+        cls.objects.bulk_create(
+            [
+                cls(instance_id=instance_id, call_services=call_services)
+                for instance_id in instance_ids
+            ],
+            ignore_conflicts=True,
+        )
+        transaction.on_commit(lambda: drain_mongo_outbox.delay())
+
+    @classmethod
+    def drain(cls, batch_size):
+        """
+        Write all submissions of the outbox to Mongo, `batch_size` at a time,
+        with a single `bulk_write()` per batch.
+
+        If a batch fails, its submissions are written one at a time, so that
+        one which cannot be written does not hold back the others. Its
+        attempts and last error are recorded, and it is left out once it has
+        failed `settings.MONGO_OUTBOX_MAX_ATTEMPTS` times.
+
+        Returns the number of submissions written.
+        """
+        total = 0
+        # Retried by the next drain, not in a loop by this one
+        failed_ids = set()
+        while True:
+            with transaction.atomic():
+                # Let concurrent workers drain other rows
+                entries = list(
+                    cls.objects.select_for_update(skip_locked=True)
+                    .filter(attempts__lt=settings.MONGO_OUTBOX_MAX_ATTEMPTS)
+                    .exclude(pk__in=failed_ids)
+                    .order_by('pk')[:batch_size]
+                )
+                if not entries:
+                    return total
+
+                try:
+                    with transaction.atomic():
+                        parsed_instances, synced_ids = cls._write(entries)
+                except Exception as e:
+                    if _is_mongo_unavailable(e):
+                        # Not the submissions' fault: keep them as they are
+                        raise
+                    logging.warning(
+                        'Failed to drain Mongo outbox batch, retrying its '
+                        'submissions one at a time',
+                        exc_info=True,
+                    )
+                    parsed_instances = []
+                    synced_ids = set()
+                    for entry in entries:
+                        try:
+                            with transaction.atomic():
+                                entry_result = cls._write([entry])
+                        except Exception as e:
+                            if _is_mongo_unavailable(e):
+                                raise
+                            failed_ids.add(entry.pk)
+                            cls.objects.filter(pk=entry.pk).update(
+                                attempts=F('attempts') + 1,
+                                last_error=repr(e),
+                            )
+                        else:
+                            parsed_instances.extend(entry_result[0])
+                            synced_ids.update(entry_result[1])
+
+            call_services_ids = {
+                e.instance_id for e in entries if e.call_services
+            }
+            for parsed_instance in parsed_instances:
+                if (
+                    parsed_instance.instance_id in synced_ids
+                    and parsed_instance.instance_id in call_services_ids
+                ):
+                    call_service(parsed_instance)
+
+            total += len(synced_ids)
+
+    @classmethod
+    def _write(cls, entries):
+        """
+        Write the submissions of `entries` to Mongo and remove them from the
+        outbox. Returns their `ParsedInstance`s and the ids of the synced
+        submissions.
+        """
+        # Avoid circular import
+        from onadata.apps.viewer.models.parsed_instance import ParsedInstance
+
+        parsed_instances = list(
+            ParsedInstance.objects.filter(
+                instance_id__in=[e.instance_id for e in entries]
+            ).select_related('instance__xform__user', 'instance__user')
+        )
+        # Marks the submissions as synced with one `UPDATE`. If Mongo fails,
+        # the transaction is rolled back and the rows are kept
+        synced_ids = set(ParsedInstance.bulk_update_mongo(parsed_instances))
+        cls.objects.filter(pk__in=[e.pk for e in entries]).delete()
+        return parsed_instances, synced_ids
+
+
+def _is_mongo_unavailable(error: Exception) -> bool:
+    # `ParsedInstance.bulk_update_mongo()` chains Mongo errors
+    return isinstance(error, ConnectionFailure) or isinstance(
+        error.__cause__, ConnectionFailure
+    )
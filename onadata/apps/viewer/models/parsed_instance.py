@@ -1,4 +1,5 @@
 # coding: utf-8
+import base64
 import json
 
 from bson import json_util
@@ -7,12 +8,14 @@ from django.conf import settings
 from django.db import models
 
 from django.utils.translation import gettext as t
+from pymongo import ReplaceOne
 from pymongo.errors import PyMongoError
 
 from onadata.celery import app
 from onadata.apps.api.mongo_helper import MongoHelper
 from onadata.apps.logger.models import Instance
 from onadata.apps.logger.models import Note
+from onadata.apps.viewer.models.mongo_outbox import MongoOutbox
 from onadata.apps.restservice.utils import call_service
 from onadata.libs.utils.common_tags import (
     ID,
@@ -67,6 +70,9 @@ class ParsedInstance(models.Model):
     STATUS = '_status'
     DEFAULT_LIMIT = 30000
     DEFAULT_BATCHSIZE = 1000
+    # Keys holding values of the same type in all records, which can be
+    # paged by keyset even if the client did not ask for it
+    KEYSET_SORT_KEYS = (ID, SUBMISSION_TIME)
 
     instance = models.OneToOneField(Instance, related_name="parsed_instance", on_delete=models.CASCADE)
     start_time = models.DateTimeField(null=True)
@@ -140,7 +146,12 @@ class ParsedInstance(models.Model):
     @apply_form_field_names
     def query_mongo_minimal(
             cls, query, fields, sort, start=0, limit=DEFAULT_LIMIT,
-            count=False):
+            count=False, after=None):
+        """
+        `after` switches to keyset pagination: records are returned from the
+        position encoded in the token (see `get_next_page_token()`), an empty
+        string meaning the first page, and `start` is ignored.
+        """
 
         query = cls._get_mongo_cursor_query(query)
 
@@ -153,8 +164,6 @@ class ParsedInstance(models.Model):
                 }
             ]
 
-        cursor = cls._get_mongo_cursor(query, fields)
-
         if isinstance(sort, str):
             sort = json.loads(sort, object_hook=json_util.object_hook)
         sort = sort if sort else {}
@@ -165,6 +174,13 @@ class ParsedInstance(models.Model):
         if limit > cls.DEFAULT_LIMIT:
             limit = cls.DEFAULT_LIMIT
 
+        if after is not None:
+            return cls._get_keyset_paginated_cursor(
+                query, fields, sort, after, limit
+            )
+
+        cursor = cls._get_mongo_cursor(query, fields)
+
         return cls._get_paginated_and_sorted_cursor(cursor, start, limit, sort)
 
     @classmethod
@@ -203,8 +219,11 @@ class ParsedInstance(models.Model):
         # TODO: current mongo (3.4 of this writing)
         # cannot mix including and excluding fields in a single query
         if type(fields) == list and len(fields) > 0:
-            fields_to_select = dict(
-                [(MongoHelper.encode(field), 1) for field in fields])
+            # Nested reserved attributes, e.g. `_validation_status.uid`, are
+            # kept dotted
+            fields_to_select = MongoHelper.to_safe_dict(
+                dict([(field, 1) for field in fields]), reading=True
+            )
 
         return xform_instances.find(
             query,
@@ -257,6 +276,112 @@ class ParsedInstance(models.Model):
         cursor.batch_size = cls.DEFAULT_BATCHSIZE
         return cursor
 
+    @classmethod
+    def get_next_page_token(cls, record, sort):
+        """
+        Return the token of the page following `record` (a raw Mongo record,
+        i.e. not passed to `MongoHelper.to_readable_dict()`), to be passed as
+        `after` to `query_mongo_minimal()`
+        """
+        sort_key, _ = cls._get_keyset_sort(sort)
+        position = [record['_id']]
+        if sort_key != ID:
+            # Nested reserved attributes are dotted paths in the record
+            value = record
+            for part in sort_key.split('.'):
+                value = value.get(part) if isinstance(value, dict) else None
+            position.insert(0, value)
+        return base64.urlsafe_b64encode(
+            json_util.dumps(position).encode()
+        ).decode()
+
+    @classmethod
+    def _get_keyset_paginated_cursor(cls, query, fields, sort, after, limit):
+        """
+        Page on `_id`, or on (`<sort key>`, `_id`) when `sort` is set. Unlike
+        `skip()`, which scans every skipped record, it seeks directly to the
+        page with the index.
+
+        `$gt`/`$lt` only match values of the same BSON type as the last sort
+        value: records whose sort key has another type are skipped.
+        """
+        sort_key, sort_dir = cls._get_keyset_sort(sort)
+        operator = '$gt' if sort_dir == 1 else '$lt'
+
+        if after:
+            try:
+                position = json_util.loads(
+                    base64.urlsafe_b64decode(after).decode()
+                )
+            except (ValueError, TypeError) as e:
+                raise ValueError(t('Invalid `after` token')) from e
+
+            if sort_key == ID:
+                (last_id,) = position
+                keyset_query = {ID: {operator: last_id}}
+            else:
+                last_value, last_id = position
+                keyset_query = {
+                    '$or': [{sort_key: last_value, ID: {operator: last_id}}]
+                }
+                # `null` cannot be compared with `$gt`/`$lt`. Missing values
+                # come first in ascending order, and last in descending order
+                if last_value is None:
+                    if sort_dir == 1:
+                        keyset_query['$or'].append({sort_key: {'$ne': None}})
+                else:
+                    keyset_query['$or'].append(
+                        {sort_key: {operator: last_value}}
+                    )
+                    if sort_dir == -1:
+                        keyset_query['$or'].append({sort_key: None})
+            query = {'$and': [query, keyset_query]}
+
+        if isinstance(fields, str):
+            fields = json.loads(fields, object_hook=json_util.object_hook)
+        if fields and sort_key != ID:
+            # The sort key is needed to build the token of the next page
+            fields = list(fields) + [sort_key]
+
+        cursor = cls._get_mongo_cursor(query, fields)
+        keyset_sort = [(ID, sort_dir)]
+        if sort_key != ID:
+            keyset_sort.insert(0, (sort_key, sort_dir))
+        cursor.sort(keyset_sort).limit(limit)
+        cursor.batch_size = cls.DEFAULT_BATCHSIZE
+        return cursor
+
+    @classmethod
+    def can_sort_by_keyset(cls, sort):
+        """
+        Return whether records sorted by `sort` can be paged by keyset without
+        leaving any out, i.e. `sort` is empty or one of `KEYSET_SORT_KEYS`
+        """
+        try:
+            sort_key, _ = cls._get_keyset_sort(sort)
+        except ValueError:
+            return False
+        return sort_key in cls.KEYSET_SORT_KEYS
+
+    @classmethod
+    def _get_keyset_sort(cls, sort):
+        """
+        Return the (encoded) key and direction of a one-key `sort`, and `_id`
+        ascending by default
+        """
+        if isinstance(sort, str):
+            sort = json.loads(sort, object_hook=json_util.object_hook)
+
+        if not sort:
+            return ID, 1
+
+        if type(sort) == dict and len(sort) == 1:
+            sort = MongoHelper.to_safe_dict(sort, reading=True)
+            sort_key = list(sort)[0]
+            return sort_key, int(sort[sort_key])
+
+        raise ValueError(t('`after` can only be used to sort on one key'))
+
     def to_dict_for_mongo(self):
         d = self.to_dict()
         data = {
@@ -281,8 +406,16 @@ class ParsedInstance(models.Model):
 
         return MongoHelper.to_safe_dict(d)
 
-    def update_mongo(self, asynchronous=True):
-        d = self.to_dict_for_mongo()
+    def update_mongo(self, asynchronous=True, mongo_document=None):
+        """
+        `mongo_document` is the result of `to_dict_for_mongo()`, if the caller
+        already has it
+        """
+        d = (
+            mongo_document
+            if mongo_document is not None
+            else self.to_dict_for_mongo()
+        )
         if d.get("_xform_id_string") is None:
             # if _xform_id_string, Instance could not be parsed.
             # so, we don't update mongo.
@@ -304,6 +437,43 @@ class ParsedInstance(models.Model):
 
         return True
 
+    @staticmethod
+    def bulk_update_mongo(parsed_instances):
+        """
+        Synchronously upsert the Mongo documents of `parsed_instances` with a
+        single `bulk_write()`, like `update_mongo(asynchronous=False)` does for
+        one `ParsedInstance`.
+
+        Returns the primary keys of the synced instances.
+        """
+        records = []
+        for parsed_instance in parsed_instances:
+            d = parsed_instance.to_dict_for_mongo()
+            # See `update_mongo()`
+            if d.get('_xform_id_string') is not None:
+                records.append(d)
+
+        if not records:
+            return []
+
+        try:
+            xform_instances.bulk_write(
+                [
+                    ReplaceOne({'_id': record['_id']}, record, upsert=True)
+                    for record in records
+                ],
+                ordered=False,
+            )
+        except PyMongoError as e:
+            raise Exception('Submissions could not be saved to Mongo') from e
+
+        synced_ids = [record['_id'] for record in records]
+        Instance.objects.filter(
+            pk__in=synced_ids, is_synced_with_mongo=False
+        ).update(is_synced_with_mongo=True)
+
+        return synced_ids
+
     @staticmethod
     def bulk_update_validation_statuses(query, validation_status):
         return xform_instances.update_many(
@@ -367,12 +537,20 @@ class ParsedInstance(models.Model):
         self._set_geopoint()
         super().save(*args, **kwargs)
 
+        if settings.MONGO_OUTBOX_ENABLED:
+            # Mongo is updated (and Rest Services are called) by a worker, once
+            # the transaction is committed
+            MongoOutbox.enqueue([self.instance_id], call_services=created)
+            return True
+
         # insert into Mongo.
         # Signal has been removed because of a race condition.
         # Rest Services were called before data was saved in DB.
-        success = self.update_mongo(asynchronous)
+        # Built once, for Mongo and for the rest services
+        mongo_document = self.to_dict_for_mongo()
+        success = self.update_mongo(asynchronous, mongo_document)
         if success and created:
-            call_service(self)
+            call_service(self, mongo_document)
         return success
 
     def add_note(self, note):
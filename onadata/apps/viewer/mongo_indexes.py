@@ -0,0 +1,123 @@
+# coding: utf-8
+"""
+Indexes of the Mongo collection of submissions.
+
+Every query on the collection is restricted to one form with `_userform_id`,
+which is why it comes first in each index. The other keys match the sorts
+and filters of the data API, e.g. `DataListSerializer` (sort by `_id` or
+`_submission_time`, keyset pagination) and `DataViewSet.__build_db_queries()`
+(filters on `_id`, `_uuid`, `_validation_status.uid`).
+"""
+from django.conf import settings
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from onadata.libs.utils.common_tags import (
+    ID,
+    SUBMISSION_TIME,
+    USERFORM_ID,
+    UUID,
+    VALIDATION_STATUS,
+)
+
+# `background` is ignored since MongoDB 4.2, where index builds do not lock
+# the collection anymore
+REQUIRED_INDEXES = [
+    IndexModel(
+        [(USERFORM_ID, ASCENDING), (ID, ASCENDING)],
+        name='userform_id_id',
+        background=True,
+    ),
+    IndexModel(
+        [
+            (USERFORM_ID, ASCENDING),
+            (SUBMISSION_TIME, ASCENDING),
+            (ID, ASCENDING),
+        ],
+        name='userform_id_submission_time_id',
+        background=True,
+    ),
+    IndexModel(
+        [(USERFORM_ID, ASCENDING), (UUID, ASCENDING)],
+        name='userform_id_uuid',
+        background=True,
+    ),
+    IndexModel(
+        [(USERFORM_ID, ASCENDING), (f'{VALIDATION_STATUS}.uid', ASCENDING)],
+        name='userform_id_validation_status_uid',
+        background=True,
+    ),
+]
+
+# Index Mongo always creates on `_id`
+DEFAULT_INDEX_NAME = '_id_'
+
+
+def get_collection():
+    return settings.MONGO_DB.instances
+
+
+def get_index_report(include_usage: bool = True) -> dict:
+    """
+    Compare the indexes of the collection with `REQUIRED_INDEXES`.
+
+    Return a dict with:
+        - `missing`: names of required indexes which do not exist (or exist
+          with other keys)
+        - `extra`: names of existing indexes which are not required
+        - `usage`: number of operations which used each existing index since
+          the server started, according to `$indexStats`, or `None` if it is
+          not available or `include_usage` is `False`
+    """
+    collection = get_collection()
+    existing_indexes = {
+        name: [tuple(key) for key in info['key']]
+        for name, info in collection.index_information().items()
+    }
+    required_keys = {
+        index.document['name']: list(index.document['key'].items())
+        for index in REQUIRED_INDEXES
+    }
+
+    missing = [
+        name
+        for name, keys in required_keys.items()
+        if existing_indexes.get(name) != keys
+    ]
+    extra = [
+        name
+        for name in existing_indexes
+        if name not in required_keys and name != DEFAULT_INDEX_NAME
+    ]
+
+    usage = None
+    if include_usage:
+        try:
+            usage = {
+                stats['name']: stats['accesses']['ops']
+                for stats in collection.aggregate([{'$indexStats': {}}])
+            }
+        except (OperationFailure, NotImplementedError):
+            # Not allowed for this user, or not supported by the server
+            pass
+
+    return {
+        'missing': missing,
+        'extra': extra,
+        'usage': usage,
+    }
+
+
+def create_missing_indexes() -> list:
+    """
+    Build the required indexes which do not exist yet, without blocking
+    reads and writes on the collection. Return their names.
+    """
+    missing = get_index_report(include_usage=False)['missing']
+    indexes = [
+        index for index in REQUIRED_INDEXES
+        if index.document['name'] in missing
+    ]
+    if not indexes:
+        return []
+    return get_collection().create_indexes(indexes)
@@ -1,8 +1,13 @@
 # coding: utf-8
+import csv
+import json
+import math
+import shutil
 import time
 from collections import OrderedDict
 from itertools import chain
 
+from bson import json_util
 from django.conf import settings
 from pandas.core.frame import DataFrame
 
@@ -20,6 +25,10 @@ from pyxform.question import Question
 from onadata.apps.viewer.models.data_dictionary import DataDictionary
 from onadata.apps.viewer.models.parsed_instance import ParsedInstance
 from onadata.libs.exceptions import NoRecordsFoundError
+from onadata.libs.utils.decorators import (
+    get_decoded_record,
+    get_field_renames,
+)
 from onadata.libs.utils.common_tags import (
     ID,
     XFORM_ID_STRING,
@@ -503,6 +512,8 @@ class CSVDataFrameBuilder(AbstractDataFrameBuilder):
             username, id_string, filter_query, group_delimiter,
             split_select_multiples, binary_select_multiples)
         self.ordered_columns = OrderedDict()
+        self.layout = None
+        self.last_exported_id = None
 
     def _setup(self):
         super()._setup()
@@ -595,6 +606,10 @@ class CSVDataFrameBuilder(AbstractDataFrameBuilder):
                 ordered_columns[child.get_abbreviated_xpath()] = None
 
     def _format_for_dataframe(self, cursor):
+        self._add_ordered_columns_for_split_fields()
+        return [self._format_record(record) for record in cursor]
+
+    def _add_ordered_columns_for_split_fields(self):
         # TODO: check for and handle empty results
         # add ordered columns for select multiples
         if self.split_select_multiples:
@@ -606,51 +621,165 @@ class CSVDataFrameBuilder(AbstractDataFrameBuilder):
         for key in self.gps_fields:
             gps_xpaths = self.dd.get_additional_geopoint_xpaths(key)
             self.ordered_columns[key] = [key] + gps_xpaths
-        data = []
+
+    def _format_record(self, record):
+        """
+        Flatten `record` to a dict of columns. Columns of repeats are added to
+        `self.ordered_columns` as they are met.
+        """
+        # split select multiples
+        if self.split_select_multiples:
+            record = self._split_select_multiples(
+                record, self.select_multiples,
+                self.BINARY_SELECT_MULTIPLES)
+        # check for gps and split into components i.e. latitude, longitude,
+        # altitude, precision
+        self._split_gps_fields(record, self.gps_fields)
+        self._tag_edit_string(record)
+        flat_dict = {}
+        # re index repeats
+        for key, value in record.items():
+            reindexed = self._reindex(key, value, self.ordered_columns)
+            flat_dict.update(reindexed)
+
+        # if delimiter is different, replace within record as well
+        if self.group_delimiter != DEFAULT_GROUP_DELIMITER:
+            flat_dict = dict((self.group_delimiter.join(k.split('/')), v)
+                             for k, v in flat_dict.items())
+        return flat_dict
+
+    def _iter_records(self, fields=None, batch_size=None, after_id=None):
+        """
+        Iterate over the records matching `self.filter_query`, one at a time,
+        from a single cursor. If `after_id` is provided, only records with a
+        greater `_id` are returned, in `_id` order.
+        """
+        query = self.filter_query or {}
+        if isinstance(query, str):
+            query = json.loads(query, object_hook=json_util.object_hook)
+        query = dict(query)
+        query.update(
+            ParsedInstance.get_base_query(self.username, self.id_string)
+        )
+        if after_id is not None:
+            query[ID] = {'$gt': after_id}
+        cursor = ParsedInstance.query_mongo_no_paging(query, fields)
+        if after_id is not None:
+            cursor.sort(ID, 1)
+        if batch_size:
+            cursor.batch_size(batch_size)
+
+        renames = get_field_renames(self.dd.get_mongo_field_names_dict())
         for record in cursor:
-            # split select multiples
-            if self.split_select_multiples:
-                record = self._split_select_multiples(
-                    record, self.select_multiples,
-                    self.BINARY_SELECT_MULTIPLES)
-            # check for gps and split into components i.e. latitude, longitude,
-            # altitude, precision
-            self._split_gps_fields(record, self.gps_fields)
-            self._tag_edit_string(record)
-            flat_dict = {}
-            # re index repeats
-            for key, value in record.items():
-                reindexed = self._reindex(key, value, self.ordered_columns)
-                flat_dict.update(reindexed)
-
-            # if delimiter is different, replace within record as well
-            if self.group_delimiter != DEFAULT_GROUP_DELIMITER:
-                flat_dict = dict((self.group_delimiter.join(k.split('/')), v)
-                                 for k, v in flat_dict.items())
-            data.append(flat_dict)
-        return data
+            yield get_decoded_record(record, renames)
 
     def export_to(self, file_or_path, data_frame_max_size=30000):
-        from math import ceil
-        # get record count
-        record_count = self._query_mongo(query=self.filter_query, count=True)
+        """
+        Write the CSV export to `file_or_path`, streaming the records from
+        Mongo. Memory usage depends on the number of columns, not on the
+        number of records.
+
+        `data_frame_max_size` is the number of records fetched from Mongo at
+        a time.
+
+        Afterwards, `self.layout` and `self.last_exported_id` can be passed to
+        `append_to()` to add newer records to the file.
+        """
+        # raise `NoRecordsFoundError` if there is nothing to export
+        self._query_mongo(query=self.filter_query, count=True)
+
+        columns = self._build_columns(batch_size=data_frame_max_size)
+        self.last_exported_id = None
+
+        if hasattr(file_or_path, 'read'):
+            csv_file = file_or_path
+            close = False
+        else:
+            csv_file = open(file_or_path, 'w', newline='')
+            close = True
+
+        writer = self._get_csv_writer(csv_file)
+        writer.writerow(columns)
+        self.layout['num_rows'] = 0
+        self._write_rows(
+            writer, columns, self._iter_records(batch_size=data_frame_max_size)
+        )
+
+        if close:
+            csv_file.close()
+
+    def append_to(
+        self,
+        path,
+        previous_file,
+        layout,
+        after_id,
+        data_frame_max_size=30000,
+    ):
+        """
+        Write to `path` the content of `previous_file`, a CSV export written
+        with `layout`, followed by the records whose `_id` is greater than
+        `after_id`.
+
+        Return `False`, without writing anything, if the columns would not be
+        the same, e.g. because the form was modified or new records have more
+        repeats than previous ones.
+        """
+        if layout.get('options') != self._get_layout_options():
+            return False
+
+        columns = self._build_columns(
+            batch_size=data_frame_max_size,
+            after_id=after_id,
+            repeat_columns=layout['repeat_columns'],
+        )
+        if columns != layout['columns']:
+            return False
+
+        with open(path, 'wb') as csv_file:
+            shutil.copyfileobj(previous_file, csv_file)
+
+        with open(path, 'a', newline='') as csv_file:
+            self.layout['num_rows'] = layout['num_rows']
+            self.last_exported_id = after_id
+            self._write_rows(
+                self._get_csv_writer(csv_file),
+                columns,
+                self._iter_records(
+                    batch_size=data_frame_max_size, after_id=after_id
+                ),
+            )
+        return True
+
+    def _build_columns(self, batch_size, after_id=None, repeat_columns=None):
+        """
+        Return the columns of the export, and set `self.layout` accordingly.
 
+        `repeat_columns` are columns of repeats already known, e.g. from
+        a previous export, to which only the ones of the records newer than
+        `after_id` are added.
+        """
         self.ordered_columns = OrderedDict()
         self._build_ordered_columns(self.dd.survey, self.ordered_columns)
-
-        # pandas will only export 30k records in a dataframe to a csv
-        # - we need to create multiple 30k dataframes if required,
-        # we need to go through all the records though so that
-        # we can figure out the columns we need for repeats
-        datas = []
-        num_data_frames = \
-            int(ceil(float(record_count) / float(data_frame_max_size)))
-        for i in range(num_data_frames):
-            cursor = self._query_mongo(
-                self.filter_query, start=(i * data_frame_max_size),
-                limit=data_frame_max_size)
-            data = self._format_for_dataframe(cursor)
-            datas.append(data)
+        repeat_xpaths = [
+            xpath for xpath, cols in self.ordered_columns.items()
+            if cols is not None
+        ]
+        for xpath in repeat_xpaths:
+            self.ordered_columns[xpath] = list(
+                (repeat_columns or {}).get(xpath, [])
+            )
+        self._add_ordered_columns_for_split_fields()
+
+        # The header must be written first, but columns of repeats depend on
+        # the data, e.g. `children[3]/name` exists only if one submission has
+        # three children. Collect them with a first pass over the repeats
+        # only.
+        if repeat_xpaths:
+            for record in self._iter_records(
+                fields=repeat_xpaths, batch_size=batch_size, after_id=after_id
+            ):
+                self._format_record(record)
 
         columns = list(chain.from_iterable(
             [[xpath] if cols is None else cols
@@ -664,20 +793,44 @@ class CSVDataFrameBuilder(AbstractDataFrameBuilder):
         # add extra columns
         columns += [col for col in self.ADDITIONAL_COLUMNS]
 
-        header = True
-        if hasattr(file_or_path, 'read'):
-            csv_file = file_or_path
-            close = False
-        else:
-            csv_file = open(file_or_path, "w")
-            close = True
+        # remove columns we don't want
+        columns = [
+            col for col in columns if col not in self.IGNORED_COLUMNS
+        ]
+
+        self.layout = {
+            'columns': columns,
+            'repeat_columns': {
+                xpath: self.ordered_columns[xpath] for xpath in repeat_xpaths
+            },
+            'options': self._get_layout_options(),
+        }
+        return columns
 
-        for data in datas:
-            writer = CSVDataFrameWriter(data, columns)
-            writer.write_to_csv(csv_file, header=header)
-            header = False
-        if close:
-            csv_file.close()
+    def _get_csv_writer(self, csv_file):
+        # Match the output of `pandas.DataFrame.to_csv()`
+        return csv.writer(csv_file, lineterminator='\n')
+
+    def _get_layout_options(self):
+        return {
+            'group_delimiter': self.group_delimiter,
+            'split_select_multiples': self.split_select_multiples,
+            'binary_select_multiples': self.BINARY_SELECT_MULTIPLES,
+        }
+
+    def _write_rows(self, writer, columns, records):
+        na_rep = getattr(settings, 'NA_REP', NA_REP)
+        for record in records:
+            flat_dict = self._format_record(record)
+            writer.writerow([
+                _get_csv_value(flat_dict.get(column), na_rep)
+                for column in columns
+            ])
+            self.layout['num_rows'] += 1
+            if ID in flat_dict:
+                self.last_exported_id = max(
+                    self.last_exported_id or 0, flat_dict[ID]
+                )
 
 
 class XLSDataFrameWriter:
@@ -690,19 +843,7 @@ class XLSDataFrameWriter:
                                 index=index)
 
 
-class CSVDataFrameWriter:
-    def __init__(self, records, columns):
-        # TODO: if records is empty, raise a known exception
-        # catch it in the view and handle
-        assert(len(records) > 0)
-        self.dataframe = DataFrame(records, columns=columns)
-
-        # remove columns we don't want
-        for col in AbstractDataFrameBuilder.IGNORED_COLUMNS:
-            if col in self.dataframe.columns:
-                del(self.dataframe[col])
-
-    def write_to_csv(self, csv_file, header=True, index=False):
-        na_rep = getattr(settings, 'NA_REP', NA_REP)
-        self.dataframe.to_csv(csv_file, header=header, index=index,
-                              na_rep=na_rep, encoding='utf-8')
+def _get_csv_value(value, na_rep):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return na_rep
+    return value
@@ -5,7 +5,10 @@ from django.dispatch import receiver
 from guardian.shortcuts import assign_perm, get_perms_for_model
 
 from onadata.apps.logger.models import XForm
-from onadata.apps.viewer.models.data_dictionary import DataDictionary
+from onadata.apps.viewer.models.data_dictionary import (
+    DataDictionary,
+    invalidate_compiled_survey,
+)
 from onadata.apps.viewer.models.export import Export
 from onadata.apps.viewer.models.parsed_instance import ParsedInstance
 
@@ -24,6 +27,21 @@ def set_object_permissions(sender, instance=None, created=False, **kwargs):
             assign_perm(perm.codename, instance.user, instance)
 
 
+# `DataDictionary` is a proxy of `XForm`: signals are sent with the class of
+# the saved object as sender, so connect both
+for sender in (XForm, DataDictionary):
+    post_save.connect(
+        invalidate_compiled_survey,
+        sender=sender,
+        dispatch_uid=f'invalidate_compiled_survey_on_save_{sender.__name__}',
+    )
+    post_delete.connect(
+        invalidate_compiled_survey,
+        sender=sender,
+        dispatch_uid=f'invalidate_compiled_survey_on_delete_{sender.__name__}',
+    )
+
+
 @receiver(pre_delete, sender=ParsedInstance)
 def remove_from_mongo(sender, **kwargs):
     instance_id = kwargs.get('instance').instance.id
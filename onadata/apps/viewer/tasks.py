@@ -14,6 +14,7 @@ from django.core.mail import mail_admins
 
 from onadata.celery import app
 from onadata.apps.viewer.models.export import Export
+from onadata.apps.viewer.models.mongo_outbox import MongoOutbox
 from onadata.libs.exceptions import NoRecordsFoundError
 from onadata.libs.utils.export_tools import (
     generate_export,
@@ -39,7 +40,9 @@ def create_async_export(xform, export_type, query, force_xlsx, options=None):
         'export_id': export.id,
         'query': query,
     }
-    if export_type in [Export.XLS_EXPORT, Export.CSV_EXPORT]:
+    if export_type in [
+        Export.XLS_EXPORT, Export.CSV_EXPORT, Export.PARQUET_EXPORT
+    ]:
         if options and "group_delimiter" in options:
             arguments["group_delimiter"] = options["group_delimiter"]
         if options and "split_select_multiples" in options:
@@ -55,6 +58,9 @@ def create_async_export(xform, export_type, query, force_xlsx, options=None):
         elif export_type == Export.CSV_EXPORT:
             result = create_csv_export.apply_async(
                 (), arguments, countdown=10)
+        elif export_type == Export.PARQUET_EXPORT:
+            result = create_parquet_export.apply_async(
+                (), arguments, countdown=10)
         else:
             raise Export.ExportTypeError
     elif export_type == Export.ZIP_EXPORT:
@@ -154,6 +160,39 @@ def create_csv_export(username, id_string, export_id, query=None,
         return gen_export.id
 
 
+@app.task()
+def create_parquet_export(username, id_string, export_id, query=None,
+                          group_delimiter='/', split_select_multiples=True,
+                          binary_select_multiples=False):
+    # we re-query the db instead of passing model objects according to
+    # http://docs.celeryproject.org/en/latest/userguide/tasks.html#state
+    export = Export.objects.get(id=export_id)
+    try:
+        # Parquet files of all sections are archived together
+        gen_export = generate_export(
+            Export.PARQUET_EXPORT, 'zip', username, id_string, export_id,
+            query, group_delimiter, split_select_multiples,
+            binary_select_multiples)
+    except NoRecordsFoundError:
+        export.internal_status = Export.FAILED
+        export.save()
+    except Exception as e:
+        export.internal_status = Export.FAILED
+        export.save()
+        # mail admins
+        details = {
+            'export_id': export_id,
+            'username': username,
+            'id_string': id_string
+        }
+        report_exception("Parquet Export Exception: Export ID - "
+                         "%(export_id)s, /%(username)s/%(id_string)s"
+                         % details, e, sys.exc_info())
+        raise
+    else:
+        return gen_export.id
+
+
 @app.task()
 def create_kml_export(username, id_string, export_id, query=None):
     # we re-query the db instead of passing model objects according to
@@ -237,6 +276,12 @@ REMONGO_PATTERN = re.compile(r'Total # of records to remongo: -?[1-9]+',
                              re.IGNORECASE)
 
 
+@app.task()
+def drain_mongo_outbox():
+    """Write the submissions waiting in the Mongo outbox, in batches"""
+    MongoOutbox.drain(settings.MONGO_OUTBOX_BATCH_SIZE)
+
+
 @app.task()
 def email_mongo_sync_status():
     """Check the status of records in the mysql db versus mongodb, and, if
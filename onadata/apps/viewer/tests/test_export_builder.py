@@ -1,6 +1,7 @@
 # coding: utf-8
 import datetime
 import os
+from copy import deepcopy
 
 from django.conf import settings
 from django.core.files.temp import NamedTemporaryFile
@@ -12,6 +13,7 @@ from onadata.apps.main.tests.test_base import TestBase
 from onadata.apps.viewer.tests.export_helpers import viewer_fixture_path
 from onadata.libs.utils.export_tools import (
     dict_to_joined_export,
+    iter_prefetched,
     ExportBuilder)
 
 
@@ -471,6 +473,28 @@ class TestExportBuilder(TestBase):
             }
         self.assertEqual(new_row, expected_row)
 
+    def test_mongo_key_encoding_round_trip(self):
+        self.assertEqual(MongoHelper.encode('$tel.office'), 'JA==telLg==office')
+        self.assertEqual(MongoHelper.decode('JA==telLg==office'), '$tel.office')
+        # Only a leading `$` is encoded
+        self.assertEqual(MongoHelper.encode('price$'), 'price$')
+
+        record = {
+            'name': 'Abe',
+            '$in': [1, 2],
+            'tel': {'tel.office': '123-456-789'},
+        }
+        safe_record = MongoHelper.to_safe_dict(deepcopy(record))
+        self.assertEqual(
+            safe_record,
+            {
+                'name': 'Abe',
+                '$in': [1, 2],
+                'tel': {'telLg==office': '123-456-789'},
+            },
+        )
+        self.assertEqual(MongoHelper.to_readable_dict(safe_record), record)
+
     def test_generate_field_title(self):
         field_name = ExportBuilder.format_field_title("child/age", ".")
         expected_field_name = "child.age"
@@ -790,3 +814,17 @@ class TestExportBuilder(TestBase):
         converted_val = ExportBuilder.convert_type(val, 'date')
         self.assertIsInstance(converted_val, datetime.date)
         self.assertEqual(converted_val, expected_val)
+
+    def test_iter_prefetched(self):
+        records = list(range(10))
+        self.assertEqual(
+            list(iter_prefetched(iter(records), batch_size=3)), records
+        )
+        self.assertEqual(list(iter_prefetched(iter([]))), [])
+
+        def failing_cursor():
+            yield 1
+            raise ValueError('Cursor error')
+
+        with self.assertRaises(ValueError):
+            list(iter_prefetched(failing_cursor(), batch_size=1))
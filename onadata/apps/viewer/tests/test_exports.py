@@ -5,9 +5,13 @@ import json
 import os
 import io
 from time import sleep
+from zipfile import ZipFile
 
+import pyarrow as pa
+import pyarrow.parquet as pq
 import requests
 from django.conf import settings
+from django.core.files.base import File
 from django.core.files.storage import default_storage, FileSystemStorage
 from django.urls import reverse
 from django.utils.dateparse import parse_datetime
@@ -24,10 +28,11 @@ from onadata.apps.viewer.views import (
 from onadata.apps.viewer.xls_writer import XlsWriter
 from onadata.apps.viewer.models.export import Export
 from onadata.apps.viewer.models.parsed_instance import ParsedInstance
-from onadata.apps.logger.models import Instance
+from onadata.apps.logger.models import Attachment, Instance
 from onadata.apps.viewer.tasks import create_xls_export
 from onadata.libs.utils.export_tools import generate_export,\
-    increment_index_in_filename, dict_to_joined_export
+    increment_index_in_filename, dict_to_joined_export,\
+    generate_attachments_zip_export
 
 AMBULANCE_KEY = (
     'transport/available_transportation_types_to_referral_facility/ambulance'
@@ -80,6 +85,71 @@ class TestExports(TestBase):
                                  self.xform.id_string, existing_export.id)
         self.assertEqual(existing_export.id, export.id)
 
+    def test_parquet_export(self):
+        fixture_dir = os.path.join(
+            settings.ONADATA_DIR, 'apps', 'main', 'tests', 'fixtures',
+            'csv_export')
+        self._publish_xls_file_and_set_xform(
+            os.path.join(fixture_dir, 'tutorial_w_repeats.xls'))
+        self._make_submission(
+            os.path.join(fixture_dir, 'tutorial_w_repeats.xml'))
+        export = generate_export(Export.PARQUET_EXPORT, 'zip',
+                                 self.user.username, self.xform.id_string)
+        self.assertTrue(default_storage.exists(export.filepath))
+
+        with default_storage.open(export.filepath) as f:
+            zip_file = ZipFile(f)
+            self.assertEqual(
+                sorted(zip_file.namelist()),
+                ['children.parquet', 'tutorial_w_repeats.parquet'])
+            main_table = pq.read_table(
+                io.BytesIO(zip_file.read('tutorial_w_repeats.parquet')))
+            children_table = pq.read_table(
+                io.BytesIO(zip_file.read('children.parquet')))
+
+        self.assertEqual(main_table.num_rows, 1)
+        self.assertEqual(main_table.schema.field('age').type, pa.int64())
+        self.assertEqual(main_table.column('age').to_pylist(), [25])
+        self.assertEqual(main_table.column('_index').to_pylist(), [1])
+        self.assertEqual(children_table.num_rows, 2)
+        self.assertEqual(
+            children_table.column('children/childs_name').to_pylist(),
+            ['Tom', 'Dick'])
+        self.assertEqual(
+            children_table.column('_parent_index').to_pylist(), [1, 1])
+        self.assertEqual(
+            children_table.column('_parent_table_name').to_pylist(),
+            ['tutorial_w_repeats', 'tutorial_w_repeats'])
+
+    def test_attachments_zip_export(self):
+        self._publish_transportation_form_and_submit_instance()
+        media_file = os.path.join(
+            self.this_directory, 'fixtures', 'transportation', 'instances',
+            self.surveys[0], '1335783522563.jpg')
+        instance = Instance.objects.all()[0]
+        attachments = []
+        for _ in range(3):
+            with open(media_file, 'rb') as f:
+                attachments.append(Attachment.objects.create(
+                    instance=instance, media_file=File(f, media_file)))
+        # Missing files are skipped
+        default_storage.delete(attachments[1].media_file.name)
+
+        export = generate_attachments_zip_export(
+            Export.ZIP_EXPORT, 'zip', self.user.username,
+            self.xform.id_string)
+
+        with open(media_file, 'rb') as f:
+            content = f.read()
+        with default_storage.open(export.filepath) as f:
+            zip_file = ZipFile(f)
+            self.assertEqual(
+                zip_file.namelist(),
+                [attachments[0].media_file.name,
+                 attachments[2].media_file.name])
+            for name in zip_file.namelist():
+                self.assertEqual(zip_file.read(name), content)
+
     def test_delete_file_on_export_delete(self):
         self._publish_transportation_form()
         self._submit_transport_instance()
@@ -0,0 +1,36 @@
+# coding: utf-8
+from django.conf import settings
+
+from onadata.apps.main.tests.test_base import TestBase
+from onadata.apps.viewer.app import check_mongo_indexes
+from onadata.apps.viewer.mongo_indexes import (
+    REQUIRED_INDEXES,
+    create_missing_indexes,
+    get_index_report,
+)
+from onadata.libs.utils.common_tags import USERFORM_ID
+
+
+class TestMongoIndexes(TestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.instances = settings.MONGO_DB.instances
+        self.instances.drop_indexes()
+
+    def test_create_missing_indexes(self):
+        self.instances.create_index(USERFORM_ID)
+        required_names = [index.document['name'] for index in REQUIRED_INDEXES]
+
+        report = get_index_report(include_usage=False)
+        self.assertEqual(report['missing'], required_names)
+        self.assertEqual(report['extra'], [f'{USERFORM_ID}_1'])
+        self.assertEqual(len(check_mongo_indexes()), 1)
+
+        self.assertEqual(sorted(create_missing_indexes()), sorted(required_names))
+
+        report = get_index_report(include_usage=False)
+        self.assertEqual(report['missing'], [])
+        self.assertEqual(check_mongo_indexes(), [])
+        # Nothing left to create
+        self.assertEqual(create_missing_indexes(), [])
@@ -0,0 +1,85 @@
+# coding: utf-8
+from unittest.mock import patch
+
+from django.conf import settings
+from django.test import override_settings
+
+from onadata.apps.logger.models import Instance
+from onadata.apps.main.tests.test_base import TestBase
+from onadata.apps.viewer.models import MongoOutbox, ParsedInstance
+from onadata.libs.utils import common_tags
+
+
+class TestMongoOutbox(TestBase):
+
+    def setUp(self):
+        TestBase.setUp(self)
+        self.instances = settings.MONGO_DB.instances
+        self.instances.delete_many({})
+        self._publish_transportation_form()
+
+    def test_submission_is_written_to_mongo_by_drain(self):
+        with override_settings(MONGO_OUTBOX_ENABLED=True):
+            self._submit_transport_instance()
+
+        instance = Instance.objects.get(xform=self.xform)
+        self.assertTrue(
+            MongoOutbox.objects.filter(
+                instance=instance, call_services=True
+            ).exists()
+        )
+        self.assertEqual(self.instances.count_documents({}), 0)
+        self.assertFalse(instance.is_synced_with_mongo)
+
+        self.assertEqual(MongoOutbox.drain(batch_size=10), 1)
+
+        instance.refresh_from_db()
+        self.assertTrue(instance.is_synced_with_mongo)
+        self.assertFalse(MongoOutbox.objects.exists())
+        self.assertEqual(
+            self.instances.find_one({common_tags.ID: instance.pk}),
+            instance.parsed_instance.to_dict_for_mongo(),
+        )
+
+    @override_settings(MONGO_OUTBOX_MAX_ATTEMPTS=2)
+    def test_failing_submission_does_not_block_drain(self):
+        with override_settings(MONGO_OUTBOX_ENABLED=True):
+            self._submit_transport_instance(0)
+            self._submit_transport_instance(1)
+        bad_instance, good_instance = Instance.objects.filter(
+            xform=self.xform
+        ).order_by('pk')
+
+        to_dict_for_mongo = ParsedInstance.to_dict_for_mongo
+
+        def fail_for_bad_instance(parsed_instance):
+            if parsed_instance.instance_id == bad_instance.pk:
+                raise ValueError('Cannot serialize')
+            return to_dict_for_mongo(parsed_instance)
+
+        with patch.object(
+            ParsedInstance,
+            'to_dict_for_mongo',
+            autospec=True,
+            side_effect=fail_for_bad_instance,
+        ):
+            self.assertEqual(MongoOutbox.drain(batch_size=10), 1)
+            entry = MongoOutbox.objects.get()
+            self.assertEqual(entry.instance_id, bad_instance.pk)
+            self.assertEqual(entry.attempts, 1)
+            self.assertIn('Cannot serialize', entry.last_error)
+            self.assertEqual(
+                self.instances.count_documents(
+                    {common_tags.ID: good_instance.pk}
+                ),
+                1,
+            )
+
+            self.assertEqual(MongoOutbox.drain(batch_size=10), 0)
+            entry.refresh_from_db()
+            self.assertEqual(entry.attempts, 2)
+
+            # Left out once it has failed too many times
+            self.assertEqual(MongoOutbox.drain(batch_size=10), 0)
+            entry.refresh_from_db()
+            self.assertEqual(entry.attempts, 2)
@@ -34,7 +34,7 @@ def _execute_query(query, to_dict=True):
 
 def _get_fields_of_type(xform, types):
     k = []
-    dd = xform.data_dictionary()
+    dd = xform.data_dictionary(use_cache=True)
     survey_elements = flatten(
         [dd.get_survey_elements_of_type(t) for t in types])
 
@@ -27,12 +27,71 @@ class DataListSerializer(serializers.Serializer):
         fields = '__all__'
 
     def to_representation(self, obj):
-        request = self.context.get('request')
-
         if not isinstance(obj, XForm):
             return super().to_representation(obj)
 
-        query_params = (request and request.query_params) or {}
+        cursor = self._get_cursor(obj)
+
+        # if we want the count, we only need the first index of the list.
+        if self._query_params.get('count'):
+            return cursor[0]
+
+        records = list(cursor)
+        # A full page may be followed by others: let the view link the next
+        # one, which can be fetched by keyset (see `DataViewSet.list()`)
+        if records and len(records) == self._get_page_size():
+            self._set_next_page_token(records[-1])
+
+        return [MongoHelper.to_readable_dict(record) for record in records]
+
+    def iter_representation(self, obj):
+        """
+        Like `to_representation()`, but return an iterator over the records
+        instead of loading all of them in memory, to stream the response.
+
+        The cursor is created right away, so that invalid parameters are
+        reported before the response starts.
+        """
+        cursor = self._get_cursor(obj)
+
+        # Headers are sent before the first record: the token of the next
+        # page is read with a separate query, paged by keyset like the
+        # records, which only returns the last record of the page. Only
+        # `_id` and the sort key (added by the keyset cursor) are projected,
+        # so that the skipped records are read from the index (see
+        # `onadata.apps.viewer.mongo_indexes`) instead of being fetched.
+        if self._can_paginate():
+            peek_cursor = self._get_cursor(obj, fields=['_id'])
+            peek_cursor.skip(self._get_page_size() - 1).limit(1)
+            for record in peek_cursor:
+                self._set_next_page_token(record)
+
+        return (MongoHelper.to_readable_dict(record) for record in cursor)
+
+    @property
+    def _query_params(self):
+        request = self.context.get('request')
+        return (request and request.query_params) or {}
+
+    def _can_paginate(self) -> bool:
+        """
+        Whether records are paged by keyset, so that full pages can link to
+        the next one: when the client asked for it with `after`, or when the
+        sort allows it (see `ParsedInstance.can_sort_by_keyset()`). Other
+        sorts keep being paged with `start`.
+        """
+        query_params = self._query_params
+        return (
+            self.context.get('pagination') is not None
+            and not query_params.get('start')
+            and (
+                query_params.get('after') is not None
+                or ParsedInstance.can_sort_by_keyset(query_params.get('sort'))
+            )
+        )
+
+    def _get_cursor(self, obj, fields=None):
+        query_params = self._query_params
         query = {
             ParsedInstance.USERFORM_ID:
             '%s_%s' % (obj.user.username, obj.id_string)
@@ -40,6 +99,10 @@ class DataListSerializer(serializers.Serializer):
         limit = query_params.get('limit', False)
         start = query_params.get('start', False)
         count = query_params.get('count', False)
+        after = query_params.get('after')
+
+        if start and after is not None:
+            raise ParseError(t("`start` and `after` cannot be used together"))
 
         try:
             query.update(json.loads(query_params.get('query', '{}')))
@@ -49,7 +112,7 @@ class DataListSerializer(serializers.Serializer):
 
         query_kwargs = {
             'query': json.dumps(query),
-            'fields': query_params.get('fields'),
+            'fields': fields or query_params.get('fields'),
             'sort': query_params.get('sort')
         }
 
@@ -64,13 +127,33 @@ class DataListSerializer(serializers.Serializer):
             if start:
                 query_kwargs['start'] = int(start)
 
-        cursor = ParsedInstance.query_mongo_minimal(**query_kwargs)
+            if after is not None:
+                query_kwargs['after'] = after
+            elif self._can_paginate():
+                # A full page links to the next one, which is fetched by
+                # keyset: the first page must be sorted the same way, i.e.
+                # with `_id` to break ties, for them to follow each other
+                query_kwargs['after'] = ''
 
-        # if we want the count, we only need the first index of the list.
-        if count:
-            return cursor[0]
-        else:
-            return [MongoHelper.to_readable_dict(record) for record in cursor]
+        try:
+            return ParsedInstance.query_mongo_minimal(**query_kwargs)
+        except ValueError as e:
+            raise ParseError(str(e))
+
+    def _get_page_size(self) -> int:
+        limit = self._query_params.get('limit')
+        return min(
+            int(limit) if limit else ParsedInstance.DEFAULT_LIMIT,
+            ParsedInstance.DEFAULT_LIMIT,
+        )
+
+    def _set_next_page_token(self, last_record: dict):
+        if self._can_paginate():
+            self.context['pagination']['next'] = (
+                ParsedInstance.get_next_page_token(
+                    last_record, self._query_params.get('sort')
+                )
+            )
 
 
 class DataInstanceSerializer(serializers.Serializer):
@@ -13,6 +13,7 @@ from werkzeug.http import parse_options_header
 from onadata.apps.main.models.meta_data import MetaData
 from onadata.apps.logger.models import XForm
 from onadata.libs.constants import CAN_CHANGE_XFORM, CAN_VIEW_XFORM
+from onadata.libs.utils.http_client import get_session
 
 METADATA_TYPES = (
     ('data_license', t("Data License")),
@@ -148,7 +149,7 @@ class MetaDataSerializer(serializers.HyperlinkedModelSerializer):
                     # `stream=True` makes `requests` to not download the whole
                     # file until `response.content` is called.
                     # Useful to get 'Content-Disposition' header.
-                    response = requests.get(data_value, stream=True)
+                    response = get_session().get(data_value, stream=True)
                     response.raise_for_status()
                 except requests.exceptions.RequestException:
                     response.close()
@@ -2,15 +2,27 @@
 import json
 import os
 
+from django.db.models import Manager
 from rest_framework import serializers
 from rest_framework.reverse import reverse
 
+from onadata.apps.logger.counters import prefetch_pending_xform_counters
 from onadata.apps.logger.models import XForm
 from onadata.libs.permissions import get_object_users_with_permissions
 from onadata.libs.serializers.fields.boolean_field import BooleanField
 from onadata.libs.serializers.tag_list_serializer import TagListSerializer
 from onadata.libs.serializers.metadata_serializer import MetaDataSerializer
 from onadata.libs.utils.decorators import check_obj
+from onadata.libs.utils.xml import get_xml_with_disclaimer_hash
+
+
+class XFormListWithCountersSerializer(serializers.ListSerializer):
+
+    def to_representation(self, data):
+        xforms = list(data.all() if isinstance(data, Manager) else data)
+        # One round trip to Redis for the whole page, instead of one per form
+        prefetch_pending_xform_counters(xforms)
+        return super().to_representation(xforms)
 
 
 class XFormSerializer(serializers.HyperlinkedModelSerializer):
@@ -31,6 +43,7 @@ class XFormSerializer(serializers.HyperlinkedModelSerializer):
 
     class Meta:
         model = XForm
+        list_serializer_class = XFormListWithCountersSerializer
 
         read_only_fields = (
             'json',
@@ -83,6 +96,20 @@ class XFormSerializer(serializers.HyperlinkedModelSerializer):
             data['attachment_storage_bytes'] = 0
         return data
 
+    def to_representation(self, obj):
+        data = super().to_representation(obj)
+        # Include the counters not yet flushed to the database
+        pending_count, pending_storage_bytes = obj.get_pending_counters()
+        if pending_count and 'num_of_submissions' in data:
+            data['num_of_submissions'] = (
+                data['num_of_submissions'] or 0
+            ) + pending_count
+        if pending_storage_bytes and 'attachment_storage_bytes' in data:
+            data['attachment_storage_bytes'] = (
+                data['attachment_storage_bytes'] or 0
+            ) + pending_storage_bytes
+        return data
+
     def get_xform_permissions(self, obj):
         return get_object_users_with_permissions(obj, serializable=True)
 
@@ -133,7 +160,10 @@ class XFormListSerializer(serializers.Serializer):
 
     @check_obj
     def get_hash(self, obj):
-        return f'md5:{obj.md5_hash_with_disclaimer}'
+        # Hashes are computed beforehand by `XFormListApi.list()` for its ETag
+        if not (md5_hash := self.context.get('hashes', {}).get(obj.pk)):
+            md5_hash = get_xml_with_disclaimer_hash(obj)
+        return f'md5:{md5_hash}'
 
     @check_obj
     def get_url(self, obj):
@@ -9,6 +9,7 @@ from urllib.parse import urljoin
 from xml.parsers.expat import ExpatError
 
 import requests
+from django.conf import settings
 from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
 from django.core.files.uploadedfile import InMemoryUploadedFile
@@ -16,7 +17,7 @@ from requests.auth import HTTPDigestAuth
 
 from onadata.apps.logger.xform_instance_parser import clean_and_parse_xml
 from onadata.libs.utils.logger_tools import publish_xml_form, publish_form, \
-    create_instance
+    bulk_create_instances
 
 NUM_RETRIES = 3
 
@@ -288,14 +289,13 @@ class BriefcaseClient:
         k = PublishXForm(xml_file, self.user)
         return publish_form(k.publish_xform)
 
-    def _upload_instance(self, xml_file, instance_dir_path, files):
+    def _prepare_instance(self, xml_file, instance_dir_path, files):
         xml_doc = clean_and_parse_xml(xml_file.read())
         xml = StringIO()
         de_node = xml_doc.documentElement
         for node in de_node.firstChild.childNodes:
             xml.write(node.toxml())
-        new_xml_file = ContentFile(xml.getvalue())
-        new_xml_file.content_type = 'text/xml'
+        new_xml = xml.getvalue()
         xml.close()
         attachments = []
 
@@ -309,10 +309,21 @@ class BriefcaseClient:
                 media_obj = django_file(file_obj, 'media_files[]', mimetype)
                 attachments.append(media_obj)
 
-        create_instance(self.user.username, new_xml_file, attachments)
+        return new_xml, attachments
+
+    def _upload_batch(self, submissions):
+        try:
+            results = bulk_create_instances(self.user.username, submissions)
+        finally:
+            for _, attachments in submissions:
+                for attachment in attachments:
+                    attachment.close()
+
+        return len([instance for error, instance in results if instance])
 
     def _upload_instances(self, path):
         instances_count = 0
+        submissions = []
         dirs, not_in_use = default_storage.listdir(path)
 
         for instance_dir in dirs:
@@ -327,13 +338,18 @@ class BriefcaseClient:
 
             if xml_file:
                 try:
-                    self._upload_instance(xml_file, instance_dir_path, files)
-                except ExpatError:
-                    continue
+                    submissions.append(self._prepare_instance(
+                        xml_file, instance_dir_path, files))
                 except Exception:
-                    pass
-                else:
-                    instances_count += 1
+                    # e.g. `ExpatError`; skip malformed submissions
+                    continue
+
+            if len(submissions) >= settings.BULK_SUBMISSION_BATCH_SIZE:
+                instances_count += self._upload_batch(submissions)
+                submissions = []
+
+        if submissions:
+            instances_count += self._upload_batch(submissions)
 
         return instances_count
 
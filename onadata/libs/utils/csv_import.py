@@ -6,13 +6,17 @@ import uuid
 from datetime import datetime
 from typing import TextIO, Union
 
+from django.conf import settings
 from django.core.files.uploadedfile import InMemoryUploadedFile
 
 from onadata.apps.logger.models import Instance
-from onadata.libs.utils.logger_tools import dict2xml, safe_create_instance
+from onadata.libs.utils.logger_tools import (
+    bulk_create_xform_instances,
+    dict2xml,
+)
 
 
-def get_submission_meta_dict(xform, instance_id):
+def get_submission_meta_dict(xform, instance_id, existing_uuids=None):
     """Generates metadata for our submission
 
     Checks if `instance_id` belongs to an existing submission.
@@ -21,6 +25,9 @@ def get_submission_meta_dict(xform, instance_id):
 
     :param onadata.apps.logger.models.XForm xform: The submission's XForm.
     :param string instance_id: The submission/instance `uuid`.
+    :param set existing_uuids: Optional `uuid`s of existing submissions,
+        already looked up for a batch of rows, to avoid querying the
+        database.
 
     :return: The metadata dict
     :rtype:  dict
@@ -30,7 +37,12 @@ def get_submission_meta_dict(xform, instance_id):
 
     update = 0
 
-    if xform.instances.filter(uuid=instance_id).count() > 0:
+    if existing_uuids is not None:
+        exists = instance_id in existing_uuids
+    else:
+        exists = xform.instances.filter(uuid=instance_id).exists()
+
+    if exists:
         uuid_arg = 'uuid:{}'.format(uuid.uuid4())
         meta.update({'instanceID': uuid_arg,
                      'deprecatedID': 'uuid:{}'.format(instance_id)})
@@ -66,8 +78,9 @@ def submit_csv(
     """ Imports CSV data to an existing form
 
     Takes a csv formatted file or string containing rows of submission/instance
-    and converts those to xml submissions and finally submits them by calling
-    :py:func:`onadata.libs.utils.logger_tools.safe_create_instance`
+    and converts those to xml submissions and finally submits them in batches
+    by calling
+    :py:func:`onadata.libs.utils.logger_tools.bulk_create_xform_instances`
 
     """
 
@@ -89,9 +102,58 @@ def submit_csv(
     rollback_uuids = []
     submission_time = datetime.utcnow().isoformat()
     ona_uuid = {'formhub': {'uuid': xform.uuid}}
-    error = None
     additions = inserts = 0
+
+    rows = []
     for row in csv_reader:
+        rows.append(row)
+        if len(rows) >= settings.BULK_SUBMISSION_BATCH_SIZE:
+            error, batch_additions, batch_inserts = _submit_csv_rows(
+                request, xform, rows, rollback_uuids, submission_time, ona_uuid
+            )
+            if error:
+                break
+            additions += batch_additions
+            inserts += batch_inserts
+            rows = []
+    else:
+        error, batch_additions, batch_inserts = _submit_csv_rows(
+            request, xform, rows, rollback_uuids, submission_time, ona_uuid
+        )
+        additions += batch_additions
+        inserts += batch_inserts
+
+    if error:
+        Instance.objects.filter(uuid__in=rollback_uuids,
+                                xform=xform).delete()
+        return {'error': str(error)}
+
+    return {'additions': additions - inserts, 'updates': inserts}
+
+
+def _submit_csv_rows(
+    request, xform, rows, rollback_uuids, submission_time, ona_uuid
+):
+    """
+    Submit a batch of CSV rows at once with
+    :py:func:`onadata.libs.utils.logger_tools.bulk_create_xform_instances`
+
+    :return: The first error, if any, the number of saved rows and the number
+        of edits among them
+    """
+    if not rows:
+        return None, 0, 0
+
+    # Look up edits with one query per batch
+    existing_uuids = set(
+        xform.instances.filter(
+            uuid__in=[row.get('_uuid') for row in rows if row.get('_uuid')]
+        ).values_list('uuid', flat=True)
+    )
+
+    submissions = []
+    inserts = 0
+    for row in rows:
         # fetch submission uuid before purging row metadata
         row_uuid = row.get('_uuid')
         submission_date = row.get('_submission_time', submission_time)
@@ -111,7 +173,9 @@ def submit_csv(
         row.update(ona_uuid)
 
         old_meta = row.get('meta', {})
-        new_meta, update = get_submission_meta_dict(xform, row_uuid)
+        new_meta, update = get_submission_meta_dict(
+            xform, row_uuid, existing_uuids
+        )
         inserts += update
         old_meta.update(new_meta)
         row.update({'meta': old_meta})
@@ -119,21 +183,15 @@ def submit_csv(
         row_uuid = row.get('meta').get('instanceID')
         rollback_uuids.append(row_uuid.replace('uuid:', ''))
 
-        xml_file = io.StringIO(
-            dict2xmlsubmission(row, xform, row_uuid, submission_date))
-
-        try:
-            error, instance = safe_create_instance(
-                request.user.username, xml_file, [], xform.uuid, request
-            )
-        except ValueError as e:
-            error = e
+        submissions.append(
+            (dict2xmlsubmission(row, xform, row_uuid, submission_date), [])
+        )
 
+    results = bulk_create_xform_instances(
+        xform, submissions, request=request
+    )
+    for error, instance in results:
         if error:
-            Instance.objects.filter(uuid__in=rollback_uuids,
-                                    xform=xform).delete()
-            return {'error': str(error)}
-        else:
-            additions += 1
+            return error, 0, 0
 
-    return {'additions': additions - inserts, 'updates': inserts}
+    return None, len(results), inserts
@@ -1,8 +1,6 @@
 # coding: utf-8
 from functools import wraps
 
-from onadata.apps.logger.models import XForm
-
 
 def check_obj(f):
     @wraps(f)
@@ -16,34 +14,53 @@ def check_obj(f):
 def apply_form_field_names(func):
     @wraps(func)
     def wrapper(*args, **kwargs):
-        def _get_decoded_record(record):
-            if isinstance(record, dict):
-                # Avoid RuntimeError: dictionary keys changed during iteration
-                record_iter = dict(record)
-                for field in record_iter:
-                    if isinstance(record[field], list):
-                        tmp_items = []
-                        items = record[field]
-                        for item in items:
-                            tmp_items.append(_get_decoded_record(item))
-                        record[field] = tmp_items
-                    if field not in field_names.values() and \
-                            field in field_names.keys():
-                        record[field_names[field]] = record.pop(field)
-            return record
-
         cursor = func(*args, **kwargs)
         # Compare by class name instead of type because tests use MockMongo
         if cursor.__class__.__name__ == 'Cursor' and 'id_string' in kwargs and \
                 'username' in kwargs:
-            username = kwargs.get('username')
-            id_string = kwargs.get('id_string')
-            dd = XForm.objects.get(
-                id_string=id_string, user__username=username)
-            records = []
-            field_names = dd.data_dictionary().get_mongo_field_names_dict()
-            for record in cursor:
-                records.append(_get_decoded_record(record))
-            return records
+            # Avoid circular import
+            from onadata.apps.viewer.models.data_dictionary import (
+                get_mongo_field_renames,
+            )
+
+            renames = get_mongo_field_renames(
+                kwargs.get('username'), kwargs.get('id_string')
+            )
+            return [get_decoded_record(record, renames) for record in cursor]
         return cursor
     return wrapper
+
+
+def get_field_renames(field_names):
+    """
+    Return the renames to pass to `get_decoded_record()`, given the Mongo
+    encoded names of the form fields (see
+    `DataDictionary.get_mongo_field_names_dict()`). Encoded names which are
+    also the name of another field are left alone.
+    """
+    xpaths = set(field_names.values())
+    return {
+        encoded_name: xpath
+        for encoded_name, xpath in field_names.items()
+        if encoded_name not in xpaths
+    }
+
+
+def get_decoded_record(record, renames):
+    """
+    Rename (in place) the Mongo encoded fields of `record`, and of its
+    repeats, to the names of the form fields. `renames` comes from
+    `get_field_renames()`.
+    """
+    if not renames or not isinstance(record, dict):
+        # Most forms do not have any encoded field names
+        return record
+
+    for field, value in list(record.items()):
+        if isinstance(value, list):
+            for item in value:
+                get_decoded_record(item, renames)
+        xpath = renames.get(field)
+        if xpath is not None:
+            record[xpath] = record.pop(field)
+    return record
@@ -1,8 +1,12 @@
 # coding: utf-8
 import json
 import os
+import queue
 import re
+import threading
 from datetime import datetime, date, time, timedelta
+from tempfile import TemporaryDirectory
+from zipfile import ZipFile, ZIP_STORED
 
 from bson import json_util
 from django.conf import settings
@@ -47,6 +51,11 @@ QUESTION_TYPES_TO_EXCLUDE = [
     'note',
 ]
 GEOPOINT_BIND_TYPE = "geopoint"
+# Rows of each table written at once to Parquet exports
+PARQUET_ROW_GROUP_SIZE = 10000
+# Records read from Mongo ahead of the export writer
+PREFETCH_BATCH_SIZE = 1000
+PREFETCH_MAX_BATCHES = 4
 
 
 def to_str(row, key, encode_dates=False, empty_on_none=True):
@@ -485,10 +494,142 @@ class ExportBuilder:
             ws = work_sheets[section_name]
             ws.append(headers)
 
+        # fields of each section do not change from one record to another
+        section_fields = {
+            section['name']: (
+                work_sheets[section['name']],
+                [element['xpath'] for element in section['elements']]
+                + self.EXTRA_FIELDS,
+            )
+            for section in self.sections
+        }
+
+        for section, row in self._iter_section_rows(data):
+            ws, fields = section_fields[section['name']]
+            write_row(row, ws, fields, work_sheet_titles)
+
+        wb.save(filename=path)
+
+    def to_parquet_export(self, path, data, *args):
+        """
+        Write a ZIP archive of Parquet files to `path`, one per section, i.e.
+        the main table and one table per repeat, linked by `_index` and
+        `_parent_index`.
+
+        Columns are typed after the survey bind types (see `convert_type()`),
+        and rows are written by groups of `PARQUET_ROW_GROUP_SIZE`.
+        """
+        # Only needed by this export: do not load it in every process
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        arrow_types = {
+            'int': pa.int64(),
+            'decimal': pa.float64(),
+            'date': pa.date32(),
+        }
+        extra_field_types = {
+            ID: pa.int64(),
+            INDEX: pa.int64(),
+            PARENT_INDEX: pa.int64(),
+        }
+        select_multiple_type = (
+            pa.int64() if self.BINARY_SELECT_MULTIPLES else pa.bool_()
+        )
+
+        table_names = {}
+        tables = {}
+        with TemporaryDirectory() as tmp_dir:
+            for section in self.sections:
+                section_name = section['name']
+                table_name = ExportBuilder.get_valid_table_name(
+                    section_name, list(table_names.values())
+                )
+                table_names[section_name] = table_name
+
+                choices = set()
+                for xpaths in self.select_multiples.get(
+                    section_name, {}
+                ).values():
+                    choices.update(xpaths)
+                fields = []
+                columns = []
+                for element in section['elements']:
+                    if element['xpath'] in choices:
+                        arrow_type = select_multiple_type
+                    else:
+                        arrow_type = arrow_types.get(
+                            element['type'], pa.string()
+                        )
+                    fields.append(pa.field(element['title'], arrow_type))
+                    columns.append(
+                        (element['xpath'], get_arrow_converter(arrow_type))
+                    )
+                for extra_field in self.EXTRA_FIELDS:
+                    arrow_type = extra_field_types.get(extra_field, pa.string())
+                    fields.append(pa.field(extra_field, arrow_type))
+                    columns.append(
+                        (extra_field, get_arrow_converter(arrow_type))
+                    )
+
+                schema = pa.schema(fields)
+                file_path = os.path.join(tmp_dir, f'{table_name}.parquet')
+                tables[section_name] = {
+                    'schema': schema,
+                    'columns': columns,
+                    'rows': [],
+                    'path': file_path,
+                    'writer': pq.ParquetWriter(file_path, schema),
+                }
+
+            def write_row_group(table):
+                table['writer'].write_table(
+                    pa.Table.from_arrays(
+                        [
+                            pa.array(
+                                [row[i] for row in table['rows']],
+                                type=field.type,
+                            )
+                            for i, field in enumerate(table['schema'])
+                        ],
+                        schema=table['schema'],
+                    )
+                )
+                table['rows'] = []
+
+            for section, row in self._iter_section_rows(data):
+                row[PARENT_TABLE_NAME] = table_names.get(
+                    row.get(PARENT_TABLE_NAME)
+                )
+                table = tables[section['name']]
+                table['rows'].append([
+                    convert(row.get(xpath))
+                    for xpath, convert in table['columns']
+                ])
+                if len(table['rows']) >= PARQUET_ROW_GROUP_SIZE:
+                    write_row_group(table)
+
+            with ZipFile(path, 'w') as zip_file:
+                for section_name, table in tables.items():
+                    if table['rows']:
+                        write_row_group(table)
+                    table['writer'].close()
+                    # Parquet files are already compressed
+                    zip_file.write(
+                        table['path'],
+                        os.path.basename(table['path']),
+                        compress_type=ZIP_STORED,
+                    )
+
+    def _iter_section_rows(self, data):
+        """
+        Yield `(section, row)` for each row of each section of the records in
+        `data`, ready to be exported
+        """
         index = 1
         indices = {}
         survey_name = self.survey.name
-        for d in data:
+        for d in iter_prefetched(data):
             joined_export = dict_to_joined_export(d, index, indices,
                                                   survey_name)
             output = ExportBuilder.decode_mongo_encoded_section_names(
@@ -500,30 +641,38 @@ class ExportBuilder:
             output[survey_name][INDEX] = index
             output[survey_name][PARENT_INDEX] = -1
             for section in self.sections:
-                # get data for this section and write to xls
-                section_name = section['name']
-                fields = [
-                    element['xpath'] for element in
-                    section['elements']] + self.EXTRA_FIELDS
-
-                ws = work_sheets[section_name]
                 # section might not exist within the output, e.g. data was
                 # not provided for said repeat - write test to check this
-                row = output.get(section_name, None)
+                row = output.get(section['name'], None)
                 if type(row) == dict:
-                    write_row(
-                        self.pre_process_row(row, section),
-                        ws, fields, work_sheet_titles)
+                    yield section, self.pre_process_row(row, section)
                 elif type(row) == list:
                     for child_row in row:
-                        write_row(
-                            self.pre_process_row(child_row, section),
-                            ws, fields, work_sheet_titles)
+                        yield section, self.pre_process_row(
+                            child_row, section
+                        )
             index += 1
 
-        wb.save(filename=path)
+    @classmethod
+    def get_valid_table_name(cls, section_name, existing_names):
+        table_name = '_'.join(section_name.split('/'))
+        generated_name = table_name
+        i = 1
+        while generated_name in existing_names:
+            generated_name = f'{table_name}{i}'
+            i += 1
+        return generated_name
+
+    def to_flat_csv_export(self, path, data, username, id_string, filter_query,
+                           previous_export=None):
+        """
+        Write the CSV export to `path`. If `previous_export` is provided, its
+        file is reused and only newer submissions are appended, unless its
+        columns do not match anymore.
 
-    def to_flat_csv_export(self, path, data, username, id_string, filter_query):
+        Return the `CSVDataFrameBuilder`, whose `layout` and
+        `last_exported_id` allow the next export to be incremental.
+        """
         # TODO resolve circular import
         from onadata.apps.viewer.pandas_mongo_bridge import CSVDataFrameBuilder
 
@@ -535,7 +684,46 @@ class ExportBuilder:
             self.SPLIT_SELECT_MULTIPLES,
             self.BINARY_SELECT_MULTIPLES,
         )
+        if previous_export is not None:
+            with default_storage.open(previous_export.filepath) as f:
+                if csv_builder.append_to(
+                    path,
+                    f,
+                    previous_export.layout,
+                    previous_export.last_exported_id,
+                ):
+                    return csv_builder
+
         csv_builder.export_to(path)
+        return csv_builder
+
+
+def get_arrow_converter(arrow_type):
+    """
+    Return a function converting values to the type expected by a column of
+    `arrow_type`, or to `None` if they cannot be, e.g. when `convert_type()`
+    failed to convert them
+    """
+    import pyarrow as pa
+
+    if arrow_type == pa.string():
+        return lambda value: None if value in (None, '') else str(value)
+    if arrow_type == pa.bool_():
+        return lambda value: value if isinstance(value, bool) else None
+    if arrow_type == pa.date32():
+        return lambda value: value if isinstance(value, date) else None
+
+    cast = int if arrow_type == pa.int64() else float
+
+    def _convert(value):
+        if value is None or value == '':
+            return None
+        try:
+            return cast(value)
+        except (TypeError, ValueError):
+            return None
+
+    return _convert
 
 
 def dict_to_flat_export(d, parent_index=0):
@@ -553,6 +741,7 @@ def generate_export(export_type, extension, username, id_string,
     export_type_func_map = {
         Export.XLS_EXPORT: 'to_xls_export',
         Export.CSV_EXPORT: 'to_flat_csv_export',
+        Export.PARQUET_EXPORT: 'to_parquet_export',
     }
 
     xform = XForm.objects.get(
@@ -565,15 +754,25 @@ def generate_export(export_type, extension, username, id_string,
     export_builder.GROUP_DELIMITER = group_delimiter
     export_builder.SPLIT_SELECT_MULTIPLES = split_select_multiples
     export_builder.BINARY_SELECT_MULTIPLES = binary_select_multiples
-    export_builder.set_survey(xform.data_dictionary().survey)
+    export_builder.set_survey(xform.data_dictionary(use_cache=True).survey)
 
     prefix = slugify('{}_export__{}__{}'.format(export_type, username, id_string))
     temp_file = NamedTemporaryFile(prefix=prefix, suffix=("." + extension))
 
     # get the export function by export type
     func = getattr(export_builder, export_type_func_map[export_type])
-    func.__call__(
-        temp_file.name, records, username, id_string, filter_query)
+    kwargs = {}
+    incremental = (
+        export_type == Export.CSV_EXPORT
+        and filter_query is None
+        and settings.INCREMENTAL_CSV_EXPORTS_ENABLED
+    )
+    if incremental:
+        kwargs['previous_export'] = get_incremental_base_export(
+            xform, export_id
+        )
+    csv_builder = func.__call__(
+        temp_file.name, records, username, id_string, filter_query, **kwargs)
 
     # generate filename
     basename = "%s_%s" % (
@@ -609,6 +808,9 @@ def generate_export(export_type, extension, username, id_string,
     export.filedir = dir_name
     export.filename = basename
     export.internal_status = Export.SUCCESSFUL
+    if incremental:
+        export.layout = csv_builder.layout
+        export.last_exported_id = csv_builder.last_exported_id
     # do not persist exports that have a filter
     if filter_query is None:
         export.save()
@@ -623,6 +825,107 @@ def query_mongo(username, id_string, query=None):
     return xform_instances.find(query, max_time_ms=settings.MONGO_DB_MAX_TIME_MS)
 
 
+def iter_prefetched(
+    records,
+    batch_size=PREFETCH_BATCH_SIZE,
+    max_batches=PREFETCH_MAX_BATCHES,
+):
+    """
+    Iterate over `records` (e.g. a Mongo cursor) while a thread reads the
+    next batches, so that fetching records overlaps with processing them.
+
+    At most `max_batches` batches of `batch_size` records are held in memory.
+    """
+    batches = queue.Queue(maxsize=max_batches)
+    stopped = threading.Event()
+    end = object()
+
+    def _put(item):
+        # Give up if the consumer stopped iterating, e.g. on error
+        while not stopped.is_set():
+            try:
+                batches.put(item, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _fetch():
+        try:
+            batch = []
+            for record in records:
+                batch.append(record)
+                if len(batch) == batch_size:
+                    if not _put(batch):
+                        return
+                    batch = []
+            if batch and not _put(batch):
+                return
+            _put(end)
+        except Exception as e:
+            _put(e)
+
+    fetcher = threading.Thread(target=_fetch, daemon=True)
+    fetcher.start()
+    try:
+        while True:
+            batch = batches.get()
+            if batch is end:
+                return
+            if isinstance(batch, Exception):
+                raise batch
+            yield from batch
+    finally:
+        stopped.set()
+        fetcher.join()
+
+
+def get_incremental_base_export(xform, export_id=None):
+    """
+    Return the latest CSV export of `xform` to which new submissions can be
+    appended, if any, i.e. whose submissions have not been modified nor
+    deleted since, and whose form has not been modified since.
+
+    Its file must also contain every submission up to its `last_exported_id`:
+    submissions may be saved to Mongo out of order, or deleted while
+    exporting.
+    """
+    try:
+        previous_export = (
+            Export.objects.filter(
+                xform=xform,
+                export_type=Export.CSV_EXPORT,
+                internal_status=Export.SUCCESSFUL,
+                last_exported_id__isnull=False,
+                layout__isnull=False,
+            )
+            .exclude(pk=export_id)
+            .latest('created_on')
+        )
+    except Export.DoesNotExist:
+        return None
+
+    if xform.date_modified >= previous_export.created_on:
+        return None
+
+    if Instance.objects.filter(
+        xform=xform,
+        pk__lte=previous_export.last_exported_id,
+        date_modified__gte=previous_export.created_on,
+    ).exists():
+        return None
+
+    if Instance.objects.filter(
+        xform=xform, pk__lte=previous_export.last_exported_id
+    ).count() != previous_export.layout['num_rows']:
+        return None
+
+    if not default_storage.exists(previous_export.filepath):
+        return None
+
+    return previous_export
+
+
 def should_create_new_export(xform, export_type):
     if (
         not Export.objects.filter(xform=xform, export_type=export_type).exists()
@@ -680,7 +983,7 @@ def generate_attachments_zip_export(
 
     with default_storage.open(absolute_filename, 'wb') as destination_file:
         create_attachments_zipfile(
-            attachments,
+            attachments.only('media_file').iterator(),
             output_file=destination_file,
         )
 
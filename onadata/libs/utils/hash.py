@@ -7,6 +7,8 @@ import requests
 from django.conf import settings
 from rest_framework import status
 
+from onadata.libs.utils.http_client import get_session
+
 
 def get_hash(source: Union[str, bytes, BinaryIO],
              algorithm: str = 'md5',
@@ -60,7 +62,9 @@ def get_hash(source: Union[str, bytes, BinaryIO],
             # It avoids making a second request to get the body
             # (i.e.: vs `requests.head()`).
             try:
-                response = requests.get(source, stream=True, headers=headers)
+                response = get_session().get(
+                    source, stream=True, headers=headers
+                )
                 response.raise_for_status()
             except requests.exceptions.RequestException:
                 # With `stream=True`, the connection is kept alive until it is
@@ -114,7 +118,9 @@ def get_hash(source: Union[str, bytes, BinaryIO],
                 range_ = f'0-{settings.HASH_BIG_FILE_CHUNK - 1}'
                 headers['Range'] = f'bytes={range_}'
                 try:
-                    response = requests.get(source, stream=True, headers=headers)
+                    response = get_session().get(
+                        source, stream=True, headers=headers
+                    )
                     response.raise_for_status()
                 except requests.exceptions.RequestException:
                     try:
@@ -137,7 +143,7 @@ def get_hash(source: Union[str, bytes, BinaryIO],
                 range_ = f'{range_lower_bound}-{range_upper_bound}'
                 headers['Range'] = f'bytes={range_}'
                 try:
-                    response = requests.get(source, headers=headers)
+                    response = get_session().get(source, headers=headers)
                     response.raise_for_status()
                 except requests.exceptions.RequestException:
                     return _prefix_hash(hex_digest=url_hash)
@@ -149,7 +155,7 @@ def get_hash(source: Union[str, bytes, BinaryIO],
                 range_ = f'{range_lower_bound}-{range_upper_bound}'
                 headers['Range'] = f'bytes={range_}'
                 try:
-                    response = requests.get(source, headers=headers)
+                    response = get_session().get(source, headers=headers)
                     response.raise_for_status()
                 except requests.exceptions.RequestException:
                     return _prefix_hash(hex_digest=url_hash)
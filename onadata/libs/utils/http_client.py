@@ -0,0 +1,89 @@
+# coding: utf-8
+"""
+Shared HTTP session for outbound requests (KPI, Enketo, remote media files).
+
+`requests.get()` and friends open a new connection, and do a new TLS
+handshake, for every call. The session returned by `get_session()` keeps
+connections alive in a per-process pool, applies a default timeout and
+retries requests which failed to connect or got a transient error.
+"""
+import os
+import threading
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+class PooledSession(requests.Session):
+
+    def __init__(self):
+        super().__init__()
+        # The session is shared by all the requests of the process: never
+        # send cookies received while serving one to another
+        self.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
+        retry = Retry(
+            total=settings.HTTP_CLIENT_MAX_RETRIES,
+            backoff_factor=settings.HTTP_CLIENT_RETRY_BACKOFF_FACTOR,
+            status_forcelist=(502, 503, 504),
+            # Do not retry requests which may have side effects, e.g. KPI
+            # hooks, unless they did not reach the server
+            allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=settings.HTTP_CLIENT_POOL_CONNECTIONS,
+            pool_maxsize=settings.HTTP_CLIENT_POOL_MAXSIZE,
+            max_retries=retry,
+        )
+        self.mount('http://', adapter)
+        self.mount('https://', adapter)
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', settings.HTTP_CLIENT_TIMEOUT)
+        return super().request(method, url, **kwargs)
+
+
+def get_session() -> PooledSession:
+    """
+    Return the HTTP session of the current process. A new one is created
+    after a fork, since connections cannot be shared between processes.
+    """
+    global _session, _session_pid
+
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _session_lock:
+            if _session is None or _session_pid != pid:
+                _session = PooledSession()
+                _session_pid = pid
+
+    return _session
+
+
+def get_pool_stats() -> dict:
+    """
+    Return, for each host the current process has connected to, the number
+    of requests sent and of connections opened. The more requests per
+    connection, the more handshakes are saved.
+    """
+    if _session is None or _session_pid != os.getpid():
+        return {}
+
+    stats = {}
+    for adapter in set(_session.adapters.values()):
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools[key]
+            stats[f'{pool.scheme}://{pool.host}:{pool.port}'] = {
+                'requests': pool.num_requests,
+                'connections': pool.num_connections,
+            }
+    return stats
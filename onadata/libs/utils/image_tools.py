@@ -1,13 +1,13 @@
 # coding: utf-8
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
-from tempfile import NamedTemporaryFile
 
-import requests
 from django.conf import settings
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
 from PIL import Image
 
+from onadata.libs.utils.http_client import get_session
 from onadata.libs.utils.viewer_tools import get_path
 
 
@@ -35,65 +35,95 @@ def get_dimensions(size_, longest_side):
     return flat(width, height)
 
 
-def _save_thumbnails(image, original_path, size, suffix):
-    # Thumbnail format will be set by original file extension.
-    # Use same format to keep transparency of GIF/PNG
-    nm = NamedTemporaryFile(suffix='.%s' % image.format)
+def _get_thumbnail_content(image, size):
+    """
+    Shrink `image` in place to fit in a `size` square and return it encoded.
+    Thumbnail format will be set by original file format. Use same format
+    to keep transparency of GIF/PNG
+    """
+    image_format = image.format
     try:
         # Ensure conversion to float in operations
         image.thumbnail(get_dimensions(image.size, float(size)), Image.LANCZOS)
     except ZeroDivisionError:
         pass
+
+    content = BytesIO()
     try:
-        image.save(nm.name)
+        image.save(content, format=image_format)
     except IOError:
         # e.g. `IOError: cannot write mode P as JPEG`, which gets raised when
         # someone uploads an image in an indexed-color format like GIF
-        image.convert('RGB').save(nm.name)
+        content = BytesIO()
+        image.convert('RGB').save(content, format=image_format)
+
+    return content.getvalue()
 
+
+def _save_thumbnail(path, content):
     # Try to delete file with the same name if it already exists to avoid useless file.
     # i.e if `file_<suffix>.jpg` exists, Storage will save `a_<suffix>_<random_string>.jpg`
     # but nothing in the code is aware about this `<random_string>
     try:
-        default_storage.delete(get_path(original_path, suffix))
+        default_storage.delete(path)
     except IOError:
         pass
 
-    default_storage.save(
-        get_path(original_path, suffix), ContentFile(nm.read()))
-
-    nm.close()
+    default_storage.save(path, ContentFile(content))
 
 
 def resize(filename):
+    """
+    Generate all the thumbnails of `filename` (see `settings.THUMB_CONF`).
+
+    The image is decoded once and shrunk successively, from the largest
+    thumbnail to the smallest. Thumbnails are then uploaded to the storage
+    at the same time.
+    """
     is_local = default_storage.__class__.__name__ == 'FileSystemStorage'
     image = None
-    original_path = None
 
     if is_local:
         path = default_storage.path(filename)
         image = Image.open(path)
-        original_path = filename
     else:
         path = default_storage.url(filename)
-        original_path = filename
-        req = requests.get(path)
+        req = get_session().get(path)
         if req.status_code == 200:
             im = BytesIO(req.content)
             image = Image.open(im)
 
-    if image:
-        conf = settings.THUMB_CONF
-        [_save_thumbnails(
-            image, original_path,
-            conf[key]['size'],
-            conf[key]['suffix']) for key in settings.THUMB_ORDER]
+    if not image:
+        return
+
+    conf = settings.THUMB_CONF
+    if image.format == 'JPEG':
+        # Let the decoder downscale the image (by 1/2, 1/4 or 1/8) while
+        # reading it, which is much faster than decoding it at full size
+        # when only the largest thumbnail is needed
+        largest_size = max(conf[key]['size'] for key in settings.THUMB_ORDER)
+        image.draft(
+            'RGB', get_dimensions(image.size, float(largest_size))
+        )
+
+    thumbnails = {}
+    for key in settings.THUMB_ORDER:
+        thumbnails[get_path(filename, conf[key]['suffix'])] = (
+            _get_thumbnail_content(image, conf[key]['size'])
+        )
+
+    with ThreadPoolExecutor(max_workers=len(thumbnails)) as executor:
+        # Consume the results to raise the errors of the uploads, if any
+        list(executor.map(_save_thumbnail, thumbnails, thumbnails.values()))
 
 
 def image_url(attachment, suffix):
     """
     Return url of an image given size(@param suffix)
-    e.g large, medium, small, or generate required thumbnail
+    e.g large, medium, small.
+
+    If the thumbnail has not been generated yet, its generation is scheduled
+    and the url of the original image is returned instead.
     """
     url = attachment.media_file.url
     if suffix == 'original':
@@ -102,14 +132,14 @@ def image_url(attachment, suffix):
         if suffix in settings.THUMB_CONF:
             size = settings.THUMB_CONF[suffix]['suffix']
             filename = attachment.media_file.name
-            if default_storage.exists(filename):
-                if default_storage.exists(get_path(filename, size)) and \
-                        default_storage.size(get_path(filename, size)) > 0:
-                    url = default_storage.url(
-                        get_path(filename, size))
-                else:
-                    resize(filename)
-                    return image_url(attachment, suffix)
+            thumbnail = get_path(filename, size)
+            if (
+                default_storage.exists(thumbnail)
+                and default_storage.size(thumbnail) > 0
+            ):
+                url = default_storage.url(thumbnail)
+            elif default_storage.exists(filename):
+                attachment.schedule_thumbnails_generation()
             else:
                 return None
     return url
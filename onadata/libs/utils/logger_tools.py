@@ -6,8 +6,10 @@ import os
 import re
 import sys
 import traceback
+from collections import defaultdict
 from datetime import date, datetime, timezone
-from xml.etree import ElementTree as ET
+from io import StringIO
+from typing import Optional, Union
 from xml.parsers.expat import ExpatError
 try:
     from zoneinfo import ZoneInfo
@@ -21,7 +23,7 @@ from django.core.exceptions import ValidationError, PermissionDenied
 from django.core.files.storage import default_storage
 from django.core.mail import mail_admins
 from django.db import IntegrityError, transaction
-from django.db.models import Q
+from django.db.models import Case, DateTimeField, F, Q, Value, When
 from django.http import (
     HttpResponse,
     HttpResponseNotFound,
@@ -40,6 +42,7 @@ from rest_framework.exceptions import NotAuthenticated
 from xml.dom import Node
 from wsgiref.util import FileWrapper
 
+from onadata.apps.logger import counters
 from onadata.apps.logger.exceptions import (
     DuplicateUUIDError,
     FormInactiveError,
@@ -56,7 +59,9 @@ from onadata.apps.logger.models.instance import (
     update_xform_daily_counter,
     update_xform_monthly_counter,
     update_xform_submission_count,
+    update_xform_submission_counters_in_bulk,
 )
+from onadata.apps.logger.models.survey_type import SurveyType
 from onadata.apps.logger.models.xform import XLSFormError
 from onadata.apps.logger.signals import (
     post_save_attachment,
@@ -68,14 +73,15 @@ from onadata.apps.logger.xform_instance_parser import (
     InstanceInvalidUserError,
     InstanceMultipleNodeError,
     DuplicateInstance,
+    ParsedSubmission,
     clean_and_parse_xml,
     get_uuid_from_xml,
-    get_deprecated_uuid_from_xml,
-    get_submission_date_from_xml,
     get_xform_media_question_xpaths,
 )
 from onadata.apps.main.models import UserProfile
+from onadata.apps.restservice.utils import call_service
 from onadata.apps.viewer.models.data_dictionary import DataDictionary
+from onadata.apps.viewer.models.mongo_outbox import MongoOutbox
 from onadata.apps.viewer.models.parsed_instance import ParsedInstance
 from onadata.libs.utils import common_tags
 from onadata.libs.utils.model_tools import queryset_iterator, set_uuid
@@ -92,6 +98,217 @@ uuid_regex = re.compile(r'<formhub>\s*<uuid>\s*([^<]+)\s*</uuid>\s*</formhub>',
 mongo_instances = settings.MONGO_DB.instances
 
 
+def bulk_create_instances(
+    username: str,
+    submissions: list[
+        tuple[
+            Union[str, ParsedSubmission],
+            list['django.core.files.uploadedfile.UploadedFile'],
+        ]
+    ],
+    status: str = 'submitted_via_web',
+    request: 'rest_framework.request.Request' = None,
+) -> list[tuple[Optional[Exception], Optional[Instance]]]:
+    """
+    Create many submissions, possibly of different forms, at once.
+
+    `submissions` is a list of `(xml, media_files)` tuples. Their forms are
+    looked up like `create_instance()` does, then submissions are saved form by
+    form with `bulk_create_xform_instances()`.
+
+    :returns: A list of `(error, instance)` tuples, in the same order as
+        `submissions`.
+    """
+    if username:
+        username = username.lower()
+
+    results = [(None, None)] * len(submissions)
+    xforms = {}
+    submissions_by_xform = defaultdict(list)
+
+    for index, (xml, media_files) in enumerate(submissions):
+        try:
+            if not isinstance(xml, ParsedSubmission):
+                xml = ParsedSubmission(xml)
+            # Several submissions of the same form usually come together: look
+            # up each form only once
+            xform_key = (
+                get_uuid_from_submission(xml.xml),
+                get_id_string_from_xml_str(xml),
+            )
+            if xform_key not in xforms:
+                xforms[xform_key] = get_xform_from_submission(xml, username)
+        except (
+            DjangoUnicodeDecodeError,
+            ExpatError,
+            Http404,
+            InstanceInvalidUserError,
+        ) as e:
+            results[index] = (e, None)
+            continue
+
+        xform = xforms[xform_key]
+        submissions_by_xform[xform].append((index, (xml, media_files)))
+
+    for xform, indexed_submissions in submissions_by_xform.items():
+        indexes, xform_submissions = zip(*indexed_submissions)
+        xform_results = bulk_create_xform_instances(
+            xform, list(xform_submissions), status, request
+        )
+        for index, result in zip(indexes, xform_results):
+            results[index] = result
+
+    return results
+
+
+def bulk_create_xform_instances(
+    xform: XForm,
+    submissions: list[
+        tuple[
+            Union[str, ParsedSubmission],
+            list['django.core.files.uploadedfile.UploadedFile'],
+        ]
+    ],
+    status: str = 'submitted_via_web',
+    request: 'rest_framework.request.Request' = None,
+) -> list[tuple[Optional[Exception], Optional[Instance]]]:
+    """
+    Create many submissions of `xform` at once.
+
+    Calling `create_instance()` for each submission costs a transaction, a
+    duplicate lookup, counter updates and a Mongo write per submission. Here,
+    duplicates are looked up with a single query, `Instance`s and
+    `ParsedInstance`s are inserted with `bulk_create()`, counters are
+    incremented once and Mongo is updated with a single `bulk_write()`.
+
+    Edits (i.e. submissions with a `deprecatedID`) and duplicates which bring
+    new attachments still go through `create_instance()`, as well as the whole
+    batch if it cannot be inserted, so that the error of each submission can be
+    reported.
+
+    :returns: A list of `(error, instance)` tuples, in the same order as
+        `submissions`, where `error` is the exception which prevented the
+        submission from being saved, e.g. `DuplicateInstance`.
+    """
+    results = [(None, None)] * len(submissions)
+
+    try:
+        check_submission_permissions(request, xform)
+        Instance(xform=xform).check_active(force=False)
+    except (
+        FormInactiveError,
+        NotAuthenticated,
+        PermissionDenied,
+        TemporarilyUnavailableError,
+    ) as e:
+        return [(e, None)] * len(submissions)
+
+    parsed_submissions = {}
+    for index, (xml, media_files) in enumerate(submissions):
+        try:
+            if not isinstance(xml, ParsedSubmission):
+                xml = ParsedSubmission(xml)
+            # Parse now to fail only this submission if its XML is malformed
+            xml.document
+        except (DjangoUnicodeDecodeError, ExpatError) as e:
+            results[index] = (e, None)
+        else:
+            parsed_submissions[index] = xml
+
+    # Same rule as in `create_instance()`: only submissions of forms which
+    # collect start time, or which have a UUID, can be duplicates
+    xml_hashes = {}
+    for index, parsed_submission in parsed_submissions.items():
+        if xform.has_start_time or parsed_submission.uuid is not None:
+            xml_hashes[index] = Instance.get_hash(parsed_submission.xml)
+
+    existing_xml_hashes = set()
+    if xml_hashes:
+        # Like `create_instance()`, match legacy submissions without a content
+        # hash by comparing their XML
+        matches = Instance.objects.filter(
+            Q(xml_hash__in=set(xml_hashes.values()))
+            | Q(
+                xml_hash=Instance.DEFAULT_XML_HASH,
+                xml__in=[
+                    parsed_submissions[index].xml for index in xml_hashes
+                ],
+            ),
+            xform__user_id=xform.user_id,
+        ).values_list(
+            'xml_hash',
+            Case(
+                When(xml_hash=Instance.DEFAULT_XML_HASH, then=F('xml')),
+                default=Value(None),
+            ),
+        )
+        for xml_hash, legacy_xml in matches:
+            if legacy_xml is not None:
+                xml_hash = Instance.get_hash(legacy_xml)
+            existing_xml_hashes.add(xml_hash)
+
+    new_indexes = []
+    one_by_one_indexes = []
+    for index, parsed_submission in parsed_submissions.items():
+        media_files = submissions[index][1]
+        xml_hash = xml_hashes.get(index)
+        if xml_hash in existing_xml_hashes:
+            if media_files:
+                # `create_instance()` saves the new attachments, if any
+                one_by_one_indexes.append(index)
+            else:
+                results[index] = (DuplicateInstance(), None)
+        elif parsed_submission.deprecated_uuid:
+            one_by_one_indexes.append(index)
+        else:
+            new_indexes.append(index)
+            if xml_hash is not None:
+                # Catch duplicates within the batch too
+                existing_xml_hashes.add(xml_hash)
+
+    if new_indexes:
+        try:
+            with transaction.atomic():
+                instances, synced_parsed_instances = _bulk_save_submissions(
+                    request,
+                    xform,
+                    [
+                        (parsed_submissions[index], submissions[index][1])
+                        for index in new_indexes
+                    ],
+                    status,
+                )
+        except Exception:
+            logging.warning(
+                'Could not save submissions of XForm %s at once',
+                xform.pk,
+                exc_info=True,
+            )
+            one_by_one_indexes.extend(new_indexes)
+        else:
+            for index, instance in zip(new_indexes, instances):
+                results[index] = (None, instance)
+            for parsed_instance in synced_parsed_instances:
+                call_service(parsed_instance)
+
+    for index in sorted(one_by_one_indexes):
+        try:
+            instance = create_instance(
+                xform.user.username,
+                StringIO(parsed_submissions[index].xml),
+                submissions[index][1],
+                status=status,
+                uuid=xform.uuid,
+                request=request,
+            )
+        except Exception as e:
+            results[index] = (e, None)
+        else:
+            results[index] = (None, instance)
+
+    return results
+
+
 def check_submission_permissions(
     request: 'rest_framework.request.Request', xform: XForm
 ):
@@ -151,13 +368,15 @@ def create_instance(
     if username:
         username = username.lower()
 
-    xml = smart_str(xml_file.read())
+    # Parse the submission only once and share it with the whole pipeline
+    parsed_submission = ParsedSubmission(xml_file.read())
+    xml = parsed_submission.xml
     xml_hash = Instance.get_hash(xml)
-    xform = get_xform_from_submission(xml, username, uuid)
+    xform = get_xform_from_submission(parsed_submission, username, uuid)
     check_submission_permissions(request, xform)
 
     # get new and deprecated uuid's
-    new_uuid = get_uuid_from_xml(xml)
+    new_uuid = parsed_submission.uuid
 
     # Dorey's rule from 2012 (commit 890a67aa):
     #   Ignore submission as a duplicate IFF
@@ -189,12 +408,21 @@ def create_instance(
         if not new_attachments:
             raise DuplicateInstance()
         else:
-            # Update Mongo via the related ParsedInstance
+            # Hashes match, so is the XML: reuse the parse to update Mongo via
+            # the related ParsedInstance
+            existing_instance.set_parsed_submission(parsed_submission)
             existing_instance.parsed_instance.save(asynchronous=False)
             return existing_instance
     else:
-        instance = save_submission(request, xform, xml, media_files, new_uuid,
-                                   status, date_created_override)
+        instance = save_submission(
+            request,
+            xform,
+            parsed_submission,
+            media_files,
+            new_uuid,
+            status,
+            date_created_override,
+        )
         return instance
 
 
@@ -249,8 +477,9 @@ def get_uuid_from_submission(xml):
 
 
 def get_xform_from_submission(xml, username, uuid=None):
+    # `xml` can be a string or an already `ParsedSubmission`
     # check alternative form submission ids
-    uuid = uuid or get_uuid_from_submission(xml)
+    uuid = uuid or get_uuid_from_submission(smart_str(xml))
 
     if not username and not uuid:
         raise InstanceInvalidUserError()
@@ -584,19 +813,27 @@ def save_attachments(
     new_attachments = []
     for f in media_files:
         attachment_filename = generate_attachment_filename(instance, f.name)
+        media_file_hash = hash_attachment_contents(f)
+        f.seek(0)
         existing_attachment = Attachment.objects.filter(
             instance=instance,
             media_file=attachment_filename,
             mimetype=f.content_type,
         ).first()
-        if existing_attachment and (existing_attachment.file_hash ==
-                                    hash_attachment_contents(f.read())):
+        # `file_hash` comes from the database, the stored file is only read
+        # for attachments saved before hashes were stored
+        if (
+            existing_attachment
+            and existing_attachment.file_hash == media_file_hash
+        ):
             # We already have this attachment!
             continue
-        f.seek(0)
         # This is a new attachment; save it!
         new_attachment = Attachment(
-            instance=instance, media_file=f, mimetype=f.content_type
+            instance=instance,
+            media_file=f,
+            mimetype=f.content_type,
+            media_file_hash=media_file_hash,
         )
         if defer_counting:
             # Only set the attribute if requested, i.e. don't bother ever
@@ -613,7 +850,7 @@ def save_attachments(
 def save_submission(
     request: 'rest_framework.request.Request',
     xform: XForm,
-    xml: str,
+    parsed_submission: ParsedSubmission,
     media_files: list['django.core.files.uploadedfile.UploadedFile'],
     new_uuid: str,
     status: str,
@@ -621,7 +858,7 @@ def save_submission(
 ) -> Instance:
 
     if not date_created_override:
-        date_created_override = get_submission_date_from_xml(xml)
+        date_created_override = parsed_submission.submission_date
 
     # We have to save the `Instance` to the database before we can associate
     # any `Attachment`s with it, but we are inside a transaction and saving
@@ -638,7 +875,7 @@ def save_submission(
     # responsible for calling `update_xform_submission_count()` if the returned
     # `Instance` has `defer_counting = True`.
     instance = _get_instance(
-        request, xml, new_uuid, status, xform, defer_counting=True
+        request, parsed_submission, new_uuid, status, xform, defer_counting=True
     )
 
     new_attachments, soft_deleted_attachments = save_attachments(
@@ -659,6 +896,9 @@ def save_submission(
             instance=instance)
 
     if not created:
+        # Share the same `Instance` object, and thus its already parsed XML,
+        # with the existing `ParsedInstance`
+        pi.instance = instance
         pi.save(asynchronous=False)
 
     # Now that the slow tasks are complete and we are (hopefully!) close to the
@@ -702,15 +942,16 @@ def get_soft_deleted_attachments(instance: Instance) -> list[Attachment]:
     if not media_question_xpaths:
         return []
 
-    # Parse instance XML to get the basename of each file of the updated
-    # submission
-    xml_parsed = ET.fromstring(instance.xml)
+    # Use the already parsed instance XML to get the basename of each file of
+    # the updated submission
+    parsed_submission = instance.get_parsed_submission()
+    root_tag_name = parsed_submission.document.documentElement.tagName
     basenames = []
 
     for media_question_xpath in media_question_xpaths:
         root_name, xpath_without_root = media_question_xpath.split('/', 1)
         try:
-            assert root_name == xml_parsed.tag
+            assert root_name == root_tag_name
         except AssertionError:
             logging.warning(
                 'Instance XML root tag name does not match with its form'
@@ -718,12 +959,11 @@ def get_soft_deleted_attachments(instance: Instance) -> list[Attachment]:
 
         # With repeat groups, several nodes can have the same XPath. We
         # need to retrieve all of them
-        questions = xml_parsed.findall(xpath_without_root)
+        questions = parsed_submission.find_all(xpath_without_root)
         for question in questions:
-            try:
-                basename = question.text
-            except AttributeError:
-                raise XPathNotFoundException
+            basename = (
+                question.firstChild.nodeValue if question.firstChild else None
+            )
 
             # Only keep non-empty fields
             if basename:
@@ -746,9 +986,133 @@ def get_soft_deleted_attachments(instance: Instance) -> list[Attachment]:
     return soft_deleted_attachments
 
 
+def _bulk_save_submissions(
+    request: 'rest_framework.request.Request',
+    xform: XForm,
+    submissions: list[
+        tuple[
+            ParsedSubmission,
+            list['django.core.files.uploadedfile.UploadedFile'],
+        ]
+    ],
+    status: str,
+) -> tuple[list[Instance], list[ParsedInstance]]:
+    """
+    Insert new submissions of `xform` with `bulk_create()`. It is the batch
+    counterpart of `save_submission()` and must be called inside a
+    transaction.
+
+    Returns the new `Instance`s and the `ParsedInstance`s synced with Mongo,
+    i.e. none of them if Mongo is updated through the outbox.
+    """
+    submitted_by = (
+        get_real_user(request)
+        if request and request.user.is_authenticated
+        else None
+    )
+    now = dj_timezone.now()
+    survey_types = {}
+    instances = []
+    dates_created = []
+
+    for parsed_submission, _ in submissions:
+        instance = Instance()
+        instance.set_parsed_submission(parsed_submission)
+        instance.user = submitted_by
+        instance.status = status
+        instance.xform = xform
+
+        date_created = parsed_submission.submission_date
+        if not date_created:
+            date_created = now
+        elif not dj_timezone.is_aware(date_created):
+            # default to utc?
+            date_created = dj_timezone.make_aware(date_created, timezone.utc)
+        instance.date_created = date_created
+        dates_created.append(date_created)
+
+        slug = instance.get_root_node_name()
+        if slug not in survey_types:
+            survey_types[slug], _ = SurveyType.objects.get_or_create(slug=slug)
+        instance.survey_type = survey_types[slug]
+
+        instance.prepare_for_save()
+        instances.append(instance)
+
+    Instance.objects.bulk_create(instances)
+
+    # `bulk_create()` sets `date_created` to the current time because of
+    # `auto_now_add`. Restore submission dates with a single query.
+    Instance.objects.filter(pk__in=[i.pk for i in instances]).update(
+        date_created=Case(
+            *[
+                When(pk=instance.pk, then=Value(date_created))
+                for instance, date_created in zip(instances, dates_created)
+            ],
+            output_field=DateTimeField(),
+        )
+    )
+    for instance, date_created in zip(instances, dates_created):
+        instance.date_created = date_created
+
+    attachment_storage_bytes = 0
+    for instance, (_, media_files) in zip(instances, submissions):
+        if not media_files:
+            continue
+        new_attachments, soft_deleted_attachments = save_attachments(
+            instance, media_files, defer_counting=True
+        )
+        for new_attachment in new_attachments:
+            del new_attachment.defer_counting
+            attachment_storage_bytes += new_attachment.media_file_size or 0
+        for soft_deleted_attachment in soft_deleted_attachments:
+            attachment_storage_bytes -= (
+                soft_deleted_attachment.media_file_size or 0
+            )
+
+    parsed_instances = []
+    for instance in instances:
+        parsed_instance = ParsedInstance(instance=instance)
+        parsed_instance._set_geopoint()
+        parsed_instances.append(parsed_instance)
+    ParsedInstance.objects.bulk_create(parsed_instances)
+
+    update_xform_submission_counters_in_bulk(xform, dates_created)
+    if attachment_storage_bytes and counters.is_buffered():
+        counters.buffer_attachment_storage_bytes(
+            xform.pk, xform.user_id, attachment_storage_bytes
+        )
+    elif attachment_storage_bytes:
+        UserProfile.objects.filter(user_id=xform.user_id).update(
+            attachment_storage_bytes=(
+                F('attachment_storage_bytes') + attachment_storage_bytes
+            )
+        )
+        XForm.objects.filter(pk=xform.pk).update(
+            attachment_storage_bytes=(
+                F('attachment_storage_bytes') + attachment_storage_bytes
+            )
+        )
+
+    if settings.MONGO_OUTBOX_ENABLED:
+        # See `ParsedInstance.save()`
+        MongoOutbox.enqueue(
+            [instance.pk for instance in instances], call_services=True
+        )
+        return instances, []
+
+    synced_ids = set(ParsedInstance.bulk_update_mongo(parsed_instances))
+
+    return instances, [
+        parsed_instance
+        for parsed_instance in parsed_instances
+        if parsed_instance.instance_id in synced_ids
+    ]
+
+
 def _get_instance(
     request: 'rest_framework.request.Request',
-    xml: str,
+    parsed_submission: ParsedSubmission,
     new_uuid: str,
     status: str,
     xform: XForm,
@@ -761,7 +1125,7 @@ def _get_instance(
     any rows in `logger_xform` or `main_userprofile`.
     """
     # check if it is an edit submission
-    old_uuid = get_deprecated_uuid_from_xml(xml)
+    old_uuid = parsed_submission.deprecated_uuid
     instances = Instance.objects.filter(uuid=old_uuid)
 
     if instances:
@@ -770,7 +1134,7 @@ def _get_instance(
         check_edit_submission_permissions(request, xform)
         InstanceHistory.objects.create(
             xml=instance.xml, xform_instance=instance, uuid=old_uuid)
-        instance.xml = xml
+        instance.set_parsed_submission(parsed_submission)
         instance._populate_xml_hash()
         instance.uuid = new_uuid
         instance.save()
@@ -784,7 +1148,7 @@ def _get_instance(
         # Avoid `Instance.objects.create()` so that we can set a Python-only
         # attribute, `defer_counting`, before saving
         instance = Instance()
-        instance.xml = xml
+        instance.set_parsed_submission(parsed_submission)
         instance.user = submitted_by
         instance.status = status
         instance.xform = xform
@@ -9,6 +9,7 @@ from django.http import HttpResponseRedirect, HttpResponse
 from django.shortcuts import get_object_or_404
 from guardian.shortcuts import get_perms_for_model, assign_perm
 
+from onadata.apps.logger.counters import get_pending_profile_counters
 from onadata.apps.logger.models import XForm, Note
 from onadata.libs.utils.string import base64_encodestring, base64_decodestring
 from onadata.apps.main.models import UserProfile
@@ -52,7 +53,8 @@ def set_profile_data(data, content_user):
         location += profile.country
     forms = content_user.xforms.filter(shared__exact=1)
     num_forms = forms.count()
-    user_instances = profile.num_of_submissions
+    pending_count, _ = get_pending_profile_counters(content_user.pk)
+    user_instances = profile.num_of_submissions + pending_count
     home_page = profile.home_page
     if home_page and re.match("http", home_page) is None:
         home_page = "http://%s" % home_page
@@ -1,12 +1,15 @@
 # coding: utf-8
 import os
 import logging
+import shutil
+import time
 import traceback
-import requests
 import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-from tempfile import NamedTemporaryFile
+from tempfile import NamedTemporaryFile, SpooledTemporaryFile
 
 from django.conf import settings
 from django.core.files.storage import default_storage, FileSystemStorage
@@ -14,9 +17,17 @@ from django.core.files.uploadedfile import InMemoryUploadedFile
 from django.core.mail import mail_admins
 from django.utils.translation import gettext as t
 
+from onadata.libs.utils.http_client import get_session
+
 
 SLASH = "/"
 
+# Size of the chunks copied from attachments to ZIP archives
+ZIP_CHUNK_SIZE = 1024 * 1024
+# Attachments downloaded for ZIP archives are kept in memory up to this size,
+# and written to temporary files beyond
+ZIP_SPOOL_MAX_SIZE = 10 * 1024 * 1024
+
 
 class MyError(Exception):
     pass
@@ -146,7 +157,7 @@ def enketo_url(
     if action == 'view':
         url = f'{url}/view'
 
-    req = requests.post(
+    req = get_session().post(
         url, data=values, auth=(settings.ENKETO_API_TOKEN, ''), verify=False
     )
 
@@ -200,29 +211,73 @@ def create_attachments_zipfile(attachments, output_file=None):
                     f'disabling seeking failed: {e}'
                 )
 
+    max_workers = settings.ATTACHMENTS_ZIP_EXPORT_WORKERS
     with zipfile.ZipFile(
         output_file, 'w', zipfile.ZIP_STORED, allowZip64=True
-    ) as zip_file:
+    ) as zip_file, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Download the next attachments while writing the current one, but
+        # no more than twice the number of workers ahead, to bound the disk
+        # (and memory) used by downloaded files waiting to be written
+        pending = deque()
         for attachment in attachments:
-            if default_storage.exists(attachment.media_file.name):
-                try:
-                    with default_storage.open(
-                        attachment.media_file.name, 'rb'
-                    ) as source_file:
-                        zip_file.writestr(
-                            attachment.media_file.name, source_file.read()
-                        )
-                except Exception as e:
-                    report_exception(
-                        "Error adding file \"{}\" to archive.".format(
-                            attachment.media_file.name
-                        ),
-                        e,
-                    )
+            filename = attachment.media_file.name
+            pending.append(
+                (filename, executor.submit(_download_attachment, filename))
+            )
+            if len(pending) >= max_workers * 2:
+                _write_attachment_to_zipfile(zip_file, *pending.popleft())
+
+        while pending:
+            _write_attachment_to_zipfile(zip_file, *pending.popleft())
 
     return output_file
 
 
+def _download_attachment(filename):
+    """
+    Copy the attachment `filename` from the storage to a local temporary
+    file, by chunks. Return `None` if it does not exist.
+    """
+    local_file = SpooledTemporaryFile(max_size=ZIP_SPOOL_MAX_SIZE)
+    try:
+        # Do not call `exists()` first: it would be one more request to remote
+        # storages for each attachment
+        with default_storage.open(filename, 'rb') as source_file:
+            shutil.copyfileobj(source_file, local_file, ZIP_CHUNK_SIZE)
+    except FileNotFoundError:
+        local_file.close()
+        return None
+    except Exception:
+        local_file.close()
+        raise
+
+    local_file.seek(0)
+    return local_file
+
+
+def _write_attachment_to_zipfile(zip_file, filename, future):
+    try:
+        local_file = future.result()
+        if local_file is None:
+            return
+        with local_file:
+            zip_info = zipfile.ZipInfo(
+                filename, date_time=time.localtime(time.time())[:6]
+            )
+            zip_info.external_attr = 0o600 << 16
+            # Lets `zipfile` know whether ZIP64 extensions are needed
+            local_file.seek(0, os.SEEK_END)
+            zip_info.file_size = local_file.tell()
+            local_file.seek(0)
+            with zip_file.open(zip_info, 'w') as zip_entry:
+                shutil.copyfileobj(local_file, zip_entry, ZIP_CHUNK_SIZE)
+    except Exception as e:
+        report_exception(
+            "Error adding file \"{}\" to archive.".format(filename),
+            e,
+        )
+
+
 def _get_form_url(username):
     if settings.TESTING_MODE:
         http_host = 'http://{}'.format(settings.TEST_HTTP_HOST)
@@ -1,22 +1,36 @@
 from __future__ import annotations
 
+import copy
+import json
 import re
 from typing import Optional, Union
 from xml.dom import Node
 
 from defusedxml import minidom
+from django.conf import settings
+from django.core.cache import cache
 from django.db.models import F, Q
 from django.db.models.query import QuerySet
 
 from onadata.apps.form_disclaimer.models import FormDisclaimer
+from onadata.libs.utils.hash import get_hash
+
+DISCLAIMER_CACHE_KEY_PREFIX = 'kobocat:xform_with_disclaimer'
 
 
 class XMLFormWithDisclaimer:
 
     # TODO merge this with KPI when Kobocat becomes a Django-app
-    def __init__(self, obj: Union['logger.XForm']):
+    def __init__(
+        self, obj: Union['logger.XForm'], disclaimers: Optional[list] = None
+    ):
+        """
+        `disclaimers` can be passed to avoid querying them again, see
+        `get_disclaimers_by_xform()`
+        """
         self._object = obj
         self._unique_id = obj.id_string
+        self._disclaimers = disclaimers
         self._add_disclaimer()
 
     def get_object(self):
@@ -138,6 +152,9 @@ class XMLFormWithDisclaimer:
 
     def _get_disclaimers(self, xform: 'logger.XForm') -> Optional[QuerySet]:
 
+        if self._disclaimers is not None:
+            return self._disclaimers or None
+
         # Order by '-message' to ensure that default is overridden later if
         # an override exists for the same language. See `_get_translations()`
         disclaimers = (
@@ -179,3 +196,83 @@ class XMLFormWithDisclaimer:
             return
 
         return translated, disclaimers_dict, default_language_code
+
+
+def get_disclaimers_by_xform(xform_ids: list) -> dict:
+    """
+    Return the disclaimers which apply to each form of `xform_ids`, in the
+    order expected by `XMLFormWithDisclaimer`, with a single query
+    """
+    disclaimers = list(
+        FormDisclaimer.objects.values(
+            'language_code', 'message', 'default', 'hidden', 'xform_id'
+        )
+        .filter(Q(xform__isnull=True) | Q(xform_id__in=xform_ids))
+        .order_by('-hidden', '-xform_id', 'language_code')
+    )
+    # Keeping the rows of each form in the global order keeps them sorted
+    return {
+        xform_id: [
+            d for d in disclaimers
+            if d['xform_id'] is None or d['xform_id'] == xform_id
+        ]
+        for xform_id in xform_ids
+    }
+
+
+def get_xml_with_disclaimer(
+    xform: 'logger.XForm', disclaimers: Optional[list] = None
+) -> str:
+    """
+    Return the XML of `xform` with its disclaimer, from the cache if the form
+    and its disclaimers have not changed since it was rendered
+    """
+    return _get_xml_with_disclaimer(xform, disclaimers)[0]
+
+
+def get_xml_with_disclaimer_hash(
+    xform: 'logger.XForm', disclaimers: Optional[list] = None
+) -> str:
+    """
+    Return the MD5 hash of `get_xml_with_disclaimer()`, without fetching the
+    XML from the cache
+    """
+    return _get_xml_with_disclaimer(xform, disclaimers, hash_only=True)[1]
+
+
+def _get_xml_with_disclaimer(
+    xform: 'logger.XForm',
+    disclaimers: Optional[list],
+    hash_only: bool = False,
+) -> tuple[Optional[str], str]:
+    if disclaimers is None:
+        disclaimers = get_disclaimers_by_xform([xform.pk])[xform.pk]
+
+    # Disclaimers are edited from KPI, which does not send any signal to
+    # KoBoCAT: their content is part of the key instead
+    disclaimer_version = get_hash(json.dumps(disclaimers, sort_keys=True))
+    cache_key = ':'.join([
+        DISCLAIMER_CACHE_KEY_PREFIX,
+        str(xform.pk),
+        str(xform.date_modified.timestamp()),
+        disclaimer_version,
+    ])
+
+    if hash_only:
+        if md5_hash := cache.get(f'{cache_key}:md5'):
+            return None, md5_hash
+    else:
+        cached = cache.get_many([f'{cache_key}:xml', f'{cache_key}:md5'])
+        if len(cached) == 2:
+            return cached[f'{cache_key}:xml'], cached[f'{cache_key}:md5']
+
+    # `XMLFormWithDisclaimer` modifies the XML of the object it is given
+    xml = XMLFormWithDisclaimer(
+        copy.copy(xform), disclaimers
+    ).get_object().xml
+    md5_hash = get_hash(xml)
+    cache.set_many(
+        {f'{cache_key}:xml': xml, f'{cache_key}:md5': md5_hash},
+        settings.XFORM_DISCLAIMER_CACHE_TIMEOUT,
+    )
+    return xml, md5_hash
@@ -506,10 +506,28 @@ THUMB_CONF = {
 }
 # order of thumbnails from largest to smallest
 THUMB_ORDER = ['large', 'medium', 'small']
+# Thumbnails are generated by Celery when images are uploaded. Point this to a
+# queue consumed by a dedicated worker (`celery worker -Q ...`) to keep large
+# batches of uploads from delaying other tasks
+THUMBNAILS_CELERY_QUEUE = env.str('THUMBNAILS_CELERY_QUEUE', 'kobocat_queue')
+# Number of seconds before missing thumbnails of an image can be requested
+# again, e.g. if their generation failed
+THUMBNAILS_GENERATION_LOCK_TIMEOUT = env.int(
+    'THUMBNAILS_GENERATION_LOCK_TIMEOUT', 600
+)
 
 # Number of times Celery retries to send data to external rest service
 REST_SERVICE_MAX_RETRIES = 3
 
+# Queue the submissions to send to each KPI hook in Redis, and send them with
+# one Celery task per hook every KPI_HOOK_BATCH_WINDOW seconds, up to
+# KPI_HOOK_BATCH_SIZE at a time, instead of one task per submission (see
+# `onadata.apps.restservice.utils.enqueue_kpi_hook()`)
+KPI_HOOK_BATCHING_ENABLED = env.bool('KPI_HOOK_BATCHING_ENABLED', False)
+KPI_HOOK_BATCH_WINDOW = env.int('KPI_HOOK_BATCH_WINDOW', 5)
+KPI_HOOK_BATCH_SIZE = env.int('KPI_HOOK_BATCH_SIZE', 500)
+KPI_HOOK_BATCH_REDIS_CACHE = 'default'
+
 # BEGIN external service integration codes
 # ToDo Replace `KOBOCAT_AWS_*` with `AWS_*` . Only one account for
 # both KPI and KoBoCAT is supported anyway
@@ -542,6 +560,10 @@ GOOGLE_ANALYTICS_DOMAIN = "auto"
 # duration to keep zip exports before deletion (in seconds)
 ZIP_EXPORT_COUNTDOWN = 24 * 60 * 60
 
+# Number of attachments downloaded from the storage at the same time while
+# building media ZIP exports (see `create_attachments_zipfile()`)
+ATTACHMENTS_ZIP_EXPORT_WORKERS = env.int('ATTACHMENTS_ZIP_EXPORT_WORKERS', 4)
+
 # default content length for submission requests
 DEFAULT_CONTENT_LENGTH = 10000000
 
@@ -628,6 +650,66 @@ HASH_BIG_FILE_SIZE_THRESHOLD = 0.5 * 1024 * 1024  # 512 kB
 # Should match KoBoCAT setting
 HASH_BIG_FILE_CHUNK = 16 * 1024  # 16 kB
 
+# Engine used by `XFormInstanceParser` to parse submissions: `minidom` builds
+# a full DOM, `iterparse` streams the XML and is faster and leaner on large
+# submissions with many repeats
+XFORM_INSTANCE_PARSER_ENGINE = env.str(
+    'XFORM_INSTANCE_PARSER_ENGINE', 'minidom'
+)
+
+# Maximum number of compiled surveys (see `CompiledSurvey`) kept in memory by
+# each process
+DATA_DICTIONARY_CACHE_SIZE = env.int('DATA_DICTIONARY_CACHE_SIZE', 128)
+
+# Number of submissions saved at once by ZIP, CSV and Briefcase imports (see
+# `onadata.libs.utils.logger_tools.bulk_create_instances()`)
+BULK_SUBMISSION_BATCH_SIZE = env.int('BULK_SUBMISSION_BATCH_SIZE', 100)
+
+# Accumulate the submission and attachment storage counters in Redis and write
+# them periodically, instead of updating the same rows on each submission (see
+# `onadata.apps.logger.counters`)
+SUBMISSION_COUNTERS_BUFFERED = env.bool('SUBMISSION_COUNTERS_BUFFERED', False)
+SUBMISSION_COUNTERS_FLUSH_INTERVAL = env.int(
+    'SUBMISSION_COUNTERS_FLUSH_INTERVAL', 60
+)
+SUBMISSION_COUNTERS_REDIS_CACHE = 'default'
+
+# Write submissions to Mongo from a worker, through an outbox table filled in
+# the submission transaction, instead of synchronously in the request (see
+# `onadata.apps.viewer.models.mongo_outbox.MongoOutbox`)
+MONGO_OUTBOX_ENABLED = env.bool('MONGO_OUTBOX_ENABLED', False)
+MONGO_OUTBOX_BATCH_SIZE = env.int('MONGO_OUTBOX_BATCH_SIZE', 500)
+# Submissions which fail to be written this number of times are left in the
+# outbox, see their `last_error`
+MONGO_OUTBOX_MAX_ATTEMPTS = env.int('MONGO_OUTBOX_MAX_ATTEMPTS', 5)
+
+# Stream the JSON list of submissions of the data API record by record,
+# instead of rendering the whole page in memory
+DATA_API_STREAMING_ENABLED = env.bool('DATA_API_STREAMING_ENABLED', False)
+
+# Append new submissions to the previous CSV export of a form instead of
+# exporting all of them again, when possible
+INCREMENTAL_CSV_EXPORTS_ENABLED = env.bool(
+    'INCREMENTAL_CSV_EXPORTS_ENABLED', False
+)
+
+# Number of seconds the XML of forms with their disclaimer, and its hash, are
+# kept in the cache (see `onadata.libs.utils.xml.get_xml_with_disclaimer()`)
+XFORM_DISCLAIMER_CACHE_TIMEOUT = env.int(
+    'XFORM_DISCLAIMER_CACHE_TIMEOUT', 24 * 60 * 60
+)
+
+# Outbound HTTP requests (see `onadata.libs.utils.http_client`). The pool
+# keeps up to HTTP_CLIENT_POOL_MAXSIZE connections alive per host, for up to
+# HTTP_CLIENT_POOL_CONNECTIONS hosts. Timeout is in seconds.
+HTTP_CLIENT_TIMEOUT = env.int('HTTP_CLIENT_TIMEOUT', 30)
+HTTP_CLIENT_MAX_RETRIES = env.int('HTTP_CLIENT_MAX_RETRIES', 2)
+HTTP_CLIENT_RETRY_BACKOFF_FACTOR = env.float(
+    'HTTP_CLIENT_RETRY_BACKOFF_FACTOR', 0.2
+)
+HTTP_CLIENT_POOL_CONNECTIONS = env.int('HTTP_CLIENT_POOL_CONNECTIONS', 10)
+HTTP_CLIENT_POOL_MAXSIZE = env.int('HTTP_CLIENT_POOL_MAXSIZE', 10)
+
 # PostgreSQL is considered as the default engine. Some DB queries
 # rely on PostgreSQL engine to be executed. It needs to be set to `False` if
 # the database is SQLite (e.g.: running unit tests locally).
@@ -711,6 +793,12 @@ CELERY_BEAT_SCHEDULE = {
         "schedule": crontab(hour=0, minute=0),
         "options": {"queue": "kobocat_queue"},
     },
+    # Drain submissions left in the Mongo outbox, e.g. while Mongo was down
+    "drain-mongo-outbox": {
+        "task": "onadata.apps.viewer.tasks.drain_mongo_outbox",
+        "schedule": timedelta(minutes=5),
+        "options": {"queue": "kobocat_queue"},
+    },
     # Run maintenance every day at 20:00 UTC
     "perform-maintenance": {
         "task": "onadata.apps.logger.tasks.perform_maintenance",
@@ -719,8 +807,22 @@ CELERY_BEAT_SCHEDULE = {
     },
 }
 
+if SUBMISSION_COUNTERS_BUFFERED:
+    # Write buffered submission counters
+    CELERY_BEAT_SCHEDULE["flush-buffered-counters"] = {
+        "task": "onadata.apps.logger.tasks.flush_buffered_counters",
+        "schedule": timedelta(seconds=SUBMISSION_COUNTERS_FLUSH_INTERVAL),
+        "options": {"queue": "kobocat_queue"},
+    }
+
 CELERY_TASK_DEFAULT_QUEUE = "kobocat_queue"
 
+CELERY_TASK_ROUTES = {
+    "onadata.apps.logger.tasks.generate_thumbnails": {
+        "queue": THUMBNAILS_CELERY_QUEUE
+    },
+}
+
 
 ################################
 # Enketo Express settings      #